@@ -5,8 +5,14 @@ Analyze Actions sections in ALL .businessclass files
 
 import os
 import re
-from pathlib import Path
 from collections import defaultdict
+from functools import partial
+
+from corpus_pack import read_text
+from lpl_business_class import iter_business_class_files
+from lpl_config import output_file, reference_dir
+from prefetch_loader import prefetch
+from scan_metrics import ScanMetrics
 
 def extract_actions_section(file_content):
     """Extract Actions section from LPL file"""
@@ -81,7 +87,7 @@ def analyze_action(action):
     }
 
 def main():
-    business_class_dir = Path("C:/Visual Basic Code/LPL Library/References/business class")
+    business_class_dir = reference_dir('business class')
     
     # Statistics
     total_files = 0
@@ -98,48 +104,50 @@ def main():
     print("Analyzing ALL .businessclass files for Actions sections...")
     
     # Process all .businessclass files
-    for file_path in business_class_dir.glob("*.businessclass"):
+    # Files are read ahead on a thread pool while the current one is parsed
+    read = partial(read_text, encoding='utf-8', errors='strict')
+    paths = [path for _, path in iter_business_class_files(business_class_dir)]
+    metrics = ScanMetrics('all actions', total_files=len(paths))
+    for file_path, content, error in metrics.timed(prefetch(paths, read), 'read'):
         total_files += 1
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-        except:
-            continue
-        
-        actions_section = extract_actions_section(content)
-        if not actions_section:
+        if error is not None:
+            metrics.add_error()
             continue
         
-        files_with_actions += 1
-        actions = parse_actions(actions_section)
-        
-        if actions:
-            file_action_count = len(actions)
-            total_actions += file_action_count
-            files_by_action_count[file_action_count] += 1
+        with metrics.file(file_path, len(content)):
+            with metrics.phase('tokenize'):
+                actions_section = extract_actions_section(content)
+                actions = parse_actions(actions_section) if actions_section else []
+            if not actions_section:
+                continue
             
-            for action in actions:
-                details = analyze_action(action)
-                action_types[action['type']] += 1
-                
-                if details['restricted']:
-                    restricted_actions += 1
-                if details['confirmation']:
-                    confirmation_actions += 1
-                
-                # Track complex actions
-                if details['rules'] > 50 or details['parameters'] > 10:
-                    complex_actions.append({
-                        'file': file_path.name,
-                        'name': action['name'],
-                        'type': action['type'],
-                        'rules': details['rules'],
-                        'parameters': details['parameters']
-                    })
-        
-        if total_files % 500 == 0:
-            print(f"Processed {total_files} files...")
+            files_with_actions += 1
+            
+            with metrics.phase('analyze'):
+                if actions:
+                    file_action_count = len(actions)
+                    total_actions += file_action_count
+                    files_by_action_count[file_action_count] += 1
+                    
+                    for action in actions:
+                        details = analyze_action(action)
+                        action_types[action['type']] += 1
+                        
+                        if details['restricted']:
+                            restricted_actions += 1
+                        if details['confirmation']:
+                            confirmation_actions += 1
+                        
+                        # Track complex actions
+                        if details['rules'] > 50 or details['parameters'] > 10:
+                            complex_actions.append({
+                                'file': os.path.basename(file_path),
+                                'name': action['name'],
+                                'type': action['type'],
+                                'rules': details['rules'],
+                                'parameters': details['parameters']
+                            })
     
     # Generate report
     report = f"""=== COMPREHENSIVE ACTIONS ANALYSIS ({total_files} files) ===
@@ -177,13 +185,16 @@ def main():
     for action in complex_actions[:20]:
         report += f"\n- {action['file']}.{action['name']}: {action['rules']} rules, {action['parameters']} params"
     
-    print(report)
-    
-    # Save to file
-    with open("C:/Visual Basic Code/LPL Library/Outputs/all_actions_analysis.txt", 'w') as f:
-        f.write(report)
+    with metrics.phase('report'):
+        print(report)
+        
+        # Save to file
+        report_file = output_file('all_actions_analysis.txt')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(report)
     
-    print(f"\nAnalysis complete. Results saved to Outputs/all_actions_analysis.txt")
+    print(f"\nAnalysis complete. Results saved to {report_file}\n")
+    metrics.finish(output_file('all_actions_metrics.json'))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,47 +1,53 @@
 import os
 import re
-from collections import defaultdict
+from array import array
+
+from corpus_mmap import MappedArtifact
+from lpl_business_class import iter_business_class_files
+from lpl_config import output_file, reference_dir
+from lpl_outline import TAB_SIZE, measure_indent
+from lpl_symbols import SymbolTable, symbol_counts
+from prefetch_loader import prefetch
 
 def analyze_all_sets():
-    """Analyze Sets sections in all .businessclass files"""
+    """Analyze Sets sections in all business class files"""
     
-    directory = r"C:\Visual Basic Code\LPL Library\References\business class"
+    directory = reference_dir('business class')
     
     # Statistics
     total_files = 0
     files_with_sets = 0
     total_sets = 0
-    set_names = defaultdict(int)
-    set_properties = defaultdict(int)
+    # Set names and property lines repeat across thousands of classes; intern them
+    # once and count by symbol ID
+    table = SymbolTable()
+    set_names, set_properties = {}, {}
     
     # Results storage
     results = []
     
-    # Process all .businessclass files
-    for filename in os.listdir(directory):
-        if not filename.endswith('.businessclass'):
-            continue
-            
+    # Process all business class files
+    # Files are opened ahead on a thread pool while the current one is parsed
+    paths = [path for _, path in iter_business_class_files(directory)]
+    for file_path, artifact, error in prefetch(paths, MappedArtifact):
+        filename = os.path.basename(file_path)
         total_files += 1
-        file_path = os.path.join(directory, filename)
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-        except:
+        if error is not None:
             continue
         
-        # Find Sets section
-        sets_match = re.search(r'\n\tSets\n(.*?)(?=\n\t[A-Z]|\n[A-Z]|\Z)', content, re.DOTALL)
+        # Only the Sets section is decoded; the rest of the file stays mapped bytes
+        with artifact:
+            sets_content = artifact.section_text('Sets')
         
-        if not sets_match:
+        if not sets_content:
             continue
             
         files_with_sets += 1
-        sets_content = sets_match.group(1)
         
         # Parse sets
         file_sets = []
+        name_ids, property_ids = [], []
         lines = sets_content.split('\n')
         current_set = None
         
@@ -49,35 +55,44 @@ def analyze_all_sets():
             line = line.rstrip()
             if not line or line.isspace():
                 continue
+            # Exports indent with tabs or with four spaces
+            indent = measure_indent(line)[0]
                 
             # Set name
-            if re.match(r'\t\t[A-Za-z]', line):
-                set_name = line.strip()
-                current_set = {'name': set_name, 'properties': []}
+            if indent == 2 * TAB_SIZE and re.match(r'\s*[A-Za-z]', line):
+                symbol = table.intern(line.strip())
+                current_set = {'name': table.name(symbol), 'properties': []}
                 file_sets.append(current_set)
-                set_names[set_name] += 1
+                name_ids.append(symbol)
                 total_sets += 1
             # Properties
-            elif current_set and line.startswith('\t\t\t'):
-                prop = line.strip()
-                current_set['properties'].append(prop)
-                set_properties[prop] += 1
+            elif current_set and indent > 2 * TAB_SIZE:
+                symbol = table.intern(line.strip())
+                current_set['properties'].append(table.name(symbol))
+                property_ids.append(symbol)
         
         if file_sets:
             results.append({'file': filename, 'sets': file_sets})
+            set_names[filename] = array('I', name_ids)
+            set_properties[filename] = array('I', property_ids)
+    
+    name_counts = symbol_counts(table, set_names)
+    property_counts = symbol_counts(table, set_properties)
     
     # Output results
     print(f"=== COMPREHENSIVE SETS ANALYSIS ({total_files} files) ===\n")
-    print(f"Files with Sets: {files_with_sets} ({files_with_sets/total_files*100:.1f}%)")
+    print(f"Files with Sets: {files_with_sets} ({files_with_sets/max(total_files, 1)*100:.1f}%)")
     print(f"Total Sets found: {total_sets}")
     
     print(f"\n=== TOP SET NAMES ===")
-    for name, count in sorted(set_names.items(), key=lambda x: x[1], reverse=True)[:20]:
-        print(f"{name}: {count} files")
+    for symbol in sorted(range(len(table)), key=name_counts.__getitem__, reverse=True)[:20]:
+        if name_counts[symbol]:
+            print(f"{table.name(symbol)}: {name_counts[symbol]} files")
     
     print(f"\n=== TOP SET PROPERTIES ===")
-    for prop, count in sorted(set_properties.items(), key=lambda x: x[1], reverse=True)[:15]:
-        print(f"{prop}: {count} occurrences")
+    for symbol in sorted(range(len(table)), key=property_counts.__getitem__, reverse=True)[:15]:
+        if property_counts[symbol]:
+            print(f"{table.name(symbol)}: {property_counts[symbol]} occurrences")
     
     print(f"\n=== FILES WITH MOST SETS ===")
     results.sort(key=lambda x: len(x['sets']), reverse=True)
@@ -85,13 +100,13 @@ def analyze_all_sets():
         print(f"{result['file']}: {len(result['sets'])} sets")
     
     # Save detailed results
-    output_file = r"C:\Visual Basic Code\LPL Library\Outputs\sets_analysis_complete.txt"
-    with open(output_file, 'w') as f:
+    report_file = output_file('sets_analysis_complete.txt')
+    with open(report_file, 'w', encoding='utf-8') as f:
         f.write(f"COMPREHENSIVE SETS ANALYSIS - {total_files} BusinessClass Files\n")
         f.write("="*60 + "\n\n")
         f.write(f"Statistics:\n")
         f.write(f"- Total files: {total_files}\n")
-        f.write(f"- Files with Sets: {files_with_sets} ({files_with_sets/total_files*100:.1f}%)\n")
+        f.write(f"- Files with Sets: {files_with_sets} ({files_with_sets/max(total_files, 1)*100:.1f}%)\n")
         f.write(f"- Total Sets: {total_sets}\n\n")
         
         f.write("All Files with Sets:\n")
@@ -103,6 +118,7 @@ def analyze_all_sets():
                 for prop in s['properties']:
                     f.write(f"    - {prop}\n")
     
-    print(f"\nDetailed results saved to: {output_file}")
+    print(f"\nDetailed results saved to: {report_file}")
 
-analyze_all_sets()
\ No newline at end of file
+if __name__ == "__main__":
+    analyze_all_sets()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Build the dependency DAG of derived fields and conditions across ALL
+.busclass files, including cross-class references through relations,
+then report cycles, evaluation order and fan-in hot spots.
+"""
+
+import re
+import sys
+from collections import defaultdict
+
+from lpl_business_class import load_business_classes
+from lpl_config import output_file, reference_dir
+from lpl_graph import strongly_connected_components
+from scan_metrics import ScanMetrics
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+OUTPUT_FILE = output_file('derived_field_dependencies.txt')
+METRICS_FILE = output_file('derived_field_dependencies_metrics.json')
+
+COMPUTED_KINDS = ('derived', 'condition')
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*')
+STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
+ATTRIBUTE_LINE_PATTERN = re.compile(
+    r'(?:type is|default label is|label is|short label is|classic name is|restricted|precision is|size is)\b')
+
+# Relative cost of walking a relation while computing a field
+ONE_TO_ONE_COST = 1
+ONE_TO_MANY_COST = 5
+
+
+def expression_lines(node):
+    """Yield the expression lines of a derived field or condition body"""
+    for child in node.walk():
+        if child is node:
+            continue
+        if ATTRIBUTE_LINE_PATTERN.match(child.text):
+            continue
+        yield STRING_PATTERN.sub('""', child.text)
+
+
+def relation_target(model, member, models):
+    """Return (target class, cost) when member leads to another class, else None"""
+    relation = model['relations'].get(member)
+    if relation and relation['target']:
+        cost = ONE_TO_MANY_COST if relation['type'] == 'one-to-many' else ONE_TO_ONE_COST
+        return relation['target'], cost
+    # Key fields whose type is a business class imply a one-to-one lookup
+    if model['members'].get(member) == 'persistent':
+        field_type = model['field_types'].get(member)
+        if field_type in models:
+            return field_type, ONE_TO_ONE_COST
+    return None
+
+
+def resolve_reference(models, class_name, path):
+    """Resolve a dotted reference to (node, relation hops) where node is (class, member)"""
+    hops = []
+    current = class_name
+    parts = path.split('.')
+    for index, part in enumerate(parts):
+        model = models.get(current)
+        if model is None or part not in model['members']:
+            return None, hops
+        is_last = index == len(parts) - 1
+        if model['members'][part] in COMPUTED_KINDS or is_last:
+            return (current, part), hops
+        target = relation_target(model, part, models)
+        if target is None:
+            # Group field member access such as InvoiceAmount.CurrencyAmount
+            return (current, part), hops
+        hops.append((current, part, target[1]))
+        current = target[0]
+    return None, hops
+
+
+def build_dependency_graph(models, instance_references=None):
+    """Return (edges, lookup costs) for every derived field and condition in models
+
+    A relation path that lands back on the same class (PYCompanyPeriodTotalsRel.ClosingAR12
+    reads the prior-year instance) is not an edge: nodes are (class, member), so it would
+    look like a cycle. Such references are appended to instance_references when given.
+    """
+    edges = defaultdict(set)
+    lookups = defaultdict(int)
+    for class_name, model in models.items():
+        for kind, members in (('derived', model['derived']), ('condition', model['conditions'])):
+            for member, node in members.items():
+                source = (class_name, member)
+                edges[source]
+                for line in expression_lines(node):
+                    for path in IDENTIFIER_PATTERN.findall(line):
+                        target, hops = resolve_reference(models, class_name, path)
+                        for hop_class, relation, cost in hops:
+                            lookups[source] += cost
+                        if not target or target == source or \
+                                models[target[0]]['members'].get(target[1]) not in COMPUTED_KINDS:
+                            continue
+                        if hops and target[0] == class_name:
+                            if instance_references is not None:
+                                instance_references.append((source, path))
+                            continue
+                        edges[source].add(target)
+    return edges, lookups
+
+
+def evaluation_order(edges, cyclic):
+    """Kahn topological order (dependencies first), skipping nodes on cycles"""
+    remaining = {node: len([dep for dep in deps if dep not in cyclic]) for node, deps in edges.items() if node not in cyclic}
+    dependents = defaultdict(list)
+    for node, deps in edges.items():
+        if node in cyclic:
+            continue
+        for dep in deps:
+            if dep not in cyclic:
+                dependents[dep].append(node)
+    ready = sorted(node for node, count in remaining.items() if count == 0)
+    order = []
+    while ready:
+        node = ready.pop()
+        order.append(node)
+        for dependent in dependents[node]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                ready.append(dependent)
+    return order
+
+
+def dependency_closures(edges):
+    """Every computed field each node needs, itself included (one shared set per cycle)"""
+    closures = {}
+    # Components arrive sinks first, so every dependency's closure is ready when needed
+    for component in strongly_connected_components(edges, trivial=True):
+        closure = set(component)
+        for node in component:
+            for dep in edges.get(node, ()):
+                if dep not in closure:
+                    closure |= closures.get(dep, {dep})
+        closure = frozenset(closure)
+        for node in component:
+            closures[node] = closure
+    return closures
+
+
+def transitive_lookup_costs(edges, lookups, closures=None):
+    """Total relation lookups needed to compute each field from scratch
+
+    Lookups are summed over the union of the dependency closure, so a field
+    shared by several dependency paths (a diamond) is counted once.
+    """
+    closures = dependency_closures(edges) if closures is None else closures
+    totals = {}
+    for node, closure in closures.items():
+        if id(closure) not in totals:
+            totals[id(closure)] = sum(lookups.get(member, 0) for member in closure)
+    return {node: totals[id(closure)] for node, closure in closures.items()}
+
+
+def fan_in_counts(edges):
+    """Count how many computed fields depend directly on each field"""
+    fan_in = defaultdict(int)
+    for deps in edges.values():
+        for dep in deps:
+            fan_in[dep] += 1
+    return fan_in
+
+
+def analyze_derived_field_dependencies(directory=BUSINESS_CLASS_DIR, metrics=None):
+    """Analyze derived field / condition dependencies across all business classes"""
+    metrics = metrics or ScanMetrics('derived field dependencies')
+    print("Loading business classes...")
+    models = load_business_classes(directory, metrics)
+    with metrics.phase('dependency graph'):
+        return dependency_results(models)
+
+
+def dependency_results(models):
+    """Graph, cycles, evaluation order and hot spots for loaded models"""
+    instance_references = []
+    edges, lookups = build_dependency_graph(models, instance_references)
+    cycles = strongly_connected_components(edges)
+    cyclic = {node for component in cycles for node in component}
+    order = evaluation_order(edges, cyclic)
+    costs = transitive_lookup_costs(edges, lookups)
+    fan_in = fan_in_counts(edges)
+
+    hot_spots = sorted(
+        ((fan_in[node] * costs.get(node, 0), node) for node in edges if fan_in[node] and costs.get(node, 0)),
+        reverse=True)
+
+    per_class_order = defaultdict(list)
+    for node in order:
+        per_class_order[node[0]].append(node[1])
+
+    return {
+        'classes': len(models),
+        'nodes': len(edges),
+        'edges': sum(len(deps) for deps in edges.values()),
+        'cross_class_edges': sum(1 for node, deps in edges.items() for dep in deps if dep[0] != node[0]),
+        'cycles': cycles,
+        'instance_references': instance_references,
+        'order': per_class_order,
+        'costs': costs,
+        'fan_in': fan_in,
+        'hot_spots': hot_spots,
+    }
+
+
+def format_report(results):
+    """Render the dependency analysis as text"""
+    lines = [f"=== DERIVED FIELD DEPENDENCY ANALYSIS ({results['classes']} classes) ===", ""]
+    lines.append("Statistics:")
+    lines.append(f"- Computed fields (derived + conditions): {results['nodes']:,}")
+    lines.append(f"- Dependency edges: {results['edges']:,}")
+    lines.append(f"- Cross-class edges (via relations): {results['cross_class_edges']:,}")
+    lines.append(f"- Dependency cycles: {len(results['cycles'])}")
+    lines.append(f"- References to another instance of the same class (not edges): "
+                 f"{len(results['instance_references']):,}")
+
+    lines.append("\n**Top 30 Fan-in Hot Spots (dependents x relation lookups):**")
+    for score, (class_name, member) in results['hot_spots'][:30]:
+        lines.append(f"  {class_name}.{member}: {results['fan_in'][(class_name, member)]} dependents x "
+                     f"{results['costs'][(class_name, member)]} lookups = {score}")
+
+    lines.append("\n**Most Expensive Fields (transitive relation lookups):**")
+    for (class_name, member), cost in sorted(results['costs'].items(), key=lambda x: x[1], reverse=True)[:20]:
+        lines.append(f"  {class_name}.{member}: {cost} lookups")
+
+    lines.append("\n**Cycles:**")
+    for component in results['cycles'][:20]:
+        lines.append("  {" + ", ".join(sorted(f"{c}.{m}" for c, m in component)) + "}")
+
+    lines.append("\n**References Through Another Instance of the Same Class:**")
+    for (class_name, member), path in results['instance_references'][:20]:
+        lines.append(f"  {class_name}.{member} -> {path}")
+    return '\n'.join(lines)
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else BUSINESS_CLASS_DIR
+    metrics = ScanMetrics('derived field dependencies')
+    results = analyze_derived_field_dependencies(directory, metrics)
+    with metrics.phase('report'):
+        report = format_report(results)
+        print(report)
+
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(report)
+            f.write("\n\nEvaluation Order by Class:\n")
+            for class_name in sorted(results['order']):
+                f.write(f"\n{class_name}:\n")
+                for member in results['order'][class_name]:
+                    f.write(f"  {member}\n")
+
+    print(f"\nDetailed analysis saved to: {OUTPUT_FILE}\n")
+    metrics.finish(METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Estimate the per-row lookup cost of every list in References/list.
+
+Each Display Field (and each reference in a list's Instance Selection) is
+resolved through the business class model of the list's class: dotted paths
+cost one lookup per relation hop (one-to-many hops, i.e. aggregates, cost
+more), and derived fields and conditions add the lookups of every field in
+their dependency closure (analyze_derived_field_dependencies). A closure
+field shared by several Display Fields is counted once per row. Lists are
+ranked by their total per-row cost.
+
+Usage:
+    python analyze_list_rendering_cost.py [business class dir or .lplsnap] [list dir]
+"""
+
+import os
+import re
+import sys
+from collections import Counter
+
+from analyze_derived_field_dependencies import COMPUTED_KINDS, IDENTIFIER_PATTERN, ONE_TO_ONE_COST, \
+    STRING_PATTERN, build_dependency_graph, dependency_closures, resolve_reference, transitive_lookup_costs
+from corpus_pack import listdir
+from lpl_business_class import load_business_classes
+from lpl_config import output_file, reference_dir
+from lpl_outline import parse_outline
+from prefetch_loader import prefetch
+from scan_metrics import ScanMetrics
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+LIST_DIR = reference_dir('list')
+OUTPUT_FILE = output_file('list_rendering_cost.txt')
+METRICS_FILE = output_file('list_rendering_cost_metrics.json')
+
+LIST_PATTERN = re.compile(r'([\w.]+)\s+is\s+an?\s+(?:\w+\s+)?\w*List\b')
+
+
+class FieldCosts:
+    """Per-row lookup cost of a (possibly dotted) field path on a business class"""
+
+    def __init__(self, models):
+        self.models = models
+        edges, self.lookups = build_dependency_graph(models)
+        self.closures = dependency_closures(edges)
+        self.computed = transitive_lookup_costs(edges, self.lookups, self.closures)
+        self._memo = {}
+
+    def cost(self, class_name, path):
+        """Return (lookups per row, hops, computed target or None), or None if the path does not resolve"""
+        key = (class_name, path)
+        if key not in self._memo:
+            self._memo[key] = self._resolve(class_name, path)
+        return self._memo[key]
+
+    def union_cost(self, field_costs):
+        """Per-row lookups of several fields shown together
+
+        Relation hops are paid per field, but a derived field or condition
+        needed by several of them is computed once per row.
+        """
+        hops, needed = 0, set()
+        for total, _, computed in field_costs:
+            if computed:
+                hops += total - self.computed.get(computed, 0)
+                needed |= self.closures.get(computed, {computed})
+            else:
+                hops += total
+        return hops + sum(self.lookups.get(node, 0) for node in needed)
+
+    def _resolve(self, class_name, path):
+        target, hops = resolve_reference(self.models, class_name, path)
+        if target is not None:
+            computed = target if self.models[target[0]]['members'].get(target[1]) in COMPUTED_KINDS else None
+            total = sum(hop[2] for hop in hops) + (self.computed.get(computed, 0) if computed else 0)
+            return total, len(hops), computed
+        first, _, rest = path.partition('.')
+        if not rest:
+            # Key, context and audit columns (Company, actor, effective...) are stored on the row
+            return 0, 0, None
+        if first == class_name:
+            # The class's own key group: ADBAggregateBalance.GeneralLedgerChartAccount
+            return self.cost(class_name, rest)
+        if first in self.models:
+            # A key field names its business class: CashCode.Description is a one-to-one lookup
+            inner = self.cost(first, rest)
+            if inner is not None:
+                return inner[0] + ONE_TO_ONE_COST, inner[1] + 1, inner[2]
+        return None
+
+
+def iter_lists(roots):
+    """Yield (list name, node) for every list definition in a parsed .list file"""
+    for root in roots:
+        match = LIST_PATTERN.match(root.text)
+        if match:
+            yield match.group(1), root
+
+
+def list_cost(class_name, name, node, costs):
+    """Cost breakdown of one list"""
+    card_view = node.child_starting('card view is')
+    result = {'class': class_name, 'list': name, 'line': node.line, 'fields': [], 'unresolved': [],
+              'selection': 0, 'cost': 0, 'primary': node.child('is primary') is not None,
+              'card_view': card_view.text.split()[-1] if card_view is not None else None}
+    display = node.child('Display Fields')
+    shown = []
+    for field in display.children if display is not None else []:
+        path = field.text.split()[0]
+        cost = costs.cost(class_name, path)
+        if cost is None:
+            result['unresolved'].append(path)
+            continue
+        result['fields'].append((path, *cost))
+        shown.append(cost)
+    selection = node.child('Instance Selection')
+    selected = []
+    if selection is not None:
+        paths = {path for line in selection.walk()
+                 for path in IDENTIFIER_PATTERN.findall(STRING_PATTERN.sub('""', line.text))}
+        selected = [cost for cost in (costs.cost(class_name, path) for path in sorted(paths)) if cost]
+        result['selection'] = costs.union_cost(selected)
+    result['cost'] = costs.union_cost(shown + selected)
+    return result
+
+
+def load_field_costs(business_class_dir=BUSINESS_CLASS_DIR, metrics=None):
+    """Load the business classes and their derived field costs"""
+    metrics = metrics or ScanMetrics('business classes', interval=float('inf'))
+    print("Loading business classes...")
+    models = load_business_classes(business_class_dir, metrics)
+    with metrics.phase('derived field costs'):
+        return FieldCosts(models)
+
+
+def analyze_list_rendering_cost(business_class_dir=BUSINESS_CLASS_DIR, list_dir=LIST_DIR, metrics=None, costs=None):
+    """Return per-list cost breakdowns, most expensive first"""
+    metrics = metrics or ScanMetrics('list rendering cost')
+    costs = costs or load_field_costs(business_class_dir, metrics)
+
+    print("Costing lists...")
+    paths = sorted(os.path.join(list_dir, name) for name in listdir(list_dir) if name.endswith('.list'))
+    metrics.total_files = (metrics.total_files or 0) + len(paths)
+    results = []
+    for path, content, error in metrics.timed(prefetch(paths), 'read'):
+        with metrics.file(path, len(content) if content else 0):
+            try:
+                if error is not None:
+                    raise error
+                with metrics.phase('tokenize'):
+                    roots = parse_outline(content)
+                with metrics.phase('analyze'):
+                    class_name = os.path.splitext(os.path.basename(path))[0]
+                    results.extend(list_cost(class_name, name, node, costs) for name, node in iter_lists(roots))
+            except Exception as e:
+                print(f"Error processing {os.path.basename(path)}: {e}")
+                metrics.add_error()
+    results.sort(key=lambda x: x['cost'], reverse=True)
+    return results
+
+
+def format_report(results):
+    """Render the ranking as text"""
+    fields = [field for result in results for field in result['fields']]
+    lines = [f"=== LIST RENDERING COST ({len(results):,} lists) ===", "", "Statistics:"]
+    lines.append(f"- Display Fields resolved: {len(fields):,} "
+                 f"(unresolved paths: {sum(len(result['unresolved']) for result in results):,})")
+    lines.append(f"- Fields needing relation lookups: {sum(1 for field in fields if field[2]):,}")
+    lines.append(f"- Derived fields / conditions displayed: {sum(1 for field in fields if field[3]):,}")
+    lines.append(f"- Lists with per-row lookups: {sum(1 for result in results if result['cost']):,}")
+    lines.append(f"- Total per-row lookups across lists: {sum(result['cost'] for result in results):,}")
+
+    lines.append("\n**Top 50 Most Expensive Lists (lookups per row):**")
+    for result in results[:50]:
+        lines.append(f"\n  {result['class']}.{result['list']} (line {result['line']}): {result['cost']:,} per row"
+                     + (f" (selection {result['selection']})" if result['selection'] else ''))
+        for path, cost, hops, computed in sorted(result['fields'], key=lambda x: x[1], reverse=True)[:5]:
+            if not cost:
+                break
+            kind = 'derived' if computed else f"{hops} hop{'s' if hops != 1 else ''}"
+            lines.append(f"      {path}: {cost} ({kind})")
+
+    field_costs = Counter()
+    for result in results:
+        for path, cost, _, _ in result['fields']:
+            field_costs[(result['class'], path)] = cost
+    lines.append("\n**Most Expensive Display Fields:**")
+    for (class_name, path), cost in field_costs.most_common(20):
+        lines.append(f"  {class_name}.{path}: {cost} lookups per row")
+    return '\n'.join(lines)
+
+
+def main():
+    business_class_dir = sys.argv[1] if len(sys.argv) > 1 else BUSINESS_CLASS_DIR
+    list_dir = sys.argv[2] if len(sys.argv) > 2 else LIST_DIR
+    metrics = ScanMetrics('list rendering cost')
+    results = analyze_list_rendering_cost(business_class_dir, list_dir, metrics)
+    with metrics.phase('report'):
+        report = format_report(results)
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(report)
+    print(report)
+    print(f"\nAnalysis saved to: {OUTPUT_FILE}\n")
+    metrics.finish(METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
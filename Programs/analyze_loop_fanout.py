@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Find N+1 patterns in the Action Rules of ALL .busclass files: invokes,
+relation traversals and exists checks that run inside `for each` / `while`
+loops, multiplied out through nested loops and through the Instance Rules of
+Set Actions (which run once per selected instance).
+
+Every loop gets an estimated row count (a one-to-many relation, a whole
+class set, a distinct list...), the fan-out multiplier of a rule line is the
+product of the estimates of everything enclosing it, and an action's cost is
+the sum of its in-loop operations weighted by their multipliers. Actions are
+ranked corpus-wide by that cost.
+
+Usage:
+    python analyze_loop_fanout.py [business class dir]
+"""
+
+import os
+import re
+import sys
+from collections import Counter
+
+from lpl_business_class import iter_business_class_files, parse_business_class
+from lpl_config import output_file, reference_dir
+from prefetch_loader import prefetch
+from scan_metrics import ScanMetrics
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+OUTPUT_FILE = output_file('loop_fanout_analysis.txt')
+METRICS_FILE = output_file('loop_fanout_analysis_metrics.json')
+
+# Estimated rows per loop iteration source
+LOOP_ROWS = {
+    'one-to-many relation': 10,
+    'one-to-one relation': 1,
+    'class set': 100,
+    'nested set': 10,
+    'distinct': 10,
+    'while': 10,
+    'other': 10,
+}
+# Instances a Set Action's Instance Rules run for
+SET_INSTANCE_ROWS = 100
+# Relative cost of one operation
+OPERATION_COST = {'invoke': 10, 'traversal': 1, 'exists': 1}
+
+FOR_EACH_PATTERN = re.compile(
+    r'for each(?:\s*\(\w+\))?\s+(distinct\s+[\w.]+\s+in\s+)?([\w.]+)(?:\s*\([\w.,\s]*\))?(\s+set\b)?')
+EXISTS_PATTERN = re.compile(r'\b([A-Za-z_]\w*)(?:\.\w+)*\s+(?:not\s+)?exists\b')
+IDENTIFIER_PATTERN = re.compile(r'\b([A-Za-z_]\w*)(?=\.|\s|\)|$)')
+STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+
+def loop_kind(text, relations):
+    """Classify a loop line, or return None when it is not a loop"""
+    if text.startswith('while'):
+        return 'while'
+    match = FOR_EACH_PATTERN.match(text)
+    if not match:
+        return None
+    distinct, source, whole_set = match.groups()
+    if whole_set:
+        # "Vendor set" walks a class; "each.Items set" walks a member collection
+        return 'class set' if '.' not in source else 'nested set'
+    if distinct:
+        return 'distinct'
+    relation = relations.get(source.split('.')[0])
+    if relation is not None:
+        return 'one-to-one relation' if relation['type'] == 'one-to-one' else 'one-to-many relation'
+    return 'other'
+
+
+def line_operations(text, relations):
+    """Count (invokes, relation traversals, exists checks) on one rule line"""
+    text = STRING_PATTERN.sub('""', text)
+    exists = EXISTS_PATTERN.findall(text)
+    traversals = {name for name in IDENTIFIER_PATTERN.findall(text) if name in relations}.difference(exists)
+    return int(text.startswith('invoke ')), len(traversals), len(exists)
+
+
+def analyze_rules(node, relations, multiplier, depth, result):
+    """Accumulate the in-loop operations of a rules subtree into result"""
+    for child in node.children:
+        kind = loop_kind(child.text, relations)
+        if kind is not None:
+            result['loops'] += 1
+            result['max_depth'] = max(result['max_depth'], depth + 1)
+            analyze_rules(child, relations, multiplier * LOOP_ROWS[kind], depth + 1, result)
+            continue
+        # Outside any loop the multiplier is 1, except in a Set Action's Instance Rules
+        if multiplier > 1:
+            invokes, traversals, exists = line_operations(child.text, relations)
+            cost = multiplier * (invokes * OPERATION_COST['invoke'] + traversals * OPERATION_COST['traversal']
+                                 + exists * OPERATION_COST['exists'])
+            if cost:
+                result['invokes'] += invokes
+                result['traversals'] += traversals
+                result['exists'] += exists
+                result['cost'] += cost
+                result['max_multiplier'] = max(result['max_multiplier'], multiplier)
+                if result['worst'] is None or cost > result['worst'][0]:
+                    result['worst'] = (cost, multiplier, child.line, child.text)
+        analyze_rules(child, relations, multiplier, depth, result)
+
+
+def analyze_action(model, action):
+    """Fan-out summary of one action's rules"""
+    result = {
+        'class': model['name'], 'action': action['name'], 'type': action['type'], 'line': action['line'],
+        'loops': 0, 'max_depth': 0, 'invokes': 0, 'traversals': 0, 'exists': 0, 'cost': 0,
+        'max_multiplier': 1, 'worst': None,
+    }
+    rules = action['subsections'].get('Action Rules')
+    if rules is None:
+        return result
+    set_action = (action['type'] or '').startswith('Set Action')
+    for block in rules.children:
+        # A Set Action's Instance Rules run once per selected instance
+        multiplier = SET_INSTANCE_ROWS if set_action and block.text == 'Instance Rules' else 1
+        kind = loop_kind(block.text, model['relations'])
+        if kind is not None:
+            result['loops'] += 1
+            result['max_depth'] = max(result['max_depth'], 1)
+            analyze_rules(block, model['relations'], multiplier * LOOP_ROWS[kind], 1, result)
+        else:
+            analyze_rules(block, model['relations'], multiplier, 0, result)
+    return result
+
+
+def analyze_loop_fanout(directory=BUSINESS_CLASS_DIR, metrics=None):
+    """Return (per-action results with in-loop work, loop kind counts) across all business classes"""
+    paths = [path for _, path in iter_business_class_files(directory)]
+    metrics = metrics or ScanMetrics('loop fan-out')
+    if metrics.total_files is None:
+        metrics.total_files = len(paths)
+    results, kinds = [], Counter()
+    for path, content, error in metrics.timed(prefetch(paths), 'read'):
+        with metrics.file(path, len(content) if content else 0):
+            try:
+                if error is not None:
+                    raise error
+                with metrics.phase('tokenize'):
+                    model = parse_business_class(content, os.path.splitext(os.path.basename(path))[0])
+                with metrics.phase('analyze'):
+                    for action in model['declared_actions']:
+                        rules = action['subsections'].get('Action Rules')
+                        if rules is None:
+                            continue
+                        kinds.update(kind for kind in (loop_kind(node.text, model['relations'])
+                                                       for node in rules.walk()) if kind)
+                        result = analyze_action(model, action)
+                        if result['cost']:
+                            results.append(result)
+            except Exception as e:
+                print(f"Error processing {os.path.basename(path)}: {e}")
+                metrics.add_error()
+    results.sort(key=lambda x: x['cost'], reverse=True)
+    return results, kinds
+
+
+def format_report(results, kinds):
+    """Render the ranking as text"""
+    lines = [f"=== LOOP FAN-OUT (N+1) ANALYSIS ({len(results):,} actions with in-loop work) ===", ""]
+    lines.append("Statistics:")
+    lines.append(f"- Loops in action rules: {sum(kinds.values()):,}")
+    for kind, count in kinds.most_common():
+        lines.append(f"    {kind}: {count:,} (estimated {LOOP_ROWS[kind]} rows)")
+    lines.append(f"- Invokes inside loops: {sum(r['invokes'] for r in results):,}")
+    lines.append(f"- Relation traversals inside loops: {sum(r['traversals'] for r in results):,}")
+    lines.append(f"- Exists checks inside loops: {sum(r['exists'] for r in results):,}")
+    lines.append(f"- Actions with nested loops: {sum(1 for r in results if r['max_depth'] > 1):,}")
+    lines.append(f"\nCost = sum of in-loop operations (invoke {OPERATION_COST['invoke']}, traversal "
+                 f"{OPERATION_COST['traversal']}, exists {OPERATION_COST['exists']}) x fan-out multiplier; "
+                 f"Set Action Instance Rules x {SET_INSTANCE_ROWS}.")
+
+    lines.append("\n**Top 50 Offenders:**")
+    for result in results[:50]:
+        cost, multiplier, line, text = result['worst']
+        lines.append(f"\n  {result['class']}.{result['action']} ({result['type']}, line {result['line']}): "
+                     f"cost {result['cost']:,}")
+        lines.append(f"    {result['loops']} loops, depth {result['max_depth']}, max multiplier "
+                     f"x{result['max_multiplier']:,}; {result['invokes']} invokes, {result['traversals']} "
+                     f"traversals, {result['exists']} exists in loops")
+        lines.append(f"    worst: line {line} x{multiplier:,}: {text[:100]}")
+
+    by_class = Counter()
+    for result in results:
+        by_class[result['class']] += result['cost']
+    lines.append("\n**Top 20 Classes by Total Cost:**")
+    for class_name, cost in by_class.most_common(20):
+        lines.append(f"  {class_name}: {cost:,}")
+    return '\n'.join(lines)
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else BUSINESS_CLASS_DIR
+    print("Analyzing loops in action rules...")
+    metrics = ScanMetrics('loop fan-out')
+    results, kinds = analyze_loop_fanout(directory, metrics)
+    with metrics.phase('report'):
+        report = format_report(results, kinds)
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(report)
+    print(report)
+    print(f"\nAnalysis saved to: {OUTPUT_FILE}\n")
+    metrics.finish(METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Estimate the load cost of every page in References/page.
+
+Each page is walked panel by panel: every pane's `business class is` binding
+is resolved (including Class.Relation bindings) to the list, form or card
+view it renders, lists are costed with the list rendering cost model (one
+query plus rows x per-row lookups, plus the list's card view per row), and
+forms and card views cost one read plus the lookups of the fields they show.
+Lists, forms and pages reached through menus or navigations are links and
+cost nothing until followed.
+
+Tabbed pages open on their first panel, so pages are ranked by that initial
+load; the cost of visiting every panel is reported alongside.
+
+Usage:
+    python analyze_page_load_cost.py [business class dir or .lplsnap]
+"""
+
+import os
+import re
+import sys
+from collections import defaultdict
+
+from analyze_list_rendering_cost import LIST_DIR, analyze_list_rendering_cost, load_field_costs
+from corpus_pack import listdir, read_text
+from lpl_config import output_file, reference_dir
+from lpl_outline import parse_outline
+from prefetch_loader import prefetch
+from scan_metrics import ScanMetrics
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+PAGE_DIR = reference_dir('page')
+FORM_DIR = reference_dir('form')
+CARD_VIEW_DIR = reference_dir('card view')
+OUTPUT_FILE = output_file('page_load_cost.txt')
+METRICS_FILE = output_file('page_load_cost_metrics.json')
+
+QUERY_COST = 1
+LIST_ROWS = 25
+# Panes share the screen, so each shows fewer rows
+PANE_ROWS = 10
+
+CONTAINER_PATTERN = re.compile(r'(\w+)\s+is\s+an?\s+(\w*Panel|Pane)\s*$')
+PANE_PATTERN = re.compile(r'(pane \d+)\.(.*)')
+WORD_PATTERN = re.compile(r'[A-Za-z_]\w*')
+IDENTIFIER_LINE_PATTERN = re.compile(r'^([A-Za-z_][\w.]*)\s*$')
+
+
+class ArtifactCosts:
+    """Memoized per-instance cost of forms and card views"""
+
+    def __init__(self, costs):
+        self.costs = costs
+        self._memo = {}
+
+    def cost(self, directory, extension, class_name, name):
+        """One read plus the lookups of the fields the artifact shows, or None when it is missing"""
+        key = (directory, class_name, name)
+        if key not in self._memo:
+            try:
+                content = read_text(os.path.join(directory, f"{class_name} - {name}{extension}"))
+            except (OSError, KeyError):
+                self._memo[key] = None
+                return None
+            paths = {match.group(1) for node in (node for root in parse_outline(content) for node in root.walk())
+                     for match in [IDENTIFIER_LINE_PATTERN.match(node.text)] if match}
+            shown = [cost for cost in (self.costs.cost(class_name, path) for path in sorted(paths)) if cost]
+            self._memo[key] = QUERY_COST + self.costs.union_cost(shown)
+        return self._memo[key]
+
+
+def binding_class(costs, binding, panes):
+    """Class a `business class is` binding renders
+
+    Bindings name a class, follow relations from it (FinanceEnterpriseGroup.first
+    EnterpriseProjectStructureRel.MySummaryProjectsRel) or from the row selected
+    in another pane (pane 1.WorkunitRel).
+    """
+    match = PANE_PATTERN.match(binding)
+    if match:
+        class_name, rest = panes.get(match.group(1)), match.group(2)
+    else:
+        class_name, _, rest = binding.partition('.')
+    for word in WORD_PATTERN.findall(rest):
+        model = costs.models.get(class_name)
+        relation = model['relations'].get(word) if model else None
+        if relation and relation['target']:
+            class_name = relation['target']
+    return class_name
+
+
+def iter_components(node, costs, class_name=None, rows=LIST_ROWS, panes=None):
+    """Yield (kind, class name, artifact name, rows) for everything a panel renders on load"""
+    panes = {} if panes is None else panes
+    for child in node.children:
+        text = child.text
+        if text.endswith('menu') or 'navigation' in text:
+            # Menus and navigations only link to other lists, forms and pages
+            continue
+        if text.startswith('business class is '):
+            bound = binding_class(costs, text[len('business class is '):].strip(), panes)
+            if node.text.startswith('pane '):
+                panes[node.text] = bound
+            yield from iter_components(child, costs, bound, rows, panes)
+            continue
+        for kind in ('list', 'form', 'card view'):
+            if text.startswith(f"{kind} is ") and class_name is not None:
+                name = text.split()[-1]
+                owner, _, short = name.rpartition('.')
+                yield kind, owner or class_name, short, rows
+                break
+        else:
+            container = CONTAINER_PATTERN.match(text)
+            pane = (container and container.group(2) == 'Pane') or text.startswith('pane ')
+            yield from iter_components(child, costs, class_name, PANE_ROWS if pane else rows, panes)
+
+
+def component_cost(kind, class_name, name, rows, lists, artifacts):
+    """Estimated cost of rendering one component, and whether it resolved"""
+    if kind == 'list':
+        result = lists.get((class_name, name))
+        if result is None:
+            return QUERY_COST, False
+        card = artifacts.cost(CARD_VIEW_DIR, '.cardview', class_name, result['card_view']) \
+            if result['card_view'] else 0
+        return QUERY_COST + rows * (result['cost'] + (card or 0)), True
+    directory, extension = (FORM_DIR, '.form') if kind == 'form' else (CARD_VIEW_DIR, '.cardview')
+    cost = artifacts.cost(directory, extension, class_name, name)
+    return (cost, True) if cost is not None else (QUERY_COST, False)
+
+
+def page_cost(root, costs, lists, artifacts):
+    """Cost breakdown of one page"""
+    result = {'page': root.text.split()[0], 'line': root.line, 'panels': [], 'initial': 0, 'total': 0,
+              'components': 0, 'unresolved': []}
+    for panel in root.children:
+        match = CONTAINER_PATTERN.match(panel.text)
+        if not match:
+            continue
+        panel_cost, parts = 0, []
+        for kind, class_name, name, rows in iter_components(panel, costs):
+            cost, resolved = component_cost(kind, class_name, name, rows, lists, artifacts)
+            if not resolved:
+                result['unresolved'].append(f"{kind} {class_name}.{name}")
+            panel_cost += cost
+            parts.append((cost, f"{kind} {class_name}.{name}"))
+        result['panels'].append((match.group(1), match.group(2), panel_cost, sorted(parts, reverse=True)))
+        result['components'] += len(parts)
+        result['total'] += panel_cost
+    if result['panels']:
+        result['initial'] = result['panels'][0][2]
+    return result
+
+
+def analyze_page_load_cost(business_class_dir=BUSINESS_CLASS_DIR, page_dir=PAGE_DIR, list_dir=LIST_DIR,
+                           metrics=None):
+    """Return per-page cost breakdowns, most expensive initial load first"""
+    metrics = metrics or ScanMetrics('page load cost')
+    costs = load_field_costs(business_class_dir, metrics)
+    lists = {}
+    for result in analyze_list_rendering_cost(list_dir=list_dir, metrics=metrics, costs=costs):
+        lists[(result['class'], result['list'])] = result
+        if result['primary']:
+            lists.setdefault((result['class'], 'primary'), result)
+    artifacts = ArtifactCosts(costs)
+
+    print("Costing pages...")
+    paths = sorted(os.path.join(page_dir, name) for name in listdir(page_dir) if name.endswith('.page'))
+    metrics.total_files = (metrics.total_files or 0) + len(paths)
+    results = []
+    for path, content, error in metrics.timed(prefetch(paths), 'read'):
+        with metrics.file(path, len(content) if content else 0):
+            try:
+                if error is not None:
+                    raise error
+                with metrics.phase('tokenize'):
+                    roots = parse_outline(content)
+                with metrics.phase('analyze'):
+                    results.extend(page_cost(root, costs, lists, artifacts) for root in roots
+                                   if root.text.endswith('is a Page'))
+            except Exception as e:
+                print(f"Error processing {os.path.basename(path)}: {e}")
+                metrics.add_error()
+    results.sort(key=lambda x: (x['initial'], x['total']), reverse=True)
+    return results
+
+
+def format_report(results):
+    """Render the ranking as text"""
+    lines = [f"=== PAGE LOAD COST ({len(results):,} pages) ===", "", "Statistics:"]
+    lines.append(f"- Rendered lists, forms and card views: {sum(r['components'] for r in results):,} "
+                 f"(not defined in References: {sum(len(r['unresolved']) for r in results):,})")
+    lines.append(f"- Pages with more than one panel: {sum(1 for r in results if len(r['panels']) > 1):,}")
+    lines.append(f"- Cost = {QUERY_COST} per query + rows x per-row lookups "
+                 f"({LIST_ROWS} rows per list, {PANE_ROWS} per pane)")
+
+    lines.append("\n**Top 50 Pages by Initial Load Cost:**")
+    for result in results[:50]:
+        lines.append(f"\n  {result['page']}: initial {result['initial']:,}, all panels {result['total']:,} "
+                     f"({len(result['panels'])} panels, {result['components']} components)")
+        name, kind, cost, parts = result['panels'][0]
+        lines.append(f"    first panel {name} ({kind}): {cost:,}")
+        for part_cost, label in parts[:5]:
+            lines.append(f"      {label}: {part_cost:,}")
+
+    by_list = defaultdict(int)
+    for result in results:
+        for _, _, _, parts in result['panels']:
+            for cost, label in parts:
+                by_list[label] += 1
+    lines.append("\n**Components Shared by the Most Pages:**")
+    for label, count in sorted(by_list.items(), key=lambda x: x[1], reverse=True)[:15]:
+        lines.append(f"  {label}: {count} page panels")
+    return '\n'.join(lines)
+
+
+def main():
+    business_class_dir = sys.argv[1] if len(sys.argv) > 1 else BUSINESS_CLASS_DIR
+    metrics = ScanMetrics('page load cost')
+    results = analyze_page_load_cost(business_class_dir, metrics=metrics)
+    with metrics.phase('report'):
+        report = format_report(results)
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(report)
+    print(report)
+    print(f"\nAnalysis saved to: {OUTPUT_FILE}\n")
+    metrics.finish(METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Queue Mapping parallelism audit across ALL .busclass files.
+
+Every Set Action is scored by how heavy a run is likely to be: rule lines,
+invokes and accumulators, scaled by how broad its Instance Selection is (no
+selection, a selection with no key predicates, or a keyed one). The heavy
+ones (top HEAVY_PERCENTILE) that declare no Queue Mapping Fields run on a
+single queue and are listed first.
+
+For every action that does declare Queue Mapping Fields, the mapped fields
+are checked for low-cardinality hints that would pile the work onto a few
+queues: constant queue names, Boolean or one/two-character fields, fields
+with States, enterprise-wide context keys and status/type/category names.
+Conditions count as Boolean; derived fields are judged by their declared
+type and by the fields (or literals) their bodies return.
+
+Usage:
+    python analyze_queue_mapping.py [business class dir]
+"""
+
+import os
+import re
+import sys
+from collections import Counter
+
+from analyze_set_action_indexes import key_predicates, selection_text
+from key_field_resolver import KEY_FIELD_DIR, KeyFieldResolver
+from lpl_business_class import FIELD_SECTIONS, iter_business_class_files, parse_business_class
+from lpl_config import output_file, reference_dir
+from lpl_outline import definition_name
+from prefetch_loader import prefetch
+from scan_metrics import ScanMetrics
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+OUTPUT_FILE = output_file('queue_mapping_audit.txt')
+METRICS_FILE = output_file('queue_mapping_audit_metrics.json')
+
+INVOKE_WEIGHT = 5
+ACCUMULATOR_WEIGHT = 3
+BREADTH_FACTOR = {'no selection': 3, 'unkeyed selection': 2, 'keyed selection': 1}
+HEAVY_PERCENTILE = 90
+
+SIZE_PATTERN = re.compile(r'\b(Alpha\w*|Numeric)\s+(?:size\s+)?(\d+)')
+KEY_TYPE_PATTERN = re.compile(r'\bis\s+(?:an?|like)\s+([\w.]+)')
+DERIVED_TYPE_PATTERN = re.compile(r'type\s+is\s+(?:an?\s+)?([\w.]+)')
+RETURN_PATTERN = re.compile(r'return\s+(.+)')
+LITERAL_PATTERN = re.compile(r'"[^"]*"|-?\d+(?:\.\d+)?|blank|true|false')
+FIELD_PATH_PATTERN = re.compile(r'[A-Za-z_][\w.]*')
+LOW_CARDINALITY_SUFFIXES = ('Status', 'State', 'Type', 'Flag', 'Indicator', 'Category')
+# Context keys that usually hold one value, or a handful, per tenant
+ENTERPRISE_KEYS = ('FinanceEnterpriseGroup', 'EnterpriseGroup', 'HROrganization', 'DataArea')
+
+
+def field_declarations(model, action):
+    """(declaration node, kind) of every class field, action parameter and local field by name"""
+    declarations = {}
+    for section_name, kind in FIELD_SECTIONS.items():
+        section = model['sections'].get(section_name)
+        if section is not None and kind != 'relation':
+            for child in section.children:
+                declarations.setdefault(definition_name(child.text), (child, kind))
+    for subsection, kind in (('Parameters', 'parameter'), ('Local Fields', 'local')):
+        node = action['subsections'].get(subsection)
+        if node is not None:
+            for child in node.children:
+                declarations[definition_name(child.text)] = (child, kind)
+    return declarations
+
+
+def key_field_hints(resolver, name):
+    definition = resolver.resolve(name)
+    if definition is None:
+        return []
+    hints = []
+    if definition['states']:
+        hints.append(f"key field {name} has {len(definition['states'])} states")
+    match = SIZE_PATTERN.search(definition['representation'] or '')
+    if match and int(match.group(2)) <= 2:
+        hints.append(f"key field {name} is {match.group(1)} size {match.group(2)}")
+    return hints
+
+
+def derived_hints(node, declarations, resolver, seen):
+    """Hints for a derived field from its declared type and what its body returns"""
+    hints = []
+    for child in node.children:
+        match = DERIVED_TYPE_PATTERN.match(child.text)
+        if match:
+            hints.extend(["Boolean (2 values)"] if match.group(1) == 'Boolean'
+                         else key_field_hints(resolver, match.group(1)))
+            break
+    returns = [match.group(1).strip() for child in node.walk() for match in [RETURN_PATTERN.match(child.text)]
+               if match]
+    literals = {value for value in returns if LITERAL_PATTERN.fullmatch(value)}
+    fields = list(dict.fromkeys(value for value in returns if FIELD_PATH_PATTERN.fullmatch(value)
+                                and value not in literals and value.split('.')[0] in declarations))
+    if returns and all(value in literals for value in returns):
+        if len(literals) == 1:
+            hints.append("derived field returns one literal: constant queue name, all work maps to one queue")
+        elif len(literals) == 2:
+            hints.append("derived field returns only 2 literal values")
+    for field in fields:
+        if field not in seen:
+            hints.extend(f"returns {field}: {hint}"
+                         for hint in cardinality_hints(field, declarations, resolver, seen | {field}))
+    return hints
+
+
+def cardinality_hints(path, declarations, resolver, seen=frozenset()):
+    """Reasons to expect few distinct values for a Queue Mapping field, [] when none"""
+    parts = path.split('.')
+    node, kind = declarations.get(parts[0], (None, None))
+    if node is None and len(parts) == 1 and resolver.resolve(path) is None:
+        return ["not a field: constant queue name, all work maps to one queue"]
+    hints = []
+    if kind == 'condition' and len(parts) == 1:
+        hints.append("condition (2 values)")
+    elif kind == 'derived' and len(parts) == 1:
+        hints.extend(derived_hints(node, declarations, resolver, seen | {path}))
+    elif node is not None and len(parts) == 1:
+        text = node.text
+        if re.search(r'\bis\s+Boolean\b', text):
+            hints.append("Boolean (2 values)")
+        match = SIZE_PATTERN.search(text)
+        if match and int(match.group(2)) <= 2:
+            hints.append(f"{match.group(1)} size {match.group(2)}")
+        states = node.child('States')
+        if states is not None:
+            hints.append(f"{len(states.children)} states")
+        match = KEY_TYPE_PATTERN.search(text)
+        if match:
+            hints.extend(key_field_hints(resolver, match.group(1)))
+    hints.extend(key_field_hints(resolver, parts[-1]))
+    if parts[-1] in ENTERPRISE_KEYS:
+        hints.append("enterprise-wide context key")
+    elif parts[-1].endswith(LOW_CARDINALITY_SUFFIXES):
+        hints.append(f"name suggests a {next(s for s in LOW_CARDINALITY_SUFFIXES if parts[-1].endswith(s)).lower()}")
+    return list(dict.fromkeys(hints))
+
+
+def selection_breadth(model, action):
+    """'no selection', 'unkeyed selection' or 'keyed selection'"""
+    subsections = action['subsections']
+    if 'Set Is' in subsections:
+        return 'keyed selection'
+    if 'Instance Selection' not in subsections:
+        return 'no selection'
+    columns = {field for entry in model['sets'].values() for field in entry['sort_order']}
+    columns |= {member for member, kind in model['members'].items() if kind != 'relation'}
+    excluded = {definition_name(child.text) for name in ('Parameters', 'Local Fields') if name in subsections
+                for child in subsections[name].children}
+    equality, ranges = key_predicates(selection_text(subsections['Instance Selection']), columns, excluded)
+    return 'keyed selection' if equality or ranges else 'unkeyed selection'
+
+
+def audit_action(model, action, resolver):
+    """Weight and Queue Mapping findings for one action"""
+    subsections = action['subsections']
+    rules = subsections.get('Action Rules')
+    rule_nodes = list(rules.walk())[1:] if rules is not None else []
+    accumulators = subsections.get('Accumulators')
+    mapping = subsections.get('Queue Mapping Fields')
+    set_action = (action['type'] or '').startswith('Set Action')
+    audit = {
+        'class': model['name'], 'action': action['name'], 'type': action['type'], 'line': action['line'],
+        'set_action': set_action,
+        'rules': len(rule_nodes),
+        'invokes': sum(1 for node in rule_nodes if node.text.startswith('invoke ')),
+        'accumulators': len(accumulators.children) if accumulators is not None else 0,
+        'breadth': selection_breadth(model, action) if set_action else None,
+        'queue_fields': [node.text.split()[0] for node in mapping.children] if mapping is not None else [],
+        'skew': {},
+    }
+    audit['score'] = (audit['rules'] + INVOKE_WEIGHT * audit['invokes'] + ACCUMULATOR_WEIGHT * audit['accumulators']) \
+        * BREADTH_FACTOR.get(audit['breadth'], 1)
+    if audit['queue_fields']:
+        declarations = field_declarations(model, action)
+        for field in audit['queue_fields']:
+            hints = cardinality_hints(field, declarations, resolver)
+            if hints:
+                audit['skew'][field] = hints
+    return audit
+
+
+def audit_queue_mapping(directory=BUSINESS_CLASS_DIR, key_field_dir=KEY_FIELD_DIR, metrics=None):
+    """Return the audit of every Set Action and every action with Queue Mapping Fields"""
+    paths = [path for _, path in iter_business_class_files(directory)]
+    metrics = metrics or ScanMetrics('queue mapping')
+    if metrics.total_files is None:
+        metrics.total_files = len(paths)
+    with metrics.phase('key fields'):
+        resolver = KeyFieldResolver(key_field_dir)
+    audits = []
+    for path, content, error in metrics.timed(prefetch(paths), 'read'):
+        with metrics.file(path, len(content) if content else 0):
+            try:
+                if error is not None:
+                    raise error
+                with metrics.phase('tokenize'):
+                    model = parse_business_class(content, os.path.splitext(os.path.basename(path))[0])
+                with metrics.phase('analyze'):
+                    for action in model['declared_actions']:
+                        if (action['type'] or '').startswith('Set Action') \
+                                or 'Queue Mapping Fields' in action['subsections']:
+                            audits.append(audit_action(model, action, resolver))
+            except Exception as e:
+                print(f"Error processing {os.path.basename(path)}: {e}")
+                metrics.add_error()
+    return audits
+
+
+def heavy_threshold(audits, percentile=HEAVY_PERCENTILE):
+    scores = sorted(audit['score'] for audit in audits if audit['set_action'])
+    return scores[min(len(scores) - 1, len(scores) * percentile // 100)] if scores else 0
+
+
+def format_report(audits):
+    """Render the audit as text"""
+    set_actions = [audit for audit in audits if audit['set_action']]
+    mapped = [audit for audit in audits if audit['queue_fields']]
+    threshold = heavy_threshold(audits)
+    heavy = [audit for audit in set_actions if audit['score'] >= threshold]
+    single_queue = sorted((audit for audit in heavy if not audit['queue_fields']),
+                          key=lambda x: x['score'], reverse=True)
+    skewed = [audit for audit in mapped if audit['skew']]
+    breadth = Counter(audit['breadth'] for audit in set_actions)
+
+    lines = [f"=== QUEUE MAPPING PARALLELISM AUDIT ({len(set_actions):,} Set Actions) ===", "", "Statistics:"]
+    lines.append(f"- Set Actions with Queue Mapping Fields: {sum(1 for a in set_actions if a['queue_fields']):,}")
+    lines.append(f"- Other actions with Queue Mapping Fields: {sum(1 for a in mapped if not a['set_action']):,}")
+    lines.append(f"- Selection breadth: " + ', '.join(f"{kind} {breadth[kind]:,}" for kind in BREADTH_FACTOR))
+    lines.append(f"- Heavy Set Actions (score >= {threshold:,}, top {100 - HEAVY_PERCENTILE}%): {len(heavy):,}")
+    lines.append(f"- Heavy Set Actions running single-queue: {len(single_queue):,}")
+    lines.append(f"- Mapped actions with skew hints: {len(skewed):,} of {len(mapped):,}")
+    lines.append(f"\nScore = (rule lines + {INVOKE_WEIGHT} x invokes + {ACCUMULATOR_WEIGHT} x accumulators) x breadth "
+                 f"({', '.join(f'{kind} {factor}' for kind, factor in BREADTH_FACTOR.items())})")
+
+    lines.append("\n**Heavy Set Actions Without Queue Mapping Fields:**")
+    for audit in single_queue:
+        lines.append(f"  {audit['class']}.{audit['action']} (line {audit['line']}): score {audit['score']:,} - "
+                     f"{audit['rules']} rule lines, {audit['invokes']} invokes, {audit['accumulators']} accumulators, "
+                     f"{audit['breadth']}")
+
+    lines.append("\n**Queue Mapping Fields With Low-Cardinality Hints:**")
+    for audit in sorted(skewed, key=lambda x: x['score'], reverse=True):
+        lines.append(f"  {audit['class']}.{audit['action']} ({audit['type']}, line {audit['line']}, "
+                     f"score {audit['score']:,}):")
+        for field, hints in audit['skew'].items():
+            lines.append(f"      {field}: {'; '.join(hints)}")
+
+    fields = Counter(field for audit in mapped for field in audit['queue_fields'])
+    lines.append("\n**Most Used Queue Mapping Fields:**")
+    for field, count in fields.most_common(15):
+        lines.append(f"  {field}: {count}")
+    return '\n'.join(lines)
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else BUSINESS_CLASS_DIR
+    print("Auditing Queue Mapping Fields...")
+    metrics = ScanMetrics('queue mapping')
+    audits = audit_queue_mapping(directory, metrics=metrics)
+    with metrics.phase('report'):
+        report = format_report(audits)
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(report)
+    print(report[:report.index("\n**Heavy Set Actions Without")])
+    print(f"\nDetailed audit saved to: {OUTPUT_FILE}\n")
+    metrics.finish(METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Cross-reference every Set Action's Instance Selection and Sort Order against
+the Sets declared on its business class, flag actions that no existing set
+can serve (so Landmark walks the whole table), and propose the set
+definition that would serve them.
+
+A set serves an action when its leading Sort Order fields are all bound by
+equality predicates of the selection (optionally followed by one range
+predicate), and when the action's own Sort Order - ignoring fields pinned by
+equality - continues the set's order. "Set Is" actions position on their set
+directly and "Sort Order is <set>" actions are checked against that set.
+Classes without a set marked primary get one from their symbolic key and the
+key field's context chain (e.g. ContractGroup, ContractImport,
+ContractLineImport).
+
+Files are parsed in a process pool, so all Set Actions are analyzed in one
+parallel pass.
+
+Usage:
+    python analyze_set_action_indexes.py [business class dir] [--workers N]
+"""
+
+import os
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from corpus_pack import read_text
+from key_field_resolver import KEY_FIELD_DIR, KeyFieldResolver
+from lpl_business_class import iter_business_class_files, parse_business_class
+from lpl_config import output_file, reference_dir
+from scan_metrics import ScanMetrics
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+OUTPUT_FILE = output_file('set_action_index_advice.txt')
+METRICS_FILE = output_file('set_action_index_advice_metrics.json')
+
+TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|\(|\)|\band\b|\bor\b')
+COMPARISON_PATTERN = re.compile(r'^([\w.\[\]]+)\s*(<=|>=|!=|==|=|<|>)\s*([\w.\[\]"\'+-]+)$')
+RANGE_OPERATORS = ('<', '<=', '>', '>=')
+
+# Outcomes, in report order
+SERVED = 'served by existing set'
+SET_IS = 'positioned with Set Is'
+NAMED_SET = 'uses named set'
+NO_KEY_PREDICATES = 'no key predicates'
+FLAGGED = 'no usable set'
+STATUSES = (SERVED, SET_IS, NAMED_SET, NO_KEY_PREDICATES, FLAGGED)
+
+# Symbolic key -> primary key fields, handed to each worker by init_worker
+_primary_keys = {}
+
+
+def strip_parentheses(text):
+    """Remove parentheses that enclose the whole expression"""
+    text = text.strip()
+    while text.startswith('(') and text.endswith(')'):
+        depth = 0
+        for match in TOKEN_PATTERN.finditer(text):
+            token = match.group()
+            if token == '(':
+                depth += 1
+            elif token == ')':
+                depth -= 1
+                if depth == 0 and match.end() != len(text):
+                    return text
+        text = text[1:-1].strip()
+    return text
+
+
+def split_top_level(text, keyword):
+    """Split on a boolean keyword outside parentheses and strings"""
+    parts, depth, start = [], 0, 0
+    for match in TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif token == keyword and depth == 0:
+            parts.append(text[start:match.start()])
+            start = match.end()
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def selection_text(node):
+    """Instance Selection body as one whitespace-normalized line, without 'where'"""
+    text = ' '.join(' '.join(child.text.split()) for child in node.walk() if child is not node)
+    return text[len('where'):].strip() if text.startswith('where') else text
+
+
+def key_predicates(selection, columns, excluded):
+    """Return ([equality fields], [range fields]) the selection binds on this class's columns
+
+    Only top-level conjuncts comparing one column with a non-column value
+    (parameter, local field, literal) can position a set.
+    """
+    equality, ranges = [], []
+    for conjunct in split_top_level(strip_parentheses(selection), 'and'):
+        conjunct = strip_parentheses(conjunct)
+        if len(split_top_level(conjunct, 'or')) > 1:
+            continue
+        match = COMPARISON_PATTERN.match(conjunct)
+        if not match:
+            continue
+        left, operator, right = match.groups()
+        is_column = [side in columns and side not in excluded for side in (left, right)]
+        if is_column[0] == is_column[1]:
+            continue
+        field = left if is_column[0] else right
+        if operator in ('=', '=='):
+            if field not in equality:
+                equality.append(field)
+        elif operator in RANGE_OPERATORS and field not in ranges:
+            ranges.append(field)
+    return equality, ranges
+
+
+def own_field(class_name, field):
+    """Field name without its owning class prefix (Sort Order may say Class.Field for Field)"""
+    prefix = f"{class_name}."
+    return field[len(prefix):] if field.startswith(prefix) else field
+
+
+def set_fit(sort_order, equality, ranges, required_order):
+    """Return (seek depth, sort satisfied) of one set for an action
+
+    Seek depth counts the set's leading fields bound by equality, plus one if
+    the next field carries a range predicate.
+    """
+    depth = 0
+    while depth < len(sort_order) and sort_order[depth] in equality:
+        depth += 1
+    if depth < len(sort_order) and sort_order[depth] in ranges:
+        depth += 1
+    remaining = [field for field in sort_order if field not in equality]
+    required = [field for field in required_order if field not in equality]
+    return depth, remaining[:len(required)] == required
+
+
+def propose_set(equality, ranges, required_order):
+    """Sort Order for a set serving the action: equality fields, one range field, then the sort"""
+    fields = list(equality)
+    if ranges:
+        fields.append(ranges[0])
+    fields += [field for field in required_order if field not in fields]
+    return fields
+
+
+def set_name(fields):
+    return 'By' + ''.join(field.split('.')[-1].replace('[', '').replace(']', '') for field in fields[:4])
+
+
+def primary_key_fields(resolver, key, seen=None):
+    """Fields of a symbolic key's implicit primary set: its context chain, outermost first"""
+    seen = set() if seen is None else seen
+    seen.add(key)
+    fields = []
+    definition = resolver.resolve(key)
+    for context in (definition['context'] if definition else []):
+        if context not in seen:
+            fields += [field for field in primary_key_fields(resolver, context, seen) if field not in fields]
+    return fields + [key]
+
+
+def init_worker(primary_keys):
+    global _primary_keys
+    _primary_keys = primary_keys
+
+
+def add_implicit_primary(model):
+    """Add the symbolic key's primary set when no declared set is marked primary"""
+    if any(entry['primary'] for entry in model['sets'].values()):
+        return
+    ontology = model['sections'].get('Ontology')
+    key = next((node.text.split()[-1] for node in ontology.children if node.text.startswith('symbolic key is')),
+               None) if ontology is not None else None
+    if key in _primary_keys:
+        model['sets'].setdefault('primary', {'name': 'primary', 'sort_order': _primary_keys[key],
+                                             'duplicates': False, 'primary': True,
+                                             'instance_selection': None, 'line': ontology.line})
+
+
+def analyze_action(model, action, columns):
+    """Advice for one Set Action of a parsed business class"""
+    subsections = action['subsections']
+    parameters = {child.text.split()[0] for child in subsections['Parameters'].children} \
+        if 'Parameters' in subsections else set()
+    local_fields = {child.text.split()[0] for child in subsections['Local Fields'].children} \
+        if 'Local Fields' in subsections else set()
+    selection = selection_text(subsections['Instance Selection']) if 'Instance Selection' in subsections else ''
+    equality, ranges = key_predicates(selection, columns, parameters | local_fields)
+
+    named = next((text.split(' is ', 1)[1].strip() for text in subsections if text.startswith('Sort Order is ')), None)
+    required_order = [own_field(model['name'], child.text.split()[0])
+                      for child in subsections['Sort Order'].children] if 'Sort Order' in subsections else []
+
+    advice = {
+        'class': model['name'], 'action': action['name'], 'line': action['line'],
+        'equality': equality, 'ranges': ranges, 'sort_order': required_order,
+        'set': None, 'named': named is not None, 'depth': 0, 'status': None, 'proposal': None,
+        'selection': selection,
+    }
+    sets = model['sets']
+    if 'Set Is' in subsections:
+        advice['status'] = SET_IS
+        advice['set'] = named
+        return advice
+    if named is not None:
+        entry = sets.get(named)
+        if entry is None and named == 'primary':
+            entry = next((candidate for candidate in sets.values() if candidate['primary']), None)
+        advice['set'] = named
+        if entry is not None:
+            advice['depth'], _ = set_fit(entry['sort_order'], equality, ranges, [])
+        advice['status'] = NAMED_SET if entry is None or advice['depth'] or not (equality or ranges) else FLAGGED
+        if advice['status'] == FLAGGED:
+            advice['proposal'] = propose_set(equality, ranges, entry['sort_order'])
+        return advice
+    if not (equality or ranges or required_order):
+        advice['status'] = NO_KEY_PREDICATES
+        return advice
+
+    best = seek_only = None
+    for entry in sets.values():
+        depth, sorted_ok = set_fit(entry['sort_order'], equality, ranges, required_order)
+        if depth and (seek_only is None or depth > seek_only[0]):
+            seek_only = (depth, entry['name'])
+        if not sorted_ok or (depth == 0 and (equality or ranges)):
+            continue
+        if best is None or depth > best[0]:
+            best = (depth, entry['name'])
+    if best is not None:
+        advice['depth'], advice['set'] = best
+        advice['status'] = SERVED
+    else:
+        # Remember a set that could seek but not deliver the order, for the report
+        advice['depth'], advice['set'] = seek_only or (0, None)
+        advice['status'] = FLAGGED
+        advice['proposal'] = propose_set(equality, ranges, required_order)
+    return advice
+
+
+def analyze_file(path):
+    """Parse one business class file and advise on each of its Set Actions (runs in a worker)"""
+    start = time.perf_counter()
+    try:
+        content = read_text(path)
+        model = parse_business_class(content, os.path.splitext(os.path.basename(path))[0])
+    except Exception as e:
+        return path, 0, 0.0, [], str(e)
+    add_implicit_primary(model)
+    for entry in model['sets'].values():
+        entry['sort_order'] = [own_field(model['name'], field) for field in entry['sort_order']]
+    columns = {field for entry in model['sets'].values() for field in entry['sort_order']}
+    columns |= {member for member, kind in model['members'].items() if kind != 'relation'}
+    results = [analyze_action(model, action, columns) for action in model['declared_actions']
+               if (action['type'] or '').startswith('Set Action')]
+    return path, len(content), time.perf_counter() - start, results, None
+
+
+def analyze_set_action_indexes(directory=BUSINESS_CLASS_DIR, key_field_dir=KEY_FIELD_DIR, workers=None,
+                               metrics=None):
+    """Advise on every Set Action under directory in one parallel pass"""
+    paths = [path for _, path in iter_business_class_files(directory)]
+    metrics = metrics or ScanMetrics('set action indexes')
+    if metrics.total_files is None:
+        metrics.total_files = len(paths)
+    with metrics.phase('key fields'):
+        resolver = KeyFieldResolver(key_field_dir)
+        primary_keys = {key: primary_key_fields(resolver, key) for key in resolver.definitions}
+    advice = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(primary_keys,)) as pool:
+        for path, size, seconds, results, error in metrics.timed(pool.map(analyze_file, paths, chunksize=16), 'analyze'):
+            if error is not None:
+                print(f"Error processing {os.path.basename(path)}: {error}")
+                metrics.add_error()
+                continue
+            metrics.add_file(path, size, seconds)
+            advice.extend(results)
+    return advice
+
+
+def format_report(advice):
+    """Render the advice as text"""
+    statuses = Counter(entry['status'] for entry in advice)
+    flagged = [entry for entry in advice if entry['status'] == FLAGGED]
+    lines = [f"=== SET ACTION INDEX ADVICE ({len(advice):,} Set Actions) ===", "", "Statistics:"]
+    for status in STATUSES:
+        lines.append(f"- {status.capitalize()}: {statuses[status]:,} ({statuses[status] / max(1, len(advice)) * 100:.1f}%)")
+
+    proposals = defaultdict(list)
+    for entry in flagged:
+        proposals[(entry['class'], tuple(entry['proposal']))].append(entry)
+    lines.append(f"\n**Proposed Sets ({len(proposals):,}, most actions served first):**")
+    for (class_name, fields), entries in sorted(proposals.items(), key=lambda x: (-len(x[1]), x[0])):
+        if not fields:
+            continue
+        lines.append(f"\n{class_name} - serves {', '.join(entry['action'] for entry in entries)}")
+        lines.append(f"        {set_name(fields)}")
+        lines.append("            indexed")
+        lines.append("            duplicates")
+        lines.append("            Sort Order")
+        lines.extend(f"                {field}" for field in fields)
+
+    lines.append("\n**Flagged Set Actions:**")
+    for entry in sorted(flagged, key=lambda x: (x['class'], x['line'])):
+        detail = f"= {', '.join(entry['equality'])}" if entry['equality'] else "no equality keys"
+        if entry['ranges']:
+            detail += f"; range {', '.join(entry['ranges'])}"
+        if entry['sort_order']:
+            detail += f"; sorted by {', '.join(entry['sort_order'])}"
+        if entry['named']:
+            detail += f"; Sort Order is {entry['set']} cannot seek"
+        elif entry['set']:
+            detail += f"; {entry['set']} seeks {entry['depth']} field(s) but not in this order"
+        lines.append(f"  {entry['class']}.{entry['action']} (line {entry['line']}): {detail}")
+    return '\n'.join(lines)
+
+
+def main():
+    arguments = sys.argv[1:]
+    workers = None
+    if '--workers' in arguments:
+        position = arguments.index('--workers')
+        workers = int(arguments[position + 1])
+        del arguments[position:position + 2]
+    directory = arguments[0] if arguments else BUSINESS_CLASS_DIR
+
+    print("Analyzing Set Actions against class Sets...")
+    metrics = ScanMetrics('set action indexes')
+    advice = analyze_set_action_indexes(directory, workers=workers, metrics=metrics)
+    with metrics.phase('report'):
+        report = format_report(advice)
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(report)
+    print('\n'.join(report.split('\n')[:8]))
+    print(f"\nDetailed advice saved to: {OUTPUT_FILE}\n")
+    metrics.finish(METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
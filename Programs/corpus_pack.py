@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Content-addressed, compressed single-file store for the References tree.
+
+build_pack writes every reference artifact into one .lplpack file: identical
+files are stored once (keyed by BLAKE2 digest), each blob is compressed on
+its own with zlib using a preset dictionary trained per folder (or lzma when
+that is smaller), and an offset index at the end gives random access by path.
+
+Analyzers read through listdir()/read_text()/walk_files(), which accept
+either a normal directory or a path inside a pack such as
+"C:\\...\\References.lplpack\\business class", so the same code runs on both.
+
+Usage:
+    python corpus_pack.py build [References dir] [pack file] [--lzma]
+    python corpus_pack.py list <pack file> [folder]
+    python corpus_pack.py cat <pack file> <relative path>
+"""
+
+import hashlib
+import json
+import lzma
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+
+from lpl_config import PACK_FILE, REFERENCES_DIR
+
+PACK_EXTENSION = '.lplpack'
+MAGIC = b'LPLPACK1'
+FOOTER = struct.Struct('<QQ8s')
+DICTIONARY_SIZE = 32 * 1024
+DICTIONARY_SAMPLE_FILES = 2000
+
+
+def train_dictionary(samples, size=DICTIONARY_SIZE):
+    """Build a zlib preset dictionary from the most valuable repeated lines"""
+    counts = Counter()
+    for content in samples:
+        counts.update(set(content.splitlines(keepends=True)))
+    # Lines seen in many files and long enough to be worth a back-reference
+    ranked = sorted((line for line, count in counts.items() if count > 1 and len(line) > 4),
+                    key=lambda line: counts[line] * len(line), reverse=True)
+    chosen = []
+    used = 0
+    for line in ranked:
+        encoded = line.encode('utf-8')
+        if used + len(encoded) > size:
+            continue
+        chosen.append(encoded)
+        used += len(encoded)
+    # zlib finds nearer matches faster, so the most valuable lines go last
+    return b''.join(reversed(chosen))
+
+
+def compress_blob(data, dictionary, use_lzma):
+    """Return (codec, payload) choosing the smallest available encoding"""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, zlib.Z_DEFAULT_STRATEGY, zdict=dictionary) \
+        if dictionary else zlib.compressobj(9)
+    best = ('zlib', compressor.compress(data) + compressor.flush())
+    if use_lzma:
+        packed = lzma.compress(data, preset=9 | lzma.PRESET_EXTREME)
+        if len(packed) < len(best[1]):
+            best = ('lzma', packed)
+    if len(data) <= len(best[1]):
+        best = ('raw', data)
+    return best
+
+
+def iter_reference_tree(references_dir):
+    """Yield (relative path with '/' separators, absolute path) for every file"""
+    for folder, _, filenames in os.walk(references_dir):
+        for filename in sorted(filenames):
+            path = os.path.join(folder, filename)
+            yield os.path.relpath(path, references_dir).replace(os.sep, '/'), path
+
+
+def build_pack(references_dir=REFERENCES_DIR, pack_file=PACK_FILE, use_lzma=False):
+    """Pack the References tree; returns statistics"""
+    files = list(iter_reference_tree(references_dir))
+    by_folder = {}
+    for relative, path in files:
+        by_folder.setdefault(relative.split('/')[0] if '/' in relative else '', []).append((relative, path))
+
+    stats = {'files': 0, 'unique': 0, 'raw_bytes': 0, 'packed_bytes': 0}
+    index = {'version': 1, 'files': {}, 'blobs': {}, 'dictionaries': {}}
+    with open(pack_file, 'wb') as pack:
+        pack.write(MAGIC)
+        for folder, entries in sorted(by_folder.items()):
+            samples = []
+            for relative, path in entries[::max(1, len(entries) // DICTIONARY_SAMPLE_FILES)]:
+                with open(path, 'r', encoding='utf-8', errors='ignore') as file:
+                    samples.append(file.read())
+            dictionary = train_dictionary(samples) if len(entries) > 10 else b''
+            if dictionary:
+                index['dictionaries'][folder] = [pack.tell(), len(dictionary)]
+                pack.write(dictionary)
+
+            for relative, path in entries:
+                with open(path, 'rb') as file:
+                    data = file.read()
+                digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+                index['files'][relative] = digest
+                stats['files'] += 1
+                stats['raw_bytes'] += len(data)
+                if digest in index['blobs']:
+                    continue
+                codec, payload = compress_blob(data, dictionary, use_lzma)
+                index['blobs'][digest] = [pack.tell(), len(payload), codec,
+                                          folder if codec == 'zlib' and dictionary else None, len(data)]
+                pack.write(payload)
+                stats['unique'] += 1
+
+        index_offset = pack.tell()
+        encoded_index = zlib.compress(json.dumps(index, separators=(',', ':')).encode('utf-8'), 9)
+        pack.write(encoded_index)
+        pack.write(FOOTER.pack(index_offset, len(encoded_index), MAGIC))
+        stats['packed_bytes'] = pack.tell()
+    return stats
+
+
+class CorpusPack:
+    """Random-access reader over a .lplpack file"""
+
+    def __init__(self, pack_file):
+        self.pack_file = pack_file
+        self._file = open(pack_file, 'rb')
+        self._file.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, index_length, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{pack_file} is not an LPL corpus pack")
+        self._file.seek(index_offset)
+        index = json.loads(zlib.decompress(self._file.read(index_length)))
+        self.files = index['files']
+        self.blobs = index['blobs']
+        self._dictionary_offsets = index['dictionaries']
+        self._lock = threading.Lock()
+        self._dictionaries = {}
+        self._folders = {}
+        for relative in self.files:
+            folder, _, name = relative.rpartition('/')
+            self._folders.setdefault(folder, []).append(name)
+
+    def close(self):
+        self._file.close()
+
+    def _read(self, offset, length):
+        # The prefetch loader reads from several threads; a shared seek+read would interleave
+        if hasattr(os, 'pread'):
+            return os.pread(self._file.fileno(), length, offset)
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def _dictionary(self, folder):
+        if folder not in self._dictionaries:
+            offset, length = self._dictionary_offsets[folder]
+            self._dictionaries[folder] = self._read(offset, length)
+        return self._dictionaries[folder]
+
+    def exists(self, relative):
+        return relative in self.files
+
+    def isdir(self, folder):
+        return folder.strip('/') in self._folders
+
+    def listdir(self, folder=''):
+        """Return file names directly inside a folder of the pack"""
+        return list(self._folders.get(folder.strip('/'), []))
+
+    def read_bytes(self, relative):
+        """Return the original bytes of a packed file"""
+        offset, length, codec, dictionary, size = self.blobs[self.files[relative]]
+        payload = self._read(offset, length)
+        if codec == 'raw':
+            return payload
+        if codec == 'lzma':
+            return lzma.decompress(payload)
+        decompressor = zlib.decompressobj(zdict=self._dictionary(dictionary)) if dictionary is not None \
+            else zlib.decompressobj()
+        return decompressor.decompress(payload) + decompressor.flush()
+
+    def read_text(self, relative, encoding='utf-8', errors='ignore'):
+        return self.read_bytes(relative).decode(encoding, errors)
+
+    def walk(self, folder=''):
+        """Yield paths relative to folder for every file beneath it, sorted"""
+        prefix = folder.strip('/') + '/' if folder.strip('/') else ''
+        for relative in sorted(self.files):
+            if relative.startswith(prefix):
+                yield relative[len(prefix):]
+
+    def size(self, relative):
+        """Original size in bytes of a packed file"""
+        return self.blobs[self.files[relative]][4]
+
+
+_open_packs = {}
+
+
+def split_pack_path(path):
+    """Split 'X/References.lplpack/business class/A.busclass' into (pack file, inner path)"""
+    path = os.fspath(path)
+    normalized = path.replace('\\', '/')
+    marker = normalized.find(PACK_EXTENSION)
+    if marker == -1:
+        return None, path
+    end = marker + len(PACK_EXTENSION)
+    if end < len(normalized) and normalized[end] != '/':
+        return None, path
+    return path[:end], normalized[end:].strip('/')
+
+
+def get_pack(pack_file):
+    """Open a pack once per process"""
+    if pack_file not in _open_packs:
+        _open_packs[pack_file] = CorpusPack(pack_file)
+    return _open_packs[pack_file]
+
+
+def listdir(directory):
+    """os.listdir that also lists folders inside a pack"""
+    pack_file, inner = split_pack_path(directory)
+    if pack_file is None:
+        return os.listdir(directory)
+    return get_pack(pack_file).listdir(inner)
+
+
+def read_text(path, encoding='utf-8', errors='ignore'):
+    """Read a reference file from disk or from inside a pack"""
+    pack_file, inner = split_pack_path(path)
+    if pack_file is None:
+        with open(path, 'r', encoding=encoding, errors=errors) as file:
+            return file.read()
+    return get_pack(pack_file).read_text(inner, encoding, errors)
+
+
+def walk_files(directory):
+    """iter_reference_tree that also walks folders inside a pack"""
+    pack_file, inner = split_pack_path(directory)
+    if pack_file is None:
+        yield from iter_reference_tree(directory)
+        return
+    for relative in get_pack(pack_file).walk(inner):
+        yield relative, os.path.join(directory, relative)
+
+
+def file_status(path):
+    """Return (size, mtime in ns) of a file on disk or inside a pack
+
+    Packed files have no mtime of their own and take the pack's, so
+    rebuilding the pack marks every file it holds as modified.
+    """
+    pack_file, inner = split_pack_path(path)
+    if pack_file is None:
+        status = os.stat(path)
+        return status.st_size, status.st_mtime_ns
+    return get_pack(pack_file).size(inner), os.stat(pack_file).st_mtime_ns
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'list', 'cat'):
+        print(__doc__)
+        return
+
+    if sys.argv[1] == 'build':
+        arguments = [arg for arg in sys.argv[2:] if not arg.startswith('--')]
+        references_dir = arguments[0] if arguments else REFERENCES_DIR
+        pack_file = arguments[1] if len(arguments) > 1 else PACK_FILE
+        start = time.perf_counter()
+        stats = build_pack(references_dir, pack_file, use_lzma='--lzma' in sys.argv)
+        print(f"Packed {stats['files']:,} files ({stats['unique']:,} unique blobs) in {time.perf_counter() - start:.1f}s")
+        print(f"Raw size: {stats['raw_bytes'] / 1048576:.1f} MB")
+        print(f"Pack size: {stats['packed_bytes'] / 1048576:.1f} MB "
+              f"({stats['packed_bytes'] / stats['raw_bytes'] * 100 if stats['raw_bytes'] else 0:.1f}%)")
+        print(f"Saved to: {pack_file}")
+        return
+
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return
+    pack = CorpusPack(sys.argv[2])
+    if sys.argv[1] == 'list':
+        folder = sys.argv[3] if len(sys.argv) > 3 else ''
+        for name in sorted(pack.listdir(folder)):
+            print(name)
+    else:
+        print(pack.read_text(sys.argv[3]))
+
+
+if __name__ == "__main__":
+    main()
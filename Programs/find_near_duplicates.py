@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Find near-duplicate forms and lists with MinHash signatures and an LSH index.
+
+Each artifact is normalized (comments, indentation and its own definition
+name removed), split into shingles of consecutive lines and reduced to a
+MinHash signature. Signatures are banded into an LSH index over cluster
+representatives: each artifact joins the most similar representative it
+shares a band bucket with, provided their estimated Jaccard similarity clears
+the threshold, and otherwise starts a cluster of its own. Every member is
+therefore within the threshold of its representative (clusters cannot chain),
+and the report lists each member's similarity to it.
+"""
+
+import os
+import random
+import re
+import sys
+import time
+import zlib
+from collections import defaultdict
+
+from lpl_config import REFERENCES_DIR, output_file
+from lpl_outline import strip_comment
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+OUTPUT_FILE = output_file('near_duplicate_clusters.txt')
+
+SCAN_FOLDERS = {'form': '.form', 'list': '.list', 'card view': '.cardview'}
+NUM_PERMUTATIONS = 128
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.8
+MAX_HASH = (1 << 32) - 1
+WORD_MASK = (1 << 64) - 1
+DEFINITION_PATTERN = re.compile(r'^\s*[\w.]+(\s+is\s+an?\s+\w+)')
+
+
+def normalize_lines(content):
+    """Return comparable lines: no comments, indentation or artifact's own name"""
+    lines = []
+    for raw in content.splitlines():
+        line = ' '.join(strip_comment(raw).split())
+        if not line:
+            continue
+        if not lines:
+            # "X_Translation is a Form" and "X is a Form" should compare equal
+            line = DEFINITION_PATTERN.sub(r'\1', line)
+        lines.append(line.lower())
+    return lines
+
+
+def shingle_hashes(lines, size=SHINGLE_SIZE):
+    """Hash each window of consecutive lines to a 32-bit value"""
+    if len(lines) < size:
+        windows = lines or ['']
+    else:
+        windows = ['\n'.join(lines[index:index + size]) for index in range(len(lines) - size + 1)]
+    return {zlib.crc32(window.encode('utf-8')) for window in windows}
+
+
+class MinHasher:
+    """Multiply-shift hash family ((a*x + b) mod 2**64) >> 32 used to build MinHash signatures"""
+
+    def __init__(self, num_permutations=NUM_PERMUTATIONS, seed=1):
+        generator = random.Random(seed)
+        self.a = [generator.randrange(1, 1 << 64) | 1 for _ in range(num_permutations)]
+        self.b = [generator.randrange(0, 1 << 64) for _ in range(num_permutations)]
+        if np is not None:
+            self.np_a = np.array(self.a, dtype=np.uint64)
+            self.np_b = np.array(self.b, dtype=np.uint64)
+
+    def signature(self, hashes):
+        """Return the MinHash signature of a set of 32-bit shingle hashes"""
+        if np is not None:
+            values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+            # uint64 arithmetic wraps modulo 2**64, matching the pure Python branch
+            permuted = (values[:, None] * self.np_a + self.np_b) >> np.uint64(32)
+            return tuple(permuted.min(axis=0).tolist())
+        return tuple(min(((a * value + b) & WORD_MASK) >> 32 for value in hashes)
+                     for a, b in zip(self.a, self.b))
+
+
+def choose_bands(threshold, num_permutations=NUM_PERMUTATIONS):
+    """Pick (bands, rows) with the highest S-curve midpoint (1/b)^(1/r) not above threshold.
+
+    Staying below the threshold favours recall; candidates are verified anyway.
+    """
+    best = (0.0, num_permutations, 1)
+    for rows in range(1, num_permutations + 1):
+        if num_permutations % rows:
+            continue
+        bands = num_permutations // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if best[0] < midpoint <= threshold:
+            best = (midpoint, bands, rows)
+    return best[1], best[2]
+
+
+def estimated_similarity(left, right):
+    """Fraction of agreeing MinHash slots (estimates Jaccard similarity)"""
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+def iter_artifacts(references_dir, folders=SCAN_FOLDERS):
+    """Yield (relative path, absolute path) for the artifact folders being compared"""
+    for folder, extension in folders.items():
+        directory = os.path.join(references_dir, folder)
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(extension):
+                yield os.path.join(folder, filename), os.path.join(directory, filename)
+
+
+def build_signatures(references_dir, hasher):
+    """Return (paths, signatures) for every artifact"""
+    paths = []
+    signatures = []
+    for relative, path in iter_artifacts(references_dir):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as file:
+                lines = normalize_lines(file.read())
+        except OSError as e:
+            print(f"Error processing {relative}: {e}")
+            continue
+        paths.append(relative)
+        signatures.append(hasher.signature(shingle_hashes(lines)))
+        if len(paths) % 5000 == 0:
+            print(f"Signed {len(paths):,} files...")
+    return paths, signatures
+
+
+def find_clusters(signatures, threshold=DEFAULT_THRESHOLD):
+    """Return (clusters with their representative first, banding)
+
+    Only representatives are indexed, so a document is verified against the
+    representatives it shares a bucket with, never against other members;
+    single-link merging through members would let unrelated documents chain.
+    """
+    bands, rows = choose_bands(threshold, len(signatures[0]) if signatures else NUM_PERMUTATIONS)
+    buckets = [defaultdict(list) for _ in range(bands)]
+    clusters = {}
+    for doc, signature in enumerate(signatures):
+        keys = [signature[band * rows:(band + 1) * rows] for band in range(bands)]
+        candidates = {representative for band, key in enumerate(keys)
+                      for representative in buckets[band].get(key, ())}
+        # Most similar representative; the earliest one wins ties
+        best = max(candidates, default=None, key=lambda representative: (
+            estimated_similarity(signatures[representative], signature), -representative))
+        if best is not None and estimated_similarity(signatures[best], signature) >= threshold:
+            clusters[best].append(doc)
+            continue
+        clusters[doc] = [doc]
+        for band, key in enumerate(keys):
+            buckets[band][key].append(doc)
+    return [members for members in clusters.values() if len(members) > 1], (bands, rows)
+
+
+def find_near_duplicates(references_dir=REFERENCES_DIR, threshold=DEFAULT_THRESHOLD):
+    """Sign every form/list/card view and return (paths, signatures, clusters, banding)"""
+    hasher = MinHasher()
+    paths, signatures = build_signatures(references_dir, hasher)
+    clusters, banding = find_clusters(signatures, threshold)
+    clusters.sort(key=len, reverse=True)
+    return paths, signatures, clusters, banding
+
+
+def main():
+    references_dir = sys.argv[1] if len(sys.argv) > 1 else REFERENCES_DIR
+    threshold = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_THRESHOLD
+    start = time.perf_counter()
+    paths, signatures, clusters, (bands, rows) = find_near_duplicates(references_dir, threshold)
+    elapsed = time.perf_counter() - start
+
+    clustered = sum(len(members) for members in clusters)
+    report = f"=== NEAR-DUPLICATE ANALYSIS ({len(paths):,} files) ===\n\n"
+    report += "Statistics:\n"
+    report += f"- Jaccard threshold: {threshold} ({bands} bands x {rows} rows, {NUM_PERMUTATIONS} permutations)\n"
+    report += f"- Clusters found: {len(clusters):,}\n"
+    report += f"- Files in clusters: {clustered:,} ({clustered / len(paths) * 100 if paths else 0:.1f}%)\n"
+    report += f"- Elapsed: {elapsed:.1f}s\n\n"
+
+    report += "Top 20 Clusters:\n"
+    for members in clusters[:20]:
+        sample = ', '.join(paths[doc] for doc in members[:3])
+        report += f"  {len(members)} files: {sample}{', ...' if len(members) > 3 else ''}\n"
+
+    print(report)
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write(report)
+        f.write("\nAll Clusters:\n")
+        for number, members in enumerate(clusters, 1):
+            representative = signatures[members[0]]
+            f.write(f"\nCluster {number} ({len(members)} files, similarity to {paths[members[0]]}):\n")
+            for doc in members:
+                f.write(f"  {paths[doc]} (~{estimated_similarity(representative, signatures[doc]):.2f})\n")
+    print(f"Detailed clusters saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory streaming parser for .form files.
+
+iter_form_nodes reads a form line by line and yields layout nodes
+(CompositeForm / Form roots, context forms, panels, layout containers,
+fields and buttons) as soon as they close, tracking nesting with an
+indentation stack instead of reading whole files. scan_forms chains the
+per-file generators so a corpus-wide scan runs in constant memory and can
+feed any downstream aggregation.
+"""
+
+import heapq
+import os
+import re
+import sys
+from collections import defaultdict
+
+from corpus_pack import listdir, read_text, split_pack_path
+from lpl_config import output_file, reference_dir
+from lpl_outline import iter_logical_lines
+
+FORM_DIR = reference_dir('form')
+OUTPUT_FILE = output_file('form_stream_analysis.txt')
+
+DEFINITION_PATTERN = re.compile(r'([\w.]+)\s+is\s+an?\s+(\w+)')
+FIELD_PATTERN = re.compile(r'[A-Z][\w]*(?:\.[\w]+)*$|[a-z]\w*\.[\w.]+$')
+# Section headers that look like bare field names
+CONTAINER_KEYWORDS = frozenset({'Layout', 'Actions', 'Column', 'Cell'})
+
+
+class LayoutNode:
+    """A closed layout element: kind, its own text, depth and property lines"""
+
+    __slots__ = ('kind', 'text', 'name', 'depth', 'line', 'parent', 'properties', 'child_count')
+
+    def __init__(self, text, depth, line, parent):
+        self.text = text
+        self.name = None
+        self.kind = None
+        self.depth = depth
+        self.line = line
+        self.parent = parent
+        self.properties = []
+        self.child_count = 0
+
+    def __repr__(self):
+        return f"LayoutNode({self.kind}, {self.text!r}, line={self.line})"
+
+
+def classify(node):
+    """Assign kind/name to a node once all of its children have been seen"""
+    text = node.text
+    definition = DEFINITION_PATTERN.match(text)
+    if definition:
+        node.name = definition.group(1)
+        node.kind = 'panel' if definition.group(2) == 'Panel' and node.depth > 0 else definition.group(2)
+    elif text.startswith('context form is'):
+        node.kind = 'context form'
+        node.name = text.split()[-1]
+    elif text.startswith('button'):
+        node.kind = 'button'
+        quoted = re.search(r'"([^"]*)"', text)
+        node.name = quoted.group(1) if quoted else text
+    elif FIELD_PATTERN.match(text) and text not in CONTAINER_KEYWORDS:
+        node.kind = 'field'
+        node.name = text
+    elif node.child_count:
+        node.kind = 'container'
+    else:
+        node.kind = 'property'
+    return node
+
+
+def iter_form_nodes(lines, emit_properties=False):
+    """Yield LayoutNodes in closing order from an iterable of form lines"""
+    stack = []
+    for number, indent, text in iter_logical_lines(lines):
+        while stack and stack[-1][0] >= indent:
+            closed = classify(stack.pop()[1])
+            if closed.kind == 'property' and stack and not emit_properties:
+                stack[-1][1].properties.append(closed.text)
+            else:
+                yield closed
+        parent = stack[-1][1] if stack else None
+        if parent is not None:
+            parent.child_count += 1
+        # Only the parent's name is kept so closed subtrees can be released
+        parent_name = (parent.name or parent.text) if parent is not None else None
+        node = LayoutNode(text, len(stack), number, parent_name)
+        stack.append((indent, node))
+    while stack:
+        closed = classify(stack.pop()[1])
+        if closed.kind == 'property' and stack and not emit_properties:
+            stack[-1][1].properties.append(closed.text)
+        else:
+            yield closed
+
+
+def iter_form_file(file_path, emit_properties=False):
+    """Stream layout nodes from one .form file (a packed form is decompressed whole first)"""
+    if split_pack_path(file_path)[0] is not None:
+        yield from iter_form_nodes(read_text(file_path).splitlines(keepends=True), emit_properties)
+        return
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+        yield from iter_form_nodes(file, emit_properties)
+
+
+def iter_form_files(directory):
+    """Yield paths of every .form file in a folder on disk or inside a pack"""
+    for name in listdir(directory):
+        if name.endswith('.form'):
+            yield os.path.join(directory, name)
+
+
+def scan_forms(directory=FORM_DIR):
+    """Yield (file name, LayoutNode) for the whole form corpus"""
+    for path in iter_form_files(directory):
+        name = os.path.basename(path)
+        try:
+            for node in iter_form_file(path):
+                yield name, node
+        except OSError as e:
+            print(f"Error processing {name}: {e}")
+
+
+def aggregate_form_stream(stream, top=20):
+    """Consume a (file, node) stream into summary counts, keeping only the top N forms"""
+    stats = {
+        'files': 0,
+        'kinds': defaultdict(int),
+        'form_types': defaultdict(int),
+        'context_forms': defaultdict(int),
+        'largest_forms': [],
+    }
+    largest = stats['largest_forms']
+    current, fields, depth = None, 0, 0
+    for filename, node in stream:
+        if filename != current:
+            if current is not None:
+                push_largest(largest, (fields, depth, current), top)
+            stats['files'] += 1
+            current, fields, depth = filename, 0, 0
+        stats['kinds'][node.kind] += 1
+        if node.depth == 0 and node.name:
+            stats['form_types'][node.kind] += 1
+        elif node.kind == 'context form':
+            stats['context_forms'][node.name] += 1
+        elif node.kind == 'field':
+            fields += 1
+        depth = max(depth, node.depth)
+    if current is not None:
+        push_largest(largest, (fields, depth, current), top)
+    largest.sort(reverse=True)
+    return stats
+
+
+def push_largest(heap, item, top):
+    """Keep the top N items in a min-heap"""
+    if len(heap) < top:
+        heapq.heappush(heap, item)
+    else:
+        heapq.heappushpop(heap, item)
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else FORM_DIR
+    print("Streaming form corpus...")
+    stats = aggregate_form_stream(scan_forms(directory))
+
+    report = f"=== FORM STREAM ANALYSIS ({stats['files']:,} files) ===\n\n"
+    report += "Layout Node Kinds:\n"
+    for kind, count in sorted(stats['kinds'].items(), key=lambda x: x[1], reverse=True):
+        report += f"  {kind}: {count:,}\n"
+
+    report += "\nForm Types:\n"
+    for kind, count in sorted(stats['form_types'].items(), key=lambda x: x[1], reverse=True):
+        report += f"  {kind}: {count:,}\n"
+
+    report += "\nTop 20 Context Forms:\n"
+    for name, count in sorted(stats['context_forms'].items(), key=lambda x: x[1], reverse=True)[:20]:
+        report += f"  {name}: {count}\n"
+
+    report += "\nTop 20 Forms by Field Count:\n"
+    for count, depth, name in stats['largest_forms']:
+        report += f"  {name}: {count} fields (depth {depth})\n"
+
+    print(report)
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write(report)
+    print(f"Detailed results saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Git-aware incremental analysis of the References corpus.
+
+The per-file contributions used by watch mode (set names, action types,
+relation targets) are persisted in a JSON store together with the commit
+they were computed at. A refresh asks git which reference files changed
+between that commit and HEAD, re-parses only those (reading them from the
+HEAD tree through one `git cat-file --batch` process), merges the results
+into the store and records HEAD as the new analyzed commit. A post-commit
+refresh therefore costs time proportional to the diff.
+
+The first run, --full, or a recorded commit that no longer exists (e.g.
+after a rebase) analyzes every tracked reference file.
+
+Usage:
+    python incremental_analysis.py [repository dir] [--full]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from lpl_config import LIBRARY_DIR, output_file
+from watch_references import WATCH_EXTENSIONS, WATCH_FOLDERS, IncrementalAggregates, file_contribution, \
+    format_report
+
+REPOSITORY_DIR = LIBRARY_DIR
+REFERENCES_FOLDER = 'References'
+STORE_FILE = output_file('incremental_analysis_store.json')
+OUTPUT_FILE = output_file('incremental_analysis.txt')
+
+STORE_VERSION = 1
+
+
+def git(repository, *arguments):
+    """Run a git command in repository and return its stdout"""
+    result = subprocess.run(['git', '-C', repository, *arguments], capture_output=True, check=True)
+    return result.stdout.decode('utf-8', 'surrogateescape')
+
+
+def is_analyzed(path):
+    """True for repository paths the analysis covers (References/<watched folder>/<file>)"""
+    if not path.startswith(REFERENCES_FOLDER + '/') or not path.endswith(WATCH_EXTENSIONS):
+        return False
+    folder = path[len(REFERENCES_FOLDER) + 1:].rpartition('/')[0]
+    return folder in WATCH_FOLDERS
+
+
+def commit_exists(repository, commit):
+    return subprocess.run(['git', '-C', repository, 'cat-file', '-e', f"{commit}^{{commit}}"],
+                          capture_output=True).returncode == 0
+
+
+def changed_paths(repository, base, head):
+    """Return ({modified or added paths}, {deleted paths}) between two commits"""
+    output = git(repository, 'diff', '--name-status', '-z', '--no-renames', base, head, '--', REFERENCES_FOLDER)
+    fields = output.split('\0')
+    modified, deleted = set(), set()
+    for status, path in zip(fields[0::2], fields[1::2]):
+        if not is_analyzed(path):
+            continue
+        (deleted if status.startswith('D') else modified).add(path)
+    return modified, deleted
+
+
+def tracked_paths(repository, commit):
+    """Every analyzed path in the tree of a commit"""
+    output = git(repository, 'ls-tree', '-r', '-z', '--name-only', commit, '--', REFERENCES_FOLDER)
+    return {path for path in output.split('\0') if path and is_analyzed(path)}
+
+
+def read_blobs(repository, commit, paths):
+    """Yield (path, text or None) for paths in commit through one cat-file process"""
+    process = subprocess.Popen(['git', '-C', repository, 'cat-file', '--batch'],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    try:
+        for path in paths:
+            process.stdin.write(f"{commit}:{path}\n".encode('utf-8'))
+            process.stdin.flush()
+            header = process.stdout.readline().split()
+            if len(header) < 3 or header[1] != b'blob':
+                yield path, None
+                continue
+            data = process.stdout.read(int(header[2]))
+            process.stdout.read(1)
+            yield path, data.decode('utf-8', 'ignore')
+    finally:
+        process.stdin.close()
+        process.wait()
+
+
+def load_store(store_file=STORE_FILE):
+    """Return (analyzed commit, IncrementalAggregates) or (None, empty) when absent or outdated"""
+    aggregates = IncrementalAggregates()
+    if not os.path.exists(store_file):
+        return None, aggregates
+    with open(store_file, 'r', encoding='utf-8') as f:
+        store = json.load(f)
+    if store.get('version') != STORE_VERSION:
+        return None, aggregates
+    for path, contribution in store['files'].items():
+        aggregates.update(path, {category: Counter(counts) for category, counts in contribution.items()})
+    return store['commit'], aggregates
+
+
+def save_store(commit, aggregates, store_file=STORE_FILE):
+    """Write the store atomically so an interrupted refresh keeps the previous one"""
+    store = {
+        'version': STORE_VERSION,
+        'commit': commit,
+        'files': {path: {category: dict(counts) for category, counts in contribution.items()}
+                  for path, contribution in aggregates.contributions.items()},
+    }
+    temporary = store_file + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(store, f, separators=(',', ':'))
+    os.replace(temporary, store_file)
+
+
+def refresh(repository=REPOSITORY_DIR, store_file=STORE_FILE, full=False):
+    """Bring the store up to HEAD; returns statistics"""
+    head = git(repository, 'rev-parse', 'HEAD').strip()
+    base, aggregates = (None, IncrementalAggregates()) if full else load_store(store_file)
+    stats = {'base': base, 'head': head, 'mode': 'incremental', 'parsed': 0, 'deleted': 0, 'errors': 0}
+
+    if base is not None and not commit_exists(repository, base):
+        print(f"Analyzed commit {base[:10]} is no longer in the repository; rebuilding")
+        base, aggregates = None, IncrementalAggregates()
+    if base is None:
+        stats['mode'] = 'full'
+        modified, deleted = tracked_paths(repository, head), set()
+    elif base == head:
+        modified, deleted = set(), set()
+    else:
+        modified, deleted = changed_paths(repository, base, head)
+
+    for path in deleted - modified:
+        aggregates.remove(path)
+        stats['deleted'] += 1
+    for path, content in read_blobs(repository, head, sorted(modified)):
+        if content is None:
+            aggregates.remove(path)
+            continue
+        try:
+            aggregates.update(path, file_contribution(path, content))
+        except Exception as e:
+            print(f"Error processing {os.path.basename(path)}: {e}")
+            aggregates.remove(path)
+            stats['errors'] += 1
+            continue
+        stats['parsed'] += 1
+
+    save_store(head, aggregates, store_file)
+    stats['files'] = len(aggregates)
+    return stats, aggregates
+
+
+def main():
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    repository = arguments[0] if arguments else REPOSITORY_DIR
+    start = time.perf_counter()
+    stats, aggregates = refresh(repository, full='--full' in sys.argv)
+    elapsed = time.perf_counter() - start
+
+    since = stats['base'][:10] if stats['base'] else 'nothing'
+    print(f"{stats['mode'].title()} analysis {since}..{stats['head'][:10]}: "
+          f"{stats['parsed']:,} re-parsed, {stats['deleted']:,} removed, {stats['errors']} errors "
+          f"in {elapsed:.2f}s ({stats['files']:,} files in store)")
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write(format_report(aggregates, os.path.join(repository, REFERENCES_FOLDER)))
+    print(f"Report saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Resolve key field "extends" chains across ALL .field files.
+
+KeyFieldResolver loads every key field once, then memoizes the flattened
+definition of each one (labels, representation, context, states, field
+rules and constraints merged from the root of its extends chain down) so
+business class analyzers can look up key field types in bulk.
+"""
+
+import os
+import re
+import sys
+from collections import defaultdict
+
+from corpus_pack import listdir, read_text
+from lpl_config import output_file, reference_dir
+from lpl_outline import parse_outline, sections, definition_name
+
+KEY_FIELD_DIR = reference_dir('key field')
+OUTPUT_FILE = output_file('key_field_resolution.txt')
+
+LABEL_PATTERN = re.compile(r'default label is\s+(.+)')
+TYPE_PATTERN = re.compile(r'type is\s+(.+)')
+
+
+def parse_key_field(content, name=None):
+    """Parse one .field file into its own (unflattened) definition"""
+    return build_key_field(parse_outline(content), name)
+
+
+def build_key_field(roots, name=None):
+    """Build the (unflattened) definition of a parsed key field outline"""
+    root = roots[0] if roots else None
+    definition = {
+        'name': name,
+        'kind': None,
+        'extends': None,
+        'extends_overrides': [],
+        'label': None,
+        'representation': None,
+        'business_class': None,
+        'context': [],
+        'states': [],
+        'display_fields': [],
+        'field_rules': {},
+        'constraints': [],
+    }
+    if root is None:
+        return definition
+
+    match = re.match(r'([\w.]+)\s+is\s+an?\s+(\w+)', root.text)
+    if match:
+        definition['name'] = match.group(1)
+        definition['kind'] = match.group(2)
+
+    for child in root.children:
+        text = child.text
+        if text.startswith('extends '):
+            definition['extends'] = text.split()[1]
+            definition['extends_overrides'] = [grandchild.text for grandchild in child.children]
+        elif LABEL_PATTERN.match(text):
+            definition['label'] = LABEL_PATTERN.match(text).group(1).strip().strip('"')
+
+    found = sections(root)
+    representation = found.get('Representation')
+    if representation is not None:
+        for node in representation.walk():
+            type_match = TYPE_PATTERN.match(node.text)
+            if type_match and definition['representation'] is None:
+                definition['representation'] = type_match.group(1).strip()
+            elif node.text == 'States':
+                definition['states'] = [definition_name(state.text) for state in node.children]
+
+    ontology = found.get('Ontology')
+    if ontology is not None:
+        for node in ontology.children:
+            if node.text.startswith('business class is'):
+                definition['business_class'] = node.text.split()[-1]
+            elif node.text == 'Context':
+                definition['context'] = [definition_name(context.text) for context in node.children]
+
+    if 'States' in found:
+        definition['states'] = [definition_name(state.text) for state in found['States'].children]
+
+    display = found.get('Display Fields')
+    if display is not None:
+        definition['display_fields'] = [node.text for node in display.children]
+
+    rules = found.get('Field Rules')
+    if rules is not None:
+        for field in rules.children:
+            field_name = definition_name(field.text)
+            definition['field_rules'][field_name] = [node.text for node in field.walk() if node is not field]
+            for node in field.walk():
+                if node.text.startswith('constraint'):
+                    message = node.children[0].text if node.children else None
+                    definition['constraints'].append((field_name, node.text, message))
+    return definition
+
+
+def iter_key_field_files(directory):
+    """Yield (file name stem, path) for every .field file"""
+    for filename in sorted(listdir(directory)):
+        if filename.endswith('.field'):
+            yield os.path.splitext(filename)[0], os.path.join(directory, filename)
+
+
+class KeyFieldResolver:
+    """Loads all key fields once and memoizes flattened definitions"""
+
+    def __init__(self, directory=KEY_FIELD_DIR):
+        self.definitions = {}
+        self._flattened = {}
+        if directory.endswith('.lplsnap'):
+            from lpl_snapshot import load_snapshot
+            self.definitions = load_snapshot(directory).key_field_definitions()
+            return
+        for name, path in iter_key_field_files(directory):
+            try:
+                definition = parse_key_field(read_text(path), name)
+            except Exception as e:
+                print(f"Error processing {os.path.basename(path)}: {e}")
+                continue
+            self.definitions[definition['name'] or name] = definition
+
+    def chain(self, name):
+        """Return the extends chain [name, parent, grandparent, ...], stopping at cycles"""
+        chain = []
+        seen = set()
+        current = name
+        while current in self.definitions and current not in seen:
+            chain.append(current)
+            seen.add(current)
+            current = self.definitions[current]['extends']
+        if current and current not in seen and current not in self.definitions:
+            chain.append(current)
+        return chain
+
+    def resolve(self, name):
+        """Return the flattened definition of a key field (memoized), or None"""
+        if name in self._flattened:
+            return self._flattened[name]
+        definition = self.definitions.get(name)
+        if definition is None:
+            return None
+        # Mark before recursing so an extends cycle resolves to the partial definition
+        self._flattened[name] = None
+        parent_name = definition['extends']
+        parent = self.resolve(parent_name) if parent_name else None
+
+        flattened = {
+            'name': name,
+            'kind': definition['kind'],
+            'chain': self.chain(name),
+            'unresolved_parent': parent_name if parent_name and parent_name not in self.definitions else None,
+            'label': definition['label'] or (parent['label'] if parent else None),
+            'representation': definition['representation'] or (parent['representation'] if parent else None),
+            'business_class': definition['business_class'] or (parent['business_class'] if parent else None),
+            'context': definition['context'] or (list(parent['context']) if parent else []),
+            'states': definition['states'] or (list(parent['states']) if parent else []),
+            'display_fields': definition['display_fields'] or (list(parent['display_fields']) if parent else []),
+            'field_rules': dict(parent['field_rules']) if parent else {},
+            'constraints': list(parent['constraints']) if parent else [],
+        }
+        for field_name, rules in definition['field_rules'].items():
+            flattened['field_rules'][field_name] = flattened['field_rules'].get(field_name, []) + rules
+        flattened['constraints'].extend(definition['constraints'])
+        self._flattened[name] = flattened
+        return flattened
+
+    def resolve_many(self, names):
+        """Bulk lookup: {name: flattened definition or None}"""
+        return {name: self.resolve(name) for name in names}
+
+    def resolve_all(self):
+        """Flatten every loaded key field"""
+        return self.resolve_many(self.definitions)
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else KEY_FIELD_DIR
+    resolver = KeyFieldResolver(directory)
+    resolved = resolver.resolve_all()
+
+    kinds = defaultdict(int)
+    depths = defaultdict(int)
+    unresolved = defaultdict(int)
+    parents = defaultdict(int)
+    for name, flattened in resolved.items():
+        kinds[resolver.definitions[name]['kind'] or 'empty file'] += 1
+        depths[len(flattened['chain']) - 1] += 1
+        if flattened['unresolved_parent']:
+            unresolved[flattened['unresolved_parent']] += 1
+        if resolver.definitions[name]['extends']:
+            parents[resolver.definitions[name]['extends']] += 1
+
+    extending = sum(count for depth, count in depths.items() if depth > 0)
+    report = f"=== KEY FIELD RESOLUTION ({len(resolved)} files) ===\n\n"
+    report += "Statistics:\n"
+    for kind, count in sorted(kinds.items(), key=lambda x: x[1], reverse=True):
+        report += f"- {kind}: {count}\n"
+    report += f"- Key fields using extends: {extending}\n"
+    report += f"- Extends targets not found in key field folder: {len(unresolved)}\n\n"
+
+    report += "Extends Chain Depth Distribution:\n"
+    for depth in sorted(depths):
+        report += f"  depth {depth}: {depths[depth]}\n"
+
+    report += "\nTop 20 Extended Key Fields:\n"
+    for parent, count in sorted(parents.items(), key=lambda x: x[1], reverse=True)[:20]:
+        report += f"  {parent}: extended by {count}\n"
+
+    report += "\nFlattened Definitions (extending key fields):\n"
+    for name in sorted(resolved):
+        flattened = resolved[name]
+        if len(flattened['chain']) < 2:
+            continue
+        report += f"\n{name} ({' -> '.join(flattened['chain'])})\n"
+        report += f"  label: {flattened['label']}\n"
+        report += f"  type: {flattened['representation']}\n"
+        report += f"  business class: {flattened['business_class']}\n"
+        if flattened['context']:
+            report += f"  context: {', '.join(flattened['context'])}\n"
+        for field_name, condition, message in flattened['constraints']:
+            report += f"  constraint on {field_name}: {condition} {message or ''}\n"
+
+    print(report[:report.index("\nFlattened Definitions")])
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write(report)
+    print(f"\nDetailed resolution saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
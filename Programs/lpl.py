@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+lpl - single entry point for the LPL Library tools.
+
+Each subcommand imports the modules it needs only when it runs, so
+`lpl --help` and single-class queries start in milliseconds and PyPDF2 is
+loaded only by `lpl pdf`. Folder locations come from lpl_config (override
+with LPL_LIBRARY_DIR / LPL_REFERENCES_DIR / LPL_OUTPUTS_DIR).
+
+Usage (from the repository root, lpl.bat wraps this script):
+    python Programs/lpl.py scan
+    python Programs/lpl.py sets PayablesInvoice
+    python Programs/lpl.py actions PayablesInvoice --type "Set Action"
+    python Programs/lpl.py relations PayablesInvoice Vendor
+    python Programs/lpl.py pdf toc
+    python Programs/lpl.py csv "where (Company = 3020)" PORI_M4NS_1234_20250814.csv
+    python Programs/lpl.py knowledge "Set Action"
+    python Programs/lpl.py search "invoke Create" --folder "business class"
+    python Programs/lpl.py lint "References/business class/PayablesInvoice.busclass"
+    python Programs/lpl.py lsp Outputs/references.lplsnap
+"""
+
+import argparse
+import os
+import re
+
+import lpl_config
+
+BUSINESS_CLASS_EXTENSIONS = ('.busclass', '.businessclass')
+
+
+def load_class_model(name):
+    """Parse one business class by name from the business class folder or the References root"""
+    from corpus_pack import read_text
+    from lpl_business_class import parse_business_class
+
+    for directory in (lpl_config.reference_dir('business class'), lpl_config.REFERENCES_DIR):
+        for extension in BUSINESS_CLASS_EXTENSIONS:
+            try:
+                content = read_text(os.path.join(directory, name + extension))
+            except (OSError, KeyError):
+                continue
+            return parse_business_class(content, name)
+    raise SystemExit(f"Business class not found: {name}")
+
+
+def command_scan(args):
+    import time
+    from lpl_snapshot import build_snapshot
+
+    start = time.perf_counter()
+    stats = build_snapshot(args.references, args.output)
+    print(f"Scanned {stats['files']:,} files in {time.perf_counter() - start:.1f}s "
+          f"({stats['nodes']:,} outline nodes, {stats['symbols']:,} identifiers)")
+    print(f"Snapshot saved to: {args.output}")
+
+
+def command_sets(args):
+    model = load_class_model(args.business_class)
+    print(f"{model['name']}: {len(model['sets'])} sets")
+    for entry in model['sets'].values():
+        flags = ' (duplicates)' if entry['duplicates'] else ''
+        print(f"  {entry['name']}{flags}: {', '.join(entry['sort_order']) or 'no sort order'}")
+        if entry['instance_selection']:
+            print(f"      {entry['instance_selection']}")
+
+
+def command_actions(args):
+    model = load_class_model(args.business_class)
+    actions = [action for action in model['actions'].values()
+               if args.type is None or (action['type'] or '').lower() == args.type.lower()]
+    print(f"{model['name']}: {len(actions)} actions")
+    for action in actions:
+        print(f"  {action['name']}: {action['type'] or 'unknown'} (line {action['line']})")
+
+
+def command_relations(args):
+    if args.target is None:
+        model = load_class_model(args.business_class)
+        print(f"{model['name']}: {len(model['relations'])} relations")
+        for relation in model['relations'].values():
+            print(f"  {relation['name']} -> {relation['target'] or '?'} ({relation['type'] or 'set/unknown'})")
+        return
+
+    from relation_graph import GRAPH_FILE, format_path, load_relation_graph
+    if not os.path.exists(GRAPH_FILE):
+        raise SystemExit("Relation graph not built yet; run: python relation_graph.py build")
+    graph = load_relation_graph()
+    hops = graph.cheapest_path(args.business_class, args.target) if args.cheapest \
+        else graph.shortest_path(args.business_class, args.target)
+    print(f"{args.business_class} -> {args.target}: {format_path(hops)}")
+
+
+def command_pdf(args):
+    try:
+        import PyPDF2  # noqa: F401
+    except ImportError:
+        raise SystemExit("lpl pdf needs PyPDF2 (pip install PyPDF2)")
+
+    if args.action == 'text':
+        from pdf_converter import convert_pdf_to_text
+        convert_pdf_to_text(args.pdf, args.output or lpl_config.output_file('inforlandmarkconfigurationconsolelpl.txt'))
+        return
+
+    if args.action == 'toc':
+        from pdf_toc_extractor import extract_table_of_contents
+        entries = extract_table_of_contents(args.pdf)
+        output = args.output or lpl_config.output_file('pdf_table_of_contents.txt')
+        title = "TABLE OF CONTENTS"
+    else:
+        from pdf_section_lister import list_pdf_sections
+        entries = list_pdf_sections(args.pdf)
+        output = args.output or lpl_config.output_file('pdf_sections_list.txt')
+        title = "PDF SECTIONS LIST"
+    if not entries:
+        raise SystemExit(f"No {args.action} entries found in {args.pdf}")
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(f"{title}\n" + "=" * 50 + "\n\n")
+        for entry in entries:
+            f.write(f"{entry}\n")
+    for entry in entries[:20]:
+        print(entry)
+    if len(entries) > 20:
+        print(f"... and {len(entries) - 20} more")
+    print(f"\nSaved to: {output}")
+
+
+def command_csv(args):
+    from lpl_condition_compiler import print_selection
+
+    path = args.file if os.path.isabs(args.file) or os.path.exists(args.file) \
+        else os.path.join(lpl_config.INPUTS_DIR, args.file)
+    params = dict(param.split('=', 1) for param in args.params if '=' in param)
+    print_selection(args.condition, path, params, limit=args.limit)
+
+
+def command_knowledge(args):
+    with open(lpl_config.KNOWLEDGE_FILE, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    # Knowledge.txt is a sequence of "=== TITLE ===" sections
+    parts = re.split(r'^(=== .+ ===)\s*$', content, flags=re.M)
+    sections = list(zip(parts[1::2], parts[2::2]))
+    if args.term is None:
+        for title, _ in sections:
+            print(title)
+        print(f"\n{len(sections)} sections in {lpl_config.KNOWLEDGE_FILE}")
+        return
+    term = args.term.lower()
+    matches = [(title, body) for title, body in sections if term in title.lower() or term in body.lower()]
+    for title, body in matches[:args.limit]:
+        print(f"{title}\n{body.strip()}\n")
+    print(f"{len(matches)} of {len(sections)} sections mention '{args.term}'")
+
+
+def command_search(args):
+    from corpus_pack import listdir
+    from prefetch_loader import prefetch
+
+    pattern = re.compile(args.pattern, re.IGNORECASE if args.ignore_case else 0)
+    directory = lpl_config.reference_dir(args.folder) if args.folder else lpl_config.REFERENCES_DIR
+    names = sorted(name for name in listdir(directory) if args.ext is None or name.endswith(args.ext))
+    shown = files = 0
+    for path, content, error in prefetch(os.path.join(directory, name) for name in names):
+        if error is not None:
+            continue
+        found = False
+        for number, line in enumerate(content.splitlines(), 1):
+            if pattern.search(line):
+                found = True
+                if shown < args.limit:
+                    print(f"{os.path.basename(path)}:{number}: {line.strip()}")
+                shown += 1
+        files += found
+    print(f"\n{shown:,} matches in {files:,} files" + (f" (first {args.limit} shown)" if shown > args.limit else ''))
+
+
+def command_lint(args):
+    from lpl_lint import CACHE_FILE, format_report, lint
+
+    findings, stats = lint(args.target, args.messages, None if args.no_cache else CACHE_FILE)
+    report = format_report(findings, stats)
+    summary, _, details = report.partition("\n**Findings:**\n")
+    print(summary)
+    details = details.splitlines()
+    for line in details[:args.limit]:
+        print(line)
+    if len(details) > args.limit:
+        print(f"... and {len(details) - args.limit:,} more")
+
+
+def command_lsp(args):
+    from lpl_language_server import LanguageServer, load_index
+
+    # stdout carries the protocol, so nothing else may print to it
+    LanguageServer(load_index(args.source)).serve()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='lpl', description="LPL Library tools")
+    commands = parser.add_subparsers(dest='command', metavar='<command>')
+
+    scan = commands.add_parser('scan', help="parse the References corpus into a binary snapshot")
+    scan.add_argument('--references', default=lpl_config.REFERENCES_DIR)
+    scan.add_argument('--output', default=lpl_config.output_file('references.lplsnap'))
+    scan.set_defaults(handler=command_scan)
+
+    sets = commands.add_parser('sets', help="list the Sets of a business class")
+    sets.add_argument('business_class')
+    sets.set_defaults(handler=command_sets)
+
+    actions = commands.add_parser('actions', help="list the Actions of a business class")
+    actions.add_argument('business_class')
+    actions.add_argument('--type', help='only actions of this type, e.g. "Set Action"')
+    actions.set_defaults(handler=command_actions)
+
+    relations = commands.add_parser('relations', help="list relations, or the relation path to a target class")
+    relations.add_argument('business_class')
+    relations.add_argument('target', nargs='?')
+    relations.add_argument('--cheapest', action='store_true', help="prefer one-to-one hops over fewer hops")
+    relations.set_defaults(handler=command_relations)
+
+    pdf = commands.add_parser('pdf', help="convert or index the LPL reference PDF (needs PyPDF2)")
+    pdf.add_argument('action', choices=('text', 'toc', 'sections'))
+    pdf.add_argument('--pdf', default=lpl_config.PDF_FILE)
+    pdf.add_argument('--output')
+    pdf.set_defaults(handler=command_pdf)
+
+    csv = commands.add_parser('csv', help="filter a staged CSV from Inputs with an LPL condition")
+    csv.add_argument('condition')
+    csv.add_argument('file', help="CSV path, or a file name in Inputs")
+    csv.add_argument('params', nargs='*', help="Param=Value bindings for the condition")
+    csv.add_argument('--limit', type=int, default=20)
+    csv.set_defaults(handler=command_csv)
+
+    knowledge = commands.add_parser('knowledge', help="list Knowledge.txt sections or show those mentioning a term")
+    knowledge.add_argument('term', nargs='?')
+    knowledge.add_argument('--limit', type=int, default=10)
+    knowledge.set_defaults(handler=command_knowledge)
+
+    search = commands.add_parser('search', help="regex search across reference files")
+    search.add_argument('pattern')
+    search.add_argument('--folder', help="References subfolder, e.g. 'business class'")
+    search.add_argument('--ext', help="only files with this extension, e.g. .busclass")
+    search.add_argument('-i', '--ignore-case', action='store_true')
+    search.add_argument('--limit', type=int, default=50)
+    search.set_defaults(handler=command_search)
+
+    lint = commands.add_parser('lint', help="lint business classes (cached by content hash)")
+    lint.add_argument('target', nargs='?', default=lpl_config.REFERENCES_DIR, help="References dir or one file")
+    lint.add_argument('--messages', default=os.path.join(lpl_config.INPUTS_DIR, 'message_catalog.txt'),
+                      help="message catalog, one message id per line")
+    lint.add_argument('--no-cache', action='store_true')
+    lint.add_argument('--limit', type=int, default=50)
+    lint.set_defaults(handler=command_lint)
+
+    lsp = commands.add_parser('lsp', help="run the LPL language server over stdio")
+    lsp.add_argument('source', nargs='?', default=lpl_config.output_file('references.lplsnap'),
+                     help="snapshot file or References dir")
+    lsp.set_defaults(handler=command_lsp)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Business class model loader built on lpl_outline.
+
+load_business_class returns a plain dict describing the members of a
+.busclass file: fields by kind, relations with their targets, derived fields,
+conditions, sets and actions (state actions as State.Action). The corpus-wide
+analyzers share it instead of re-implementing section regexes.
+"""
+
+import os
+import re
+
+from corpus_pack import listdir, read_text
+from lpl_outline import parse_outline, sections, definition_name
+from prefetch_loader import prefetch
+
+BUSINESS_CLASS_EXTENSIONS = ('.busclass', '.businessclass')
+
+FIELD_SECTIONS = {
+    'Persistent Fields': 'persistent',
+    'Transient Fields': 'transient',
+    'Local Fields': 'local',
+    'Context Fields': 'context',
+    'Derived Fields': 'derived',
+    'Conditions': 'condition',
+    'Relations': 'relation',
+}
+
+RELATION_PATTERN = re.compile(r'(one-to-one|one-to-many|many-to-one)\s+relation\s+to\s+([\w.]+)')
+TYPE_PATTERN = re.compile(r'\bis\s+(?:an?|like)\s+([\w.]+)')
+DEFINITION_PATTERN = re.compile(r'[A-Za-z_][\w.]*\s+is\s+an?\s+\w+')
+STATE_ACTION_PATTERN = re.compile(r'\w+\s+is\s+an?\s+.*Action\b')
+
+
+def iter_business_class_files(directory):
+    """Yield (class name, path) for every business class file in directory (or pack folder)"""
+    for filename in sorted(listdir(directory)):
+        if filename.endswith(BUSINESS_CLASS_EXTENSIONS):
+            yield os.path.splitext(filename)[0], os.path.join(directory, filename)
+
+
+def parse_relation(node):
+    """Describe one Relations entry"""
+    relation = {
+        'name': definition_name(node.text),
+        'type': None,
+        'target': None,
+        'mapping_type': None,
+        'field_mapping': [],
+        'instance_selection': [],
+        'line': node.line,
+    }
+    for child in node.walk():
+        text = child.text
+        match = RELATION_PATTERN.match(text)
+        if match:
+            relation['type'] = match.group(1)
+            relation['target'] = match.group(2)
+        elif text.startswith('Field Mapping'):
+            relation['mapping_type'] = text.split('uses ', 1)[-1].strip() if 'uses ' in text else 'default'
+        elif text.startswith('related.'):
+            relation['field_mapping'].append(text)
+        elif text.startswith('where'):
+            relation['instance_selection'].append(text)
+    return relation
+
+
+def parse_set(node):
+    """Describe one Sets entry (sort order fields, duplicates, primary, selection)"""
+    entry = {'name': definition_name(node.text), 'sort_order': [], 'duplicates': False, 'primary': False,
+             'instance_selection': None, 'line': node.line}
+    for child in node.children:
+        if child.text == 'duplicates':
+            entry['duplicates'] = True
+        elif child.text == 'primary':
+            entry['primary'] = True
+        elif child.text == 'Sort Order':
+            entry['sort_order'] = [grandchild.text.split()[0] for grandchild in child.children]
+        elif child.text == 'Instance Selection' and child.children:
+            entry['instance_selection'] = child.children[0].text
+    return entry
+
+
+def parse_action(node):
+    """Describe one Actions entry, keeping its subsections as outline nodes"""
+    match = re.match(r'([\w.]+)\s+is\s+an?\s+(.+)', node.text)
+    action = {
+        'name': match.group(1) if match else definition_name(node.text),
+        'type': match.group(2).strip() if match else None,
+        'node': node,
+        'line': node.line,
+        'subsections': {},
+    }
+    for child in node.children:
+        action['subsections'].setdefault(child.text, child)
+    return action
+
+
+def field_type(text):
+    """Return the declared type of a field line, or the field name for bare key fields"""
+    match = TYPE_PATTERN.search(text)
+    if match:
+        return match.group(1)
+    return definition_name(text) if len(text.split()) == 1 else None
+
+
+def definition_root(texts):
+    """Index of the class definition among a file's root texts, None for a placeholder
+
+    The BusinessClass root wins, else the first definition line. Empty and
+    comment-only files (export stubs) have none; loaders skip them so disk
+    and snapshot loads key the same classes by the same declared names.
+    """
+    texts = list(texts)
+    index = next((index for index, text in enumerate(texts) if text.endswith('is a BusinessClass')), None)
+    if index is None:
+        index = next((index for index, text in enumerate(texts) if DEFINITION_PATTERN.match(text)), None)
+    return index
+
+
+def class_parts(roots, root):
+    """The definition root plus module parts of the same class in the file (FileCreationLogic.BinGroup)"""
+    suffix = '.' + definition_name(root.text)
+    return [root] + [node for node in roots if node is not root and node.text.endswith('is a BusinessClass')
+                     and definition_name(node.text).endswith(suffix)]
+
+
+def section_nodes(parts, header):
+    """Every section with the given header across the class parts"""
+    return [child for part in parts for child in part.children if child.text.strip() == header]
+
+
+def state_actions(parts):
+    """Yield (state name, action node) for the actions declared under StateCycles states"""
+    for cycles in section_nodes(parts, 'StateCycles'):
+        for cycle in cycles.children:
+            for state in cycle.children:
+                if not state.text.endswith('is a State'):
+                    continue
+                for child in state.children:
+                    if STATE_ACTION_PATTERN.match(child.text):
+                        yield definition_name(state.text), child
+
+
+def build_business_class(name, roots):
+    """Build the model dict for a parsed business class outline"""
+    index = definition_root(node.text for node in roots)
+    root = roots[index] if index is not None else None
+    model = {
+        'name': name,
+        'members': {},
+        'field_types': {},
+        'relations': {},
+        'derived': {},
+        'conditions': {},
+        'sets': {},
+        'actions': {},
+        'declared_actions': [],
+        'sections': {},
+    }
+    if root is None:
+        return model
+    model['name'] = definition_name(root.text) or name
+    model['sections'] = sections(root)
+    parts = class_parts(roots, root)
+
+    for section_name, kind in FIELD_SECTIONS.items():
+        for child in (child for section in section_nodes(parts, section_name) for child in section.children):
+            member = definition_name(child.text)
+            model['members'].setdefault(member, kind)
+            if kind == 'relation':
+                model['relations'][member] = parse_relation(child)
+            elif kind == 'derived':
+                model['derived'][member] = child
+            elif kind == 'condition':
+                model['conditions'][member] = child
+            else:
+                model['field_types'][member] = field_type(child.text)
+
+    for child in (child for section in section_nodes(parts, 'Sets') for child in section.children):
+        entry = parse_set(child)
+        model['sets'][entry['name']] = entry
+
+    # actions maps each name to its first declaration; declared_actions keeps every
+    # one, repeats included. State actions are named State.Action.
+    for child in (child for section in section_nodes(parts, 'Actions') for child in section.children):
+        model['declared_actions'].append(parse_action(child))
+    for state_name, child in state_actions(parts):
+        action = parse_action(child)
+        action['name'] = f"{state_name}.{action['name']}"
+        model['declared_actions'].append(action)
+    for action in model['declared_actions']:
+        model['actions'].setdefault(action['name'], action)
+    return model
+
+
+def parse_business_class(content, name=None):
+    """Parse business class source text into a model dict"""
+    return build_business_class(name, parse_outline(content))
+
+
+def load_business_class(file_path):
+    """Read and parse one business class file"""
+    content = read_text(file_path)
+    return parse_business_class(content, os.path.splitext(os.path.basename(file_path))[0])
+
+
+def load_business_classes(directory, metrics=None):
+    """Load every business class in directory (or a .lplsnap snapshot) into {class name: model}
+
+    With a ScanMetrics, file reads, outline parsing and model building are
+    timed as the read / tokenize / analyze phases.
+    """
+    if directory.endswith('.lplsnap'):
+        from lpl_snapshot import load_snapshot
+        return load_snapshot(directory).business_classes()
+    if metrics is None:
+        from scan_metrics import ScanMetrics
+        metrics = ScanMetrics('business classes', interval=float('inf'))
+    models = {}
+    paths = [path for _, path in iter_business_class_files(directory)]
+    if metrics.total_files is None:
+        metrics.total_files = len(paths)
+    for path, content, error in metrics.timed(prefetch(paths), 'read'):
+        with metrics.file(path, len(content) if content else 0):
+            try:
+                if error is not None:
+                    raise error
+                with metrics.phase('tokenize'):
+                    roots = parse_outline(content)
+                if definition_root(node.text for node in roots) is None:
+                    continue
+                with metrics.phase('analyze'):
+                    model = build_business_class(os.path.splitext(os.path.basename(path))[0], roots)
+            except Exception as e:
+                print(f"Error processing {os.path.basename(path)}: {e}")
+                metrics.add_error()
+                continue
+        models[model['name']] = model
+    return models
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Context-aware completion of LPL identifiers.
+
+Business class names, key fields and the fields, relations and actions of
+every business class are taken from the language server's corpus index and
+kept in compact prefix tries. The text before the cursor picks the scope:
+
+    business class is Pay|         business classes
+    invoke Rel|                    actions of the current class
+    invoke Create Ven|             relations of the current class, then classes
+    VendorRel.VendorGroupRel.Na|   members of the class the relation path leads to
+    each.Na|                       members of the class the enclosing `for each` iterates
+    Amou|                          members of the current class, key fields, classes
+
+Members are fields, relations and sets; actions are only offered after
+`invoke`. Dotted paths are resolved one relation at a time and every
+resolved prefix is memoized, so typing further along a path only resolves
+the new part. Other instance prefixes (old., invoked., related.) name
+runtime instances whose class the text does not tell, so they get no
+completions.
+Candidates are ranked by the number of corpus files that use the name.
+
+Usage:
+    python lpl_completion.py PayablesInvoice "invoke Rel" [snapshot file or References dir]
+    python lpl_completion.py bench [snapshot file or References dir]
+"""
+
+import random
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from heapq import nsmallest
+
+from lpl_language_server import INSTANCE_PREFIXES, SNAPSHOT_FILE, format_percentiles, load_index, log
+
+# Trie nodes with more keys than this keep their best entries precomputed
+SMALL_NODE = 64
+TOP_RANKED = 50
+
+BUSINESS_CLASS_CONTEXT = re.compile(r'business\s+class\s+is\s+(\w*)$')
+PATH_CONTEXT = re.compile(r'([A-Za-z_][\w.]*)\.(\w*)$')
+INVOKE_TARGET_CONTEXT = re.compile(r'\binvoke\s+[\w.]+\s+(?:first\s+|last\s+)?(\w*)$')
+INVOKE_CONTEXT = re.compile(r'\binvoke\s+(\w*)$')
+WORD_CONTEXT = re.compile(r'(\w*)$')
+
+# LSP CompletionItemKind: Method 2, Field 5, Variable 6, Class 7, Interface 8, Module 9,
+# Property 10, Enum 13, Reference 18
+COMPLETION_KINDS = {'business class': 7, 'key field': 13, 'relation': 18, 'action': 2, 'state action': 2,
+                    'set': 9, 'local': 6, 'derived': 10, 'condition': 8}
+
+
+class PrefixTrie:
+    """Compact prefix trie over (key, label, kind, weight) items, best weight first
+
+    Keys are kept sorted and casefolded, so the subtree below any prefix is
+    one contiguous range found by binary search. The trie nodes are the
+    longest-common-prefix intervals of neighbouring keys; each node holding
+    more than SMALL_NODE keys stores its TOP_RANKED best entries, so a short
+    prefix never ranks its whole subtree.
+    """
+
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda item: (item[0].casefold(), item[0]))
+        self.keys = [item[0].casefold() for item in self.items]
+        order = sorted(range(len(self.items)),
+                       key=lambda position: (-self.items[position][3], len(self.items[position][1]),
+                                             self.items[position][1]))
+        self.order = array('I', order)               # rank -> position
+        self.ranks = array('I', bytes(4 * len(order)))  # position -> rank
+        for rank, position in enumerate(order):
+            self.ranks[position] = rank
+        self.best = {}                               # (first, stop) -> best ranks of a large node
+        self._rank_nodes()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _rank_nodes(self):
+        """Walk the common-prefix intervals bottom-up, ranking every large node from its children"""
+        keys, count = self.keys, len(self.keys)
+        stack = [[0, 0, []]]   # [prefix length, first position, large children]
+        for stop in range(1, count + 1):
+            shared = common_prefix_length(keys[stop - 1], keys[stop]) if stop < count else 0
+            first, closed = stop - 1, None
+            while shared < stack[-1][0]:
+                _, first, children = stack.pop()
+                closed = self._rank_node(first, stop, children)
+                # A closed node belongs to the node below it unless a deeper one opens here
+                if closed and shared <= stack[-1][0]:
+                    stack[-1][2].append(closed)
+                    closed = None
+            if shared > stack[-1][0]:
+                stack.append([shared, first, [closed] if closed else []])
+        self._rank_node(0, count, stack[0][2])
+
+    def _rank_node(self, first, stop, children):
+        if stop - first <= SMALL_NODE:
+            return None
+        candidates, position = [], first
+        for child_first, child_stop in children:
+            candidates.extend(self.ranks[position:child_first])
+            candidates.extend(self.best[(child_first, child_stop)])
+            position = child_stop
+        candidates.extend(self.ranks[position:stop])
+        self.best[(first, stop)] = array('I', nsmallest(TOP_RANKED, candidates))
+        return first, stop
+
+    def complete(self, prefix, limit=TOP_RANKED):
+        """Return (best items whose key starts with prefix, whether more matched)"""
+        key = prefix.casefold()
+        first = bisect_left(self.keys, key)
+        stop = bisect_left(self.keys, key + '\U0010ffff', first)
+        if stop - first > SMALL_NODE:
+            ranked = self.best[(first, stop)][:limit]
+        else:
+            ranked = sorted(self.ranks[first:stop])[:limit]
+        return [self.items[self.order[rank]] for rank in ranked], stop - first > len(ranked)
+
+
+def common_prefix_length(left, right):
+    length = min(len(left), len(right))
+    for position in range(length):
+        if left[position] != right[position]:
+            return position
+    return length
+
+
+class CompletionEngine:
+    """Completions for a line prefix typed in a business class"""
+
+    def __init__(self, index):
+        self.index = index
+        self._paths = {}       # (class, dotted path, each class) -> class it leads to
+        self._documents = {}   # open document uri -> (member kinds, member tries)
+        self._weights = {}
+        self.classes = PrefixTrie((name, name, 'business class', self.weight(name)) for name in index.classes)
+        self.key_fields = PrefixTrie((name, name, 'key field', self.weight(name))
+                                     for _, name, kind, _, _ in index.symbols if kind == 'KeyField')
+        self.tries = self.member_tries(index.kinds)
+
+    def member_tries(self, kinds_by_class):
+        """Member (no actions), relation and action tries keyed Class.member"""
+        members, relations, actions = [], [], {}
+        for class_name, kinds in kinds_by_class.items():
+            for member, kind in kinds.items():
+                item = (f"{class_name}.{member}", member, kind, self.weight(member))
+                if kind == 'state action':
+                    # invoke names the action alone, whichever state defines it
+                    action = member.rpartition('.')[2]
+                    actions.setdefault(f"{class_name}.{action}", (f"{class_name}.{action}", action, kind,
+                                                                   self.weight(action)))
+                    continue
+                if kind == 'action':
+                    actions[item[0]] = item
+                    continue
+                members.append(item)
+                if kind == 'relation':
+                    relations.append(item)
+        return {'members': PrefixTrie(members), 'relations': PrefixTrie(relations),
+                'actions': PrefixTrie(actions.values())}
+
+    def weight(self, name):
+        """Number of corpus files mentioning the identifier (its last dotted part)"""
+        word = name.rpartition('.')[2]
+        if word not in self._weights:
+            symbol = self.index.snapshot.symbols.lookup(word)
+            self._weights[word] = len(self.index.files_by_symbol.get(symbol, ())) if symbol is not None else 0
+        return self._weights[word]
+
+    def invalidate(self):
+        """Forget resolved paths after an open document changes its relations"""
+        self._paths.clear()
+        for uri in set(self._documents) - set(self.index.documents):
+            del self._documents[uri]
+
+    def resolve_path(self, class_name, path, each_class=None):
+        """Class a dotted relation path leads to from class_name, or None
+
+        each_class is the class iterated by the enclosing `for each`, when known.
+        """
+        key = (class_name, path, each_class)
+        if key not in self._paths:
+            parent, _, part = path.rpartition('.')
+            if not parent and part == 'each':
+                found = each_class
+            elif not parent and part in INSTANCE_PREFIXES:
+                found = None
+            else:
+                current = self.resolve_path(class_name, parent, each_class) if parent else class_name
+                _, _, relations = self.index.class_scope(current) if current else (None, {}, {})
+                found = relations.get(part)
+                if found is None and not parent and part in self.index.classes:
+                    found = part
+            self._paths[key] = found
+        return self._paths[key]
+
+    def class_members(self, scope, class_name, prefix, limit):
+        """Members of one class, from its open document when it is being edited"""
+        source, _, _ = self.index.class_scope(class_name)
+        tries = self.tries
+        if source is not None and not isinstance(source, int):
+            # Rebuilt only when the document's members change, not on every keystroke
+            cached = self._documents.get(source.uri)
+            if cached is None or cached[0] != source.kinds:
+                kinds = dict(source.kinds)
+                cached = self._documents[source.uri] = kinds, self.member_tries({class_name: kinds})
+            tries = cached[1]
+        return tries[scope].complete(f"{class_name}.{prefix}", limit)
+
+    def complete(self, class_name, line, limit=TOP_RANKED, each_class=None):
+        """Return ([(label, kind, detail)], whether the list is incomplete) for the text before the cursor"""
+        groups = []
+        match = BUSINESS_CLASS_CONTEXT.search(line)
+        if match:
+            groups.append(self.classes.complete(match.group(1), limit))
+        elif PATH_CONTEXT.search(line):
+            match = PATH_CONTEXT.search(line)
+            target = self.resolve_path(class_name, match.group(1), each_class)
+            if target:
+                groups.append(self.class_members('members', target, match.group(2), limit))
+        elif INVOKE_TARGET_CONTEXT.search(line):
+            prefix = INVOKE_TARGET_CONTEXT.search(line).group(1)
+            groups.append(self.class_members('relations', class_name, prefix, limit))
+            groups.append(self.classes.complete(prefix, limit))
+        elif INVOKE_CONTEXT.search(line):
+            prefix = INVOKE_CONTEXT.search(line).group(1)
+            groups.append(self.class_members('actions', class_name, prefix, limit))
+        else:
+            prefix = WORD_CONTEXT.search(line).group(1)
+            groups.append(self.class_members('members', class_name, prefix, limit))
+            groups.append(self.key_fields.complete(prefix, limit))
+            groups.append(self.classes.complete(prefix, limit))
+        results, seen, incomplete = [], set(), False
+        # Groups are in scope order: the closest scope's best matches come first
+        for items, more in groups:
+            incomplete = incomplete or more
+            for key, label, kind, _ in items:
+                if label not in seen:
+                    seen.add(label)
+                    owner = key[:-len(label) - 1]
+                    results.append((label, kind, f"{kind} of {owner}" if owner else kind))
+        return results[:limit], incomplete or len(results) > limit
+
+
+def benchmark(engine, samples=500):
+    """Time completions in every context across a sample of business classes"""
+    random.seed(0)
+    index = engine.index
+    classes = random.sample(sorted(index.classes), min(samples, len(index.classes)))
+    timings = []
+    for class_name in classes:
+        relations = sorted(index.relations[class_name])
+        lines = ['', 'Am', 'business class is ', 'business class is Pay', 'invoke ', 'invoke R',
+                 'invoke Create V', 'each.', 'Company.Na']
+        if relations:
+            relation = relations[len(relations) // 2]
+            target = index.relations[class_name][relation]
+            lines += [f"{relation}.", f"{relation}.{relation[:1]}"]
+            deeper = sorted(index.relations.get(target, ()))
+            if deeper:
+                lines.append(f"{relation}.{deeper[0]}.")
+        for line in lines:
+            start = time.perf_counter()
+            engine.complete(class_name, line)
+            timings.append(time.perf_counter() - start)
+    print(f"Completion on {len(classes)} business classes ({len(timings):,} requests): "
+          f"{format_percentiles(timings)}")
+
+
+def main():
+    arguments = sys.argv[1:]
+    bench = bool(arguments) and arguments[0] == 'bench'
+    if bench:
+        source = arguments[1] if len(arguments) > 1 else SNAPSHOT_FILE
+    elif len(arguments) >= 2:
+        source = arguments[2] if len(arguments) > 2 else SNAPSHOT_FILE
+    else:
+        print(__doc__)
+        return
+    start = time.perf_counter()
+    engine = CompletionEngine(load_index(source))
+    log(f"Built completion tries ({len(engine.classes):,} classes, {len(engine.key_fields):,} key fields, "
+        f"{len(engine.tries['members']):,} members, {len(engine.tries['actions']):,} actions) in "
+        f"{time.perf_counter() - start:.1f}s")
+    if bench:
+        benchmark(engine)
+        return
+    class_name, line = arguments[0], arguments[1]
+    start = time.perf_counter()
+    results, incomplete = engine.complete(class_name, line)
+    elapsed = (time.perf_counter() - start) * 1000
+    for label, kind, detail in results:
+        print(f"  {label}  ({detail})")
+    print(f"{len(results)} completions{' (more available)' if incomplete else ''} in {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
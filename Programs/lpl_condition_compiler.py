@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+"""
+Compile LPL boolean conditions (Conditions "when (...)" and Instance Selection
+"where (...)") into Python closures or vectorized NumPy masks so they can be
+evaluated against staged data rows, e.g. the PORI/PORL receipt CSVs in Inputs.
+"""
+
+import csv
+import fnmatch
+import re
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<number>\d+(?:\.\d+)?(?![A-Za-z_]))
+  | (?P<op><=|>=|!=|<>|==|=|<|>|\(|\)|!|\+|-|\*|/|,)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*(?:\(\w+\))?(?:\.[A-Za-z0-9_]+(?:\(\w*\))?)*)
+''', re.VERBOSE)
+
+KEYWORDS = {'and', 'or', 'not', 'entered', 'exists', 'true', 'false', 'blank', 'any', 'all', 'first',
+            'set', 'within', 'old', 'exist', 'like', 'contains', 'last', 'current'}
+COMPARISONS = {'=', '==', '!=', '<>', '<', '>', '<=', '>=', 'like', 'contains'}
+# Staged boolean spellings; any other entered non-numeric value is true
+FALSE_VALUES = {'', '0', 'false', 'n', 'no'}
+TRUE_VALUES = {'1', 'true', 'y', 'yes'}
+
+
+# Blank, zero and non-numeric operands that --check runs through both evaluators
+ARITHMETIC_CHECK_ROWS = [
+    {'a': '1', 'b': '', 'c': 'x', 'd': '3'},
+    {'a': '3', 'b': '0', 'c': '1.5', 'd': '3'},
+    {'a': 'x', 'b': '1.5', 'c': '', 'd': '-3'},
+    {'a': '', 'b': '', 'c': '0', 'd': ''},
+]
+ARITHMETIC_CHECKS = ['a + b > 1', 'a + b = 0', 'a + c > 1', 'd / b > 1', 'd / b = 0', 'd / b entered',
+                     'd / b != 2', 'a - b * c < 1', '(a + b) / d >= 1', 'a + b like "3*"', 'd * 2 + a <= 7']
+
+
+class ConditionSyntaxError(ValueError):
+    """Raised when an LPL condition cannot be parsed"""
+
+
+def tokenize(text):
+    """Split an LPL condition into (kind, value) tokens"""
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match:
+            raise ConditionSyntaxError(f"Unexpected character {text[position]!r} at {position} in: {text}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ('ws', 'comment'):
+            continue
+        if kind == 'string':
+            value = value[1:-1]
+        elif kind == 'number':
+            value = float(value) if '.' in value else int(value)
+        elif kind == 'name' and value.lower() in KEYWORDS:
+            kind = 'keyword'
+            value = {'exist': 'exists'}.get(value.lower(), value.lower())
+        tokens.append((kind, value))
+    tokens.append(('end', None))
+    return tokens
+
+
+def strip_clause(text):
+    """Remove a leading "where"/"when" keyword and collapse continuation lines"""
+    text = ' '.join(line.split('//')[0].strip() for line in text.strip().splitlines())
+    return re.sub(r'^(?:where|when)\s*', '', text.strip())
+
+
+class Parser:
+    """Recursive descent parser producing a tuple-based AST"""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+
+    def peek(self, offset=0):
+        return self.tokens[self.index + offset]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.index += 1
+            return True
+        return False
+
+    def expect(self, kind, value=None):
+        if not self.accept(kind, value):
+            raise ConditionSyntaxError(f"Expected {value or kind} but found {self.peek()[1]!r} in: {self.text}")
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek()[0] != 'end':
+            raise ConditionSyntaxError(f"Unexpected {self.peek()[1]!r} in: {self.text}")
+        return node
+
+    def parse_or(self):
+        items = [self.parse_and()]
+        while self.accept('keyword', 'or'):
+            items.append(self.parse_and())
+        return items[0] if len(items) == 1 else ('or', items)
+
+    def parse_and(self):
+        items = [self.parse_not()]
+        while self.accept('keyword', 'and'):
+            items.append(self.parse_not())
+        return items[0] if len(items) == 1 else ('and', items)
+
+    def parse_not(self):
+        if self.accept('keyword', 'not') or self.accept('op', '!'):
+            return ('not', self.parse_not())
+        return self.parse_predicate()
+
+    def parse_predicate(self):
+        left = self.parse_sum()
+        negated = False
+        if self.peek() in (('keyword', 'not'), ('op', '!')) and (
+                self.peek(1)[1] in ('entered', 'exists', 'within') or self.peek(1)[1] in COMPARISONS):
+            self.advance()
+            negated = True
+        token = self.peek()
+        if token[0] in ('op', 'keyword') and token[1] in COMPARISONS:
+            self.advance()
+            op = {'==': '=', '<>': '!='}.get(token[1], token[1])
+            node = ('compare', op, left, self.parse_sum())
+            return ('not', node) if negated else node
+        if self.accept('keyword', 'within'):
+            node = ('within', left, self.parse_sum())
+            return ('not', node) if negated else node
+        self.accept('keyword', 'set')
+        if self.accept('keyword', 'entered'):
+            node = ('entered', left)
+        elif self.accept('keyword', 'exists'):
+            node = ('exists', left)
+        else:
+            return left if left[0] != 'field' else ('truth', left)
+        return ('not', node) if negated else node
+
+    def parse_sum(self):
+        node = self.parse_product()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            node = ('arith', self.advance()[1], node, self.parse_product())
+        return node
+
+    def parse_product(self):
+        node = self.parse_atom()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            node = ('arith', self.advance()[1], node, self.parse_atom())
+        return node
+
+    def parse_atom(self):
+        kind, value = self.advance()
+        if kind == 'op' and value == '(':
+            node = self.parse_or()
+            self.expect('op', ')')
+            return node
+        if kind == 'op' and value == '-' and self.peek()[0] == 'number':
+            return ('literal', -self.advance()[1])
+        if kind in ('string', 'number'):
+            return ('literal', value)
+        if kind == 'keyword' and value in ('true', 'false'):
+            return ('literal', value == 'true')
+        if kind == 'keyword' and value == 'blank':
+            return ('literal', '')
+        if kind == 'keyword' and value in ('any', 'all', 'first', 'last', 'old'):
+            # Quantified relation paths and "old" images evaluate against the staged row value
+            return self.parse_atom()
+        if kind == 'keyword' and value == 'current':
+            # "current date", "current timestamp", "current corporate date" come from params
+            words = ['current']
+            while self.peek()[0] == 'name' and self.peek()[1].lower() in ('corporate', 'date', 'timestamp', 'time'):
+                words.append(self.advance()[1].lower())
+            return ('field', ' '.join(words))
+        if kind == 'name':
+            return ('field', value)
+        raise ConditionSyntaxError(f"Unexpected {value!r} in: {self.text}")
+
+
+def parse_condition(text):
+    """Parse an LPL condition into an AST"""
+    return Parser(strip_clause(text)).parse()
+
+
+def referenced_fields(node, fields=None):
+    """Collect every field path referenced by an AST"""
+    if fields is None:
+        fields = []
+    if node[0] == 'field':
+        if node[1] not in fields:
+            fields.append(node[1])
+    elif node[0] in ('and', 'or'):
+        for item in node[1]:
+            referenced_fields(item, fields)
+    elif node[0] in ('not', 'entered', 'exists', 'truth'):
+        referenced_fields(node[1], fields)
+    elif node[0] in ('compare', 'arith'):
+        referenced_fields(node[2], fields)
+        referenced_fields(node[3], fields)
+    elif node[0] == 'within':
+        referenced_fields(node[1], fields)
+        referenced_fields(node[2], fields)
+    return fields
+
+
+def build_column_map(columns):
+    """Map lowercase field paths and trailing path segments to column names"""
+    column_map = {}
+    for column in columns:
+        key = column.strip().lower()
+        column_map.setdefault(key, column)
+        column_map.setdefault(key.split('.')[-1], column)
+    return column_map
+
+
+def resolve_column(path, column_map):
+    """Find the staged column for an LPL field path, or None"""
+    key = path.lower()
+    if key in column_map:
+        return column_map[key]
+    # Try progressively shorter suffixes so Rel.Field finds a "field" column
+    parts = key.split('.')
+    for start in range(1, len(parts)):
+        suffix = '.'.join(parts[start:])
+        if suffix in column_map:
+            return column_map[suffix]
+    return None
+
+
+def to_number(value):
+    """Convert a staged value to a number when possible"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_entered(value):
+    """LPL "entered": not blank and, for numerics, not zero"""
+    if value is None or value is False:
+        return False
+    if isinstance(value, str):
+        value = value.strip()
+        if value == '':
+            return False
+        number = to_number(value)
+        return number != 0 if number is not None else True
+    return value != 0
+
+
+def is_blank(value):
+    return value is None or (isinstance(value, str) and value.strip() == '')
+
+
+def is_true(value):
+    """Truthiness of a field or condition reference: false/n/no/0/blank are false"""
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in FALSE_VALUES or text in TRUE_VALUES:
+            return text in TRUE_VALUES
+        number = to_number(text)
+        return number != 0 if number is not None else True
+    if value is None:
+        return False
+    return bool(value)
+
+
+def compare_values(op, left, right):
+    """Compare two staged values the way LPL would (numeric when both sides are numeric)"""
+    if isinstance(left, bool) or isinstance(right, bool):
+        left, right = is_true(left), is_true(right)
+    else:
+        left_number, right_number = to_number(left), to_number(right)
+        # A blank compared with a number is zero, as an unentered numeric field is
+        if left_number is None and right_number is not None and is_blank(left):
+            left_number = 0
+        elif right_number is None and left_number is not None and is_blank(right):
+            right_number = 0
+        if left_number is not None and right_number is not None:
+            left, right = left_number, right_number
+        else:
+            left = '' if left is None else str(left).strip()
+            right = '' if right is None else str(right).strip()
+    if op == '=':
+        return left == right
+    if op == '!=':
+        return left != right
+    if op == 'like':
+        return fnmatch.fnmatchcase(str(left), str(right))
+    if op == 'contains':
+        return str(right) in str(left)
+    try:
+        if op == '<':
+            return left < right
+        if op == '>':
+            return left > right
+        if op == '<=':
+            return left <= right
+        return left >= right
+    except TypeError:
+        return False
+
+
+def arith_operand(value):
+    """A staged value as an arithmetic operand: blank is zero, non-numeric text has no value"""
+    return 0 if is_blank(value) else to_number(value)
+
+
+def arith_values(op, left, right):
+    """Evaluate +, -, *, / on staged values; no value (None) for non-numeric operands or division by zero"""
+    left_number, right_number = arith_operand(left), arith_operand(right)
+    if left_number is None or right_number is None:
+        return None
+    if op == '+':
+        return left_number + right_number
+    if op == '-':
+        return left_number - right_number
+    if op == '*':
+        return left_number * right_number
+    return left_number / right_number if right_number else None
+
+
+def range_bounds(node, compile_value):
+    """Compile the Begin/End members of a range operand used with within"""
+    if node[0] == 'field':
+        return compile_value(('field', node[1] + '.Begin')), compile_value(('field', node[1] + '.End'))
+    return compile_value(node), compile_value(node)
+
+
+def within_range(value, begin, end):
+    """LPL within: inside an inclusive range, open-ended when a bound is blank"""
+    if not is_entered(value):
+        return False
+    if is_entered(begin) and not compare_values('>=', value, begin):
+        return False
+    return not is_entered(end) or compare_values('<=', value, end)
+
+
+class CompiledCondition:
+    """A condition compiled against a fixed set of columns"""
+
+    def __init__(self, text, node, predicate, value_columns, unresolved):
+        self.text = text
+        self.node = node
+        self.predicate = predicate
+        self.value_columns = value_columns
+        self.unresolved = unresolved
+
+    def __call__(self, row):
+        return self.predicate(row)
+
+    def filter(self, rows):
+        """Yield the rows the condition selects"""
+        predicate = self.predicate
+        for row in rows:
+            if predicate(row):
+                yield row
+
+    def count(self, rows):
+        """Count the rows the condition selects"""
+        predicate = self.predicate
+        return sum(1 for row in rows if predicate(row))
+
+
+def compile_condition(text, columns, params=None, conditions=None):
+    """Compile a condition into a row predicate (row is a dict keyed by column name).
+
+    params supplies Prm*/actor/config values; conditions maps other condition
+    names of the class to their text so references are compiled inline.
+    """
+    params = {key.lower(): value for key, value in (params or {}).items()}
+    conditions = {key.lower(): value for key, value in (conditions or {}).items()}
+    column_map = build_column_map(columns)
+    unresolved = []
+    compiled_conditions = {}
+
+    def compile_value(node):
+        kind = node[0]
+        if kind == 'literal':
+            value = node[1]
+            return lambda row: value
+        if kind == 'field':
+            path = node[1]
+            if path.lower() in params:
+                value = params[path.lower()]
+                return lambda row: value
+            if path.lower() in conditions:
+                predicate = compile_named(path.lower())
+                return lambda row: predicate(row)
+            column = resolve_column(path, column_map)
+            if column is None:
+                if path not in unresolved:
+                    unresolved.append(path)
+                return lambda row: None
+            return lambda row: row.get(column)
+        if kind == 'arith':
+            op, left, right = node[1], compile_value(node[2]), compile_value(node[3])
+            return lambda row: arith_values(op, left(row), right(row))
+        predicate = compile_bool(node)
+        return lambda row: predicate(row)
+
+    def compile_named(name):
+        if name not in compiled_conditions:
+            # Placeholder guards against conditions that reference each other
+            compiled_conditions[name] = lambda row: False
+            inner = compile_bool(parse_condition(conditions[name]))
+            compiled_conditions[name] = inner
+        return compiled_conditions[name]
+
+    def compile_bool(node):
+        kind = node[0]
+        if kind == 'and':
+            items = [compile_bool(item) for item in node[1]]
+            return lambda row: all(item(row) for item in items)
+        if kind == 'or':
+            items = [compile_bool(item) for item in node[1]]
+            return lambda row: any(item(row) for item in items)
+        if kind == 'not':
+            inner = compile_bool(node[1])
+            return lambda row: not inner(row)
+        if kind == 'compare':
+            op, left, right = node[1], compile_value(node[2]), compile_value(node[3])
+            return lambda row: compare_values(op, left(row), right(row))
+        if kind in ('entered', 'exists'):
+            value = compile_value(node[1])
+            return lambda row: is_entered(value(row))
+        if kind == 'within':
+            value, begin, end = compile_value(node[1]), *range_bounds(node[2], compile_value)
+            return lambda row: within_range(value(row), begin(row), end(row))
+        value = compile_value(node[1] if kind == 'truth' else node)
+        return lambda row: is_true(value(row))
+
+    node = parse_condition(text)
+    predicate = compile_bool(node)
+    value_columns = [resolve_column(path, column_map) for path in referenced_fields(node)]
+    return CompiledCondition(text, node, predicate, [c for c in value_columns if c], unresolved)
+
+
+def compile_mask(text, table, params=None, conditions=None):
+    """Evaluate a condition over a column table (dict of column -> sequence) as a NumPy boolean mask"""
+    if np is None:
+        raise ImportError("numpy is required for vectorized masks; use compile_condition for row-wise evaluation")
+    params = {key.lower(): value for key, value in (params or {}).items()}
+    conditions = {key.lower(): value for key, value in (conditions or {}).items()}
+    column_map = build_column_map(table.keys())
+    length = len(next(iter(table.values()))) if table else 0
+    arrays = {}
+    numeric_cache = {}
+    evaluating = set()
+
+    def column_array(column):
+        if column not in arrays:
+            arrays[column] = np.asarray(table[column], dtype=object)
+        return arrays[column]
+
+    def numeric(values):
+        key = id(values)
+        if key not in numeric_cache:
+            result = np.full(length, np.nan)
+            for index, value in enumerate(values):
+                number = to_number(value)
+                if number is not None:
+                    result[index] = number
+            numeric_cache[key] = (values, result)
+        return numeric_cache[key][1]
+
+    def value_of(node):
+        kind = node[0]
+        if kind == 'literal':
+            return node[1]
+        if kind == 'field':
+            path = node[1].lower()
+            if path in params:
+                return params[path]
+            if path in conditions:
+                return named_mask(path)
+            column = resolve_column(node[1], column_map)
+            return column_array(column) if column is not None else np.full(length, None, dtype=object)
+        if kind == 'arith':
+            left, right = value_of(node[2]), value_of(node[3])
+            if not isinstance(left, np.ndarray) and not isinstance(right, np.ndarray):
+                return arith_values(node[1], left, right)
+            left, right = arith_side(left), arith_side(right)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}[node[1]](left, right)
+            if node[1] == '/':
+                result = np.where(np.equal(right, 0), np.nan, result)
+            # Rows without a value become None, as arith_values returns for the row predicate
+            values = np.asarray(result, dtype=float).astype(object)
+            values[np.isnan(result)] = None
+            return values
+        return mask_of(node)
+
+    def numeric_side(value):
+        if isinstance(value, np.ndarray):
+            return value if value.dtype != object else numeric(value)
+        number = to_number(value)
+        return np.nan if number is None else number
+
+    def arith_side(value):
+        if not isinstance(value, np.ndarray):
+            number = arith_operand(value)
+            return np.nan if number is None else number
+        if value.dtype != object:
+            return value.astype(float)
+        blanks = np.fromiter((is_blank(item) for item in value), dtype=bool, count=length)
+        return np.where(blanks, 0.0, numeric(value))
+
+    def named_mask(name):
+        if name in evaluating:
+            return np.zeros(length, dtype=bool)
+        evaluating.add(name)
+        try:
+            return mask_of(parse_condition(conditions[name]))
+        finally:
+            evaluating.discard(name)
+
+    def entered_mask(value):
+        if isinstance(value, np.ndarray):
+            if value.dtype == bool:
+                return value
+            return np.fromiter((is_entered(item) for item in value), dtype=bool, count=length)
+        return np.full(length, is_entered(value))
+
+    def truth_mask(value):
+        if isinstance(value, np.ndarray):
+            if value.dtype == bool:
+                return value
+            return np.fromiter((is_true(item) for item in value), dtype=bool, count=length)
+        return np.full(length, is_true(value))
+
+    def compare_mask(op, left, right):
+        left_is_array, right_is_array = isinstance(left, np.ndarray), isinstance(right, np.ndarray)
+        if not left_is_array and not right_is_array:
+            return np.full(length, compare_values(op, left, right))
+        scalar = right if left_is_array and not right_is_array else left if not left_is_array else None
+        if op not in ('like', 'contains') and scalar is not None and to_number(scalar) is not None and not isinstance(scalar, bool):
+            items = left if left_is_array else right
+            numbers = numeric_side(items)
+            with np.errstate(invalid='ignore'):
+                result = {'=': np.equal, '!=': np.not_equal, '<': np.less, '>': np.greater,
+                          '<=': np.less_equal, '>=': np.greater_equal}[op](
+                    numbers if left_is_array else numeric_side(left), numbers if right_is_array else numeric_side(right))
+            # Blank and non-numeric rows follow compare_values, like the row predicate
+            for index in np.flatnonzero(np.isnan(numbers)):
+                result[index] = compare_values(op, left[index] if left_is_array else left,
+                                               right[index] if right_is_array else right)
+            return result
+        left_items = left if left_is_array else [left] * length
+        right_items = right if right_is_array else [right] * length
+        return np.fromiter((compare_values(op, a, b) for a, b in zip(left_items, right_items)), dtype=bool, count=length)
+
+    def mask_of(node):
+        kind = node[0]
+        if kind == 'and':
+            result = np.ones(length, dtype=bool)
+            for item in node[1]:
+                result &= mask_of(item)
+            return result
+        if kind == 'or':
+            result = np.zeros(length, dtype=bool)
+            for item in node[1]:
+                result |= mask_of(item)
+            return result
+        if kind == 'not':
+            return ~mask_of(node[1])
+        if kind == 'compare':
+            return compare_mask(node[1], value_of(node[2]), value_of(node[3]))
+        if kind in ('entered', 'exists'):
+            return entered_mask(value_of(node[1]))
+        if kind == 'within':
+            # Same rules as within_range: a blank bound leaves that side of the range open
+            value = value_of(node[1])
+            begin, end = range_bounds(node[2], value_of)
+            return entered_mask(value) & (~entered_mask(begin) | compare_mask('>=', value, begin)) \
+                & (~entered_mask(end) | compare_mask('<=', value, end))
+        return truth_mask(value_of(node[1] if kind == 'truth' else node))
+
+    return mask_of(parse_condition(text))
+
+
+def read_staged_rows(csv_path, delimiter='|'):
+    """Read a staged interface CSV (pipe-delimited like the PORI/PORL files) as dict rows"""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file, delimiter=delimiter)
+        return reader.fieldnames or [], list(reader)
+
+
+def rows_to_table(columns, rows):
+    """Pivot dict rows into a column table for compile_mask"""
+    return {column: [row.get(column) for row in rows] for column in columns}
+
+
+def print_selection(condition, csv_path, params=None, limit=20):
+    """Filter a staged file with a condition and print the selected rows"""
+    columns, rows = read_staged_rows(csv_path)
+    compiled = compile_condition(condition, columns, params=params)
+
+    print(f"Condition: {strip_clause(condition)}")
+    print(f"Columns used: {', '.join(compiled.value_columns) or 'none'}")
+    if compiled.unresolved:
+        print(f"Unresolved fields (treated as blank): {', '.join(compiled.unresolved)}")
+
+    if np is not None:
+        mask = compile_mask(condition, rows_to_table(columns, rows), params=params)
+        selected = [row for row, keep in zip(rows, mask) if keep]
+    else:
+        selected = list(compiled.filter(rows))
+
+    print(f"\nSelected {len(selected):,} of {len(rows):,} rows")
+    for row in selected[:limit]:
+        print("  " + " | ".join(str(row.get(column, '')) for column in columns))
+    if len(selected) > limit:
+        print(f"  ... {len(selected) - limit:,} more")
+    return selected
+
+
+def check_rows(condition, columns, rows, params=None):
+    """Evaluate a condition with both the row predicate and the NumPy mask; return rows where they differ"""
+    compiled = compile_condition(condition, columns, params=params)
+    mask = compile_mask(condition, rows_to_table(columns, rows), params=params)
+    return [number for number, (row, keep) in enumerate(zip(rows, mask)) if bool(keep) != compiled(row)]
+
+
+def check_selection(condition, csv_path, params=None):
+    """check_rows over a staged file"""
+    columns, rows = read_staged_rows(csv_path)
+    return check_rows(condition, columns, rows, params)
+
+
+def check_arithmetic():
+    """Run ARITHMETIC_CHECKS through check_rows; return {condition: differing rows}"""
+    columns = list(ARITHMETIC_CHECK_ROWS[0])
+    return {condition: check_rows(condition, columns, ARITHMETIC_CHECK_ROWS)
+            for condition in ARITHMETIC_CHECKS}
+
+
+def main():
+    if len(sys.argv) > 3 and sys.argv[1] == '--check':
+        params = dict(arg.split('=', 1) for arg in sys.argv[4:] if '=' in arg)
+        differing = check_selection(sys.argv[2], sys.argv[3], params)
+        print(f"Row predicate and NumPy mask differ on {len(differing):,} rows"
+              + (f": {', '.join(str(number) for number in differing[:20])}" if differing else ''))
+        for condition, rows in check_arithmetic().items():
+            if rows:
+                print(f"  Arithmetic check {condition!r} differs on rows {', '.join(str(number) for number in rows)}")
+        return
+    if len(sys.argv) < 3:
+        print('Usage: python lpl_condition_compiler.py [--check] "<condition>" <staged.csv> [Param=Value ...]')
+        print('Example: python lpl_condition_compiler.py "where (RunGroup = \\"SANR\\" and Company = 3020)" '
+              '"C:\\Visual Basic Code\\LPL Library\\Inputs\\PORI_M4NS_1234_20250814.csv"')
+        return
+
+    params = dict(arg.split('=', 1) for arg in sys.argv[3:] if '=' in arg)
+    print_selection(sys.argv[1], sys.argv[2], params)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Single source of the LPL Library folder locations.
+
+Every path defaults to the standard checkout under
+"C:\\Visual Basic Code\\LPL Library". Set LPL_LIBRARY_DIR to use another
+checkout, or LPL_REFERENCES_DIR / LPL_OUTPUTS_DIR to move just those folders
+(e.g. a References.lplpack file or a scratch output folder).
+"""
+
+import os
+
+LIBRARY_DIR = os.environ.get('LPL_LIBRARY_DIR', r"C:\Visual Basic Code\LPL Library")
+REFERENCES_DIR = os.environ.get('LPL_REFERENCES_DIR') or os.path.join(LIBRARY_DIR, 'References')
+OUTPUTS_DIR = os.environ.get('LPL_OUTPUTS_DIR') or os.path.join(LIBRARY_DIR, 'Outputs')
+INPUTS_DIR = os.path.join(LIBRARY_DIR, 'Inputs')
+OTHERS_DIR = os.path.join(LIBRARY_DIR, 'Others')
+KNOWLEDGE_FILE = os.path.join(LIBRARY_DIR, 'Knowledge.txt')
+PACK_FILE = os.path.join(LIBRARY_DIR, 'References.lplpack')
+PDF_FILE = os.path.join(REFERENCES_DIR, 'inforlandmarkconfigurationconsolelpl.pdf')
+
+
+def reference_dir(folder):
+    """Path of a References subfolder such as 'business class' or 'key field'"""
+    return os.path.join(REFERENCES_DIR, folder)
+
+
+def output_file(name):
+    """Path of a generated file in Outputs"""
+    return os.path.join(OUTPUTS_DIR, name)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Graph helpers shared by the analyzers that build dependency or navigation
+graphs (derived field dependencies, menu reachability).
+
+Graphs are plain {node: iterable of successor nodes} mappings.
+"""
+
+
+def strongly_connected_components(edges, trivial=False):
+    """Tarjan's algorithm (iterative) returning components with more than one node or a self loop
+
+    With trivial=True every component is returned, sinks first (reverse
+    topological order of the condensed graph).
+    """
+    index_of = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    for start in list(edges):
+        if start in index_of:
+            continue
+        work = [(start, iter(edges.get(start, ())))]
+        index_of[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack.add(start)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(edges.get(child, ()))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index_of[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if trivial or len(component) > 1 or node in edges.get(node, ()):
+                    components.append(component)
+    return components
@@ -0,0 +1,822 @@
+#!/usr/bin/env python3
+"""
+LPL language server (Language Server Protocol over stdio).
+
+The corpus is loaded once, preferably from a snapshot (lpl_snapshot.py
+build), into in-memory indexes: every artifact definition (business class,
+key field, list, page, menu, form...), the members of every business class
+(fields, relations with their targets, sets, actions including state
+actions) and an identifier -> files inverted index from the snapshot's
+interned symbols. Definition, references, hover, workspace symbol and
+completion (lpl_completion.py) requests are answered from those indexes.
+An edit re-parses only the smallest outline block of the open document
+that holds it (falling back to the whole document when the edit changes
+the block's indentation or parenthesis balance), and the open document's
+members shadow the indexed copy of its class.
+
+Usage:
+    python lpl_language_server.py [snapshot file or References dir]
+    python lpl_language_server.py bench [snapshot file or References dir]
+    python lpl.py lsp [snapshot file or References dir]
+
+VS Code: point a generic LSP client extension at
+"python Programs/lpl_language_server.py Outputs/references.lplsnap" for
+the *.busclass / *.businessclass / *.field / *.list ... languages.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+from lpl_business_class import FIELD_SECTIONS, RELATION_PATTERN
+from lpl_config import REFERENCES_DIR, output_file
+from lpl_outline import definition_name, paren_balance, parse_outline, strip_comment
+from lpl_snapshot import CorpusSnapshot, SNAPSHOT_EXTENSION, SNAPSHOT_FILE, build_snapshot, flatten_outline
+
+MEMBER_SECTIONS = dict(FIELD_SECTIONS, Sets='set', Actions='action')
+DEFINITION_PATTERN = re.compile(r'([A-Za-z_][\w.]*)\s+is\s+an?\s+(\w+)')
+INVOKE_PATTERN = re.compile(r'invoke\s+(\w+(?:\.\w+)?)(?:\s+(?:first\s+|last\s+)?([\w.]+))?')
+FOR_EACH_PATTERN = re.compile(r'for\s+each\s+([\w.]+)')
+WORD_CHARACTERS = re.compile(r'[\w.]')
+# Path prefixes that name a runtime instance rather than a member
+INSTANCE_PREFIXES = ('each', 'invoked', 'related', 'old', 'first', 'last', 'result')
+
+MAX_REFERENCES = 500
+MAX_SYMBOLS = 100
+HOVER_LINES = 12
+
+
+class FlatOutline:
+    """Pre-order outline columns of one file: node texts, indents, source lines and subtree ends"""
+
+    def __init__(self, texts, indents, lines, ends, base=0):
+        self.texts = texts
+        self.indents = indents
+        self.lines = lines
+        self.ends = ends
+        self.base = base
+
+    @classmethod
+    def parse(cls, lines):
+        columns = {'indent': [], 'line': [], 'parent': [], 'end': []}
+        texts = flatten_outline(parse_outline(lines), columns, 0)
+        return cls(texts, columns['indent'], columns['line'], columns['end'])
+
+    def __len__(self):
+        return len(self.texts)
+
+    def text(self, index):
+        return self.texts[index]
+
+    def indent(self, index):
+        return self.indents[self.base + index]
+
+    def line(self, index):
+        return self.lines[self.base + index]
+
+    def end(self, index):
+        return self.ends[self.base + index] - self.base
+
+    def roots(self):
+        index = 0
+        while index < len(self.texts):
+            yield index
+            index = self.end(index)
+
+    def children(self, index):
+        child = index + 1
+        while child < self.end(index):
+            yield child
+            child = self.end(child)
+
+    def span(self, index, line_count):
+        """0-based [first, stop) source lines of a node's subtree, up to the next node"""
+        end = self.end(index)
+        return self.line(index) - 1, self.line(end) - 1 if end < len(self) else line_count
+
+    def containing(self, first, stop, line_count):
+        """Nodes whose span holds source lines [first, stop), outermost first"""
+        chain, candidates = [], self.roots()
+        while True:
+            for index in candidates:
+                start, end = self.span(index, line_count)
+                if start <= first and stop <= end:
+                    chain.append(index)
+                    candidates = self.children(index)
+                    break
+                if start > first:
+                    return chain
+            else:
+                return chain
+
+    def splice(self, index, roots, first_line, line_delta):
+        """Replace the subtree at index by freshly parsed roots; returns the change in node count
+
+        Only for parsed, list-backed outlines.
+        """
+        columns = {'indent': [], 'line': [], 'parent': [], 'end': []}
+        texts = flatten_outline(roots, columns, 0)
+        end = self.end(index)
+        node_delta = len(texts) - (end - index)
+        self.texts[index:end] = texts
+        self.indents[index:end] = columns['indent']
+        self.lines = self.lines[:index] + [line + first_line for line in columns['line']] \
+            + [line + line_delta for line in self.lines[end:]]
+        # Only ancestors end past index; everything after the subtree moves by node_delta
+        self.ends = [value + node_delta if value > index else value for value in self.ends[:index]] \
+            + [value + index for value in columns['end']] + [value + node_delta for value in self.ends[end:]]
+        return node_delta
+
+
+def relation_target(outline, node):
+    for detail in range(node + 1, outline.end(node)):
+        match = RELATION_PATTERN.match(outline.text(detail))
+        if match:
+            return match.group(2)
+    return None
+
+
+def outline_members(outline, root):
+    """Return ({member: node index}, {relation: target class}, {member: kind}) of a business class outline"""
+    members, relations, kinds = {}, {}, {}
+    for section in outline.children(root):
+        header = outline.text(section)
+        if header in MEMBER_SECTIONS:
+            for child in outline.children(section):
+                name = definition_name(outline.text(child))
+                if name not in members:
+                    members[name], kinds[name] = child, MEMBER_SECTIONS[header]
+                target = relation_target(outline, child) if header == 'Relations' else None
+                if target:
+                    relations[name] = target
+        elif header == 'StateCycles':
+            for cycle in outline.children(section):
+                for state in outline.children(cycle):
+                    state_name = definition_name(outline.text(state))
+                    for child in outline.children(state):
+                        match = DEFINITION_PATTERN.match(outline.text(child))
+                        name = f"{state_name}.{match.group(1)}" if match else None
+                        if match and outline.text(child).rstrip().endswith('Action') and name not in members:
+                            members[name], kinds[name] = child, 'state action'
+    return members, relations, kinds
+
+
+class OpenDocument:
+    """An editor buffer; each change re-parses only the smallest outline block holding the edit"""
+
+    def __init__(self, uri, content):
+        self.uri = uri
+        self.class_name = os.path.splitext(os.path.basename(uri_to_path(uri)))[0]
+        self.text = ''
+        self.lines = []
+        self.outline = self._scope = None
+        self.update(content)
+
+    def update(self, content):
+        # LSP positions count lines by '\n'; parse_outline drops a trailing '\r'
+        lines = content.split('\n')
+        if self.outline is None or not self.reparse_block(content, lines):
+            self.outline = FlatOutline.parse(lines)
+            self._scope = None
+        self.text = content
+        self.lines = lines
+
+    @property
+    def members(self):
+        return self.scope()[0]
+
+    @property
+    def relations(self):
+        return self.scope()[1]
+
+    @property
+    def kinds(self):
+        return self.scope()[2]
+
+    def scope(self):
+        """Members, relations and member kinds, collected on first use after an edit"""
+        if self._scope is None:
+            root = next((index for index in self.outline.roots()
+                         if self.outline.text(index).endswith('is a BusinessClass')), None)
+            self._scope = outline_members(self.outline, root) if root is not None else ({}, {}, {})
+        return self._scope
+
+    def reparse_block(self, content, lines):
+        """Splice a re-parse of the edited block into the outline; False when a full parse is needed"""
+        old, text, limit = self.lines, self.text, min(len(self.text), len(content))
+        # Common prefix and suffix in characters, then in whole lines
+        prefix = common_length(lambda size: text[:size] == content[:size], limit)
+        if prefix == len(text) == len(content):
+            return True
+        suffix = common_length(lambda size: text[len(text) - size:] == content[len(content) - size:],
+                               limit - prefix)
+        first = content.count('\n', 0, prefix)
+        same = content.count('\n', len(content) - suffix)
+        delta = len(lines) - len(old)
+        outline = self.outline
+        # Deepest block first; a block is safe to re-parse alone when its new text keeps the
+        # block's indentation and closes every parenthesis it opens
+        chain = outline.containing(first, len(old) - same, len(old))
+        for depth in range(len(chain) - 1, -1, -1):
+            index = chain[depth]
+            start, stop = outline.span(index, len(old))
+            block = lines[start:stop + delta]
+            if sum(paren_balance(strip_comment(line)) for line in block) != 0:
+                continue
+            roots = parse_outline(block)
+            if not roots or any(root.indent != outline.indent(index) for root in roots):
+                continue
+            section = outline.text(chain[1]) if depth > 1 else None
+            member_end = outline.end(chain[2]) if depth > 1 else None
+            node_delta = outline.splice(index, roots, start, delta)
+            if self._scope is not None:
+                self._scope = self.shift_scope(chain, depth, section, member_end, node_delta)
+            return True
+        return False
+
+    def shift_scope(self, chain, depth, section, member_end, node_delta):
+        """Members after an edit below the member level, or None to collect them again"""
+        members, relations, kinds = self._scope
+        index, outline = chain[depth], self.outline
+        shifted = lambda nodes: {name: node + node_delta if node > index else node for name, node in nodes.items()}
+        # State actions sit at depth 4, so edits inside their bodies leave every name alone
+        if section == 'StateCycles' and depth >= 5:
+            return shifted(members), relations, kinds
+        if not outline.text(chain[0]).endswith('is a BusinessClass'):
+            return shifted(members), relations, kinds
+        if section not in MEMBER_SECTIONS or depth < 2:
+            return None
+        # Collect again only the members of the edited block (one member, or the members
+        # re-parsed at depth 2); a name clash would change which definition wins
+        member = chain[2]
+        kept = {name: node for name, node in members.items() if not member <= node < member_end}
+        members, kinds = shifted(kept), {name: kinds[name] for name in kept}
+        relations = {name: target for name, target in relations.items() if name in kept}
+        node = member
+        while node < member_end + node_delta:
+            name = definition_name(outline.text(node))
+            if name in members:
+                return None
+            members[name], kinds[name] = node, MEMBER_SECTIONS[section]
+            target = relation_target(outline, node) if section == 'Relations' else None
+            if target:
+                relations[name] = target
+            node = outline.end(node)
+        return members, relations, kinds
+
+
+def common_length(matches, limit):
+    """Largest size in [0, limit] for which matches(size) holds (matches is monotonic)"""
+    low, high = 0, limit
+    # Binary search, so each probe is a single C-level slice comparison
+    while low < high:
+        middle = (low + high + 1) // 2
+        if matches(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def uri_to_path(uri):
+    parsed = urlparse(uri)
+    path = unquote(parsed.path)
+    # file:///C:/x -> C:/x on Windows
+    if re.match(r'/[A-Za-z]:', path):
+        path = path[1:]
+    return path
+
+
+class CorpusIndex:
+    """In-memory definition, member, symbol and reference indexes over a snapshot"""
+
+    def __init__(self, snapshot, references_dir=None):
+        self.snapshot = snapshot
+        references_dir = references_dir or snapshot.references_dir
+        self.references_dir = references_dir if os.path.isdir(references_dir) else REFERENCES_DIR
+        self.documents = {}
+        self.definitions = defaultdict(list)   # name -> [(file number, node index)]
+        self.classes = {}                      # class -> file number
+        self.members = {}                      # class -> {member: node index}
+        self.relations = {}                    # class -> {relation: target class}
+        self.kinds = {}                        # class -> {member: kind}
+        symbols = []
+        for number, relative in enumerate(snapshot.files):
+            outline = self.outline(number)
+            folder = relative.rpartition('/')[0]
+            owner = os.path.splitext(os.path.basename(relative))[0]
+            for root in outline.roots():
+                match = DEFINITION_PATTERN.match(outline.text(root))
+                if not match:
+                    continue
+                name, kind = match.groups()
+                if folder == 'list' or kind.endswith('List'):
+                    # Lists are named after their class: PayablesInvoice.InvoiceList
+                    name = f"{owner}.{name}"
+                self.definitions[name].append((number, root))
+                symbols.append((name.casefold(), name, kind, number, root))
+                if kind == 'BusinessClass':
+                    self.classes[name] = number
+                    self.members[name], self.relations[name], self.kinds[name] = outline_members(outline, root)
+                    symbols.extend((f"{name}.{member}".casefold(), f"{name}.{member}", 'member', number, index)
+                                   for member, index in self.members[name].items())
+        symbols.sort()
+        self.symbol_keys = [entry[0] for entry in symbols]
+        self.symbols = symbols
+        # One newline-joined string of every key, so substring search runs as a single str.find scan
+        self.symbol_text = '\n'.join(self.symbol_keys)
+        self.symbol_offsets = array('I', [0])
+        for key in self.symbol_keys[:-1]:
+            self.symbol_offsets.append(self.symbol_offsets[-1] + len(key) + 1)
+        self.files_by_symbol = self._invert_symbols()
+
+    def _invert_symbols(self):
+        """Identifier ID -> file numbers that mention it"""
+        offsets = self.snapshot.columns['file_symbols']
+        occurrences = self.snapshot.columns['symbols']
+        inverted = defaultdict(lambda: array('I'))
+        for number in range(len(self.snapshot.files)):
+            for symbol in set(occurrences[offsets[number]:offsets[number + 1]]):
+                inverted[symbol].append(number)
+        return dict(inverted)
+
+    @lru_cache(maxsize=2048)
+    def outline(self, number):
+        relative = self.snapshot.files[number]
+        first, _ = self.snapshot.node_range(relative)
+        columns = self.snapshot.columns
+        return FlatOutline(self.snapshot.node_texts(relative), columns['indent'], columns['line'], columns['end'],
+                           first)
+
+    @lru_cache(maxsize=2048)
+    def outline_text(self, number):
+        """Node texts of a file joined by newlines, so node k starts after k newlines"""
+        return '\n'.join(self.outline(number).texts)
+
+    def file_uri(self, number):
+        return Path(os.path.abspath(os.path.join(self.references_dir, self.snapshot.files[number]))).as_uri()
+
+    @lru_cache(maxsize=256)
+    def source_lines(self, number):
+        try:
+            with open(os.path.join(self.references_dir, self.snapshot.files[number]), 'r', encoding='utf-8',
+                      errors='ignore') as f:
+                return f.read().split('\n')
+        except OSError:
+            return []
+
+    def location(self, source, index, name=None):
+        """LSP Location of a node, ranged on name when it appears on the source line"""
+        if isinstance(source, OpenDocument):
+            outline, uri, lines = source.outline, source.uri, source.lines
+        else:
+            outline, uri, lines = self.outline(source), self.file_uri(source), self.source_lines(source)
+        line = outline.line(index) - 1
+        text = lines[line] if 0 <= line < len(lines) else ''
+        word = (name or definition_name(outline.text(index))).rpartition('.')[2]
+        start = max(text.find(word), 0)
+        return {'uri': uri, 'range': {'start': {'line': line, 'character': start},
+                                      'end': {'line': line, 'character': start + len(word)}}}
+
+    def class_scope(self, class_name):
+        """(source, members, relations) of a class, preferring its open document"""
+        for document in self.documents.values():
+            if document.class_name == class_name and document.members:
+                return document, document.members, document.relations
+        number = self.classes.get(class_name)
+        if number is None:
+            return None, {}, {}
+        return number, self.members[class_name], self.relations[class_name]
+
+    def resolve(self, class_name, path):
+        """Return (source, node index) for a dotted path seen from class_name, or None"""
+        parts = path.split('.')
+        while len(parts) > 1 and parts[0] in INSTANCE_PREFIXES:
+            parts = parts[1:]
+        current = class_name
+        for position, part in enumerate(parts):
+            last = position == len(parts) - 1
+            source, members, relations = self.class_scope(current)
+            # State actions are indexed as State.Action
+            if not last and f"{part}.{parts[position + 1]}" in members and position + 2 == len(parts):
+                return source, members[f"{part}.{parts[position + 1]}"]
+            if part in members:
+                if last or part not in relations:
+                    return source, members[part]
+                current = relations[part]
+                continue
+            if position == 0 and (part in self.classes or part in self.definitions):
+                if last or part not in self.classes:
+                    return self.definitions[part][0] if part in self.definitions else None
+                current = part
+                continue
+            return None
+        return None
+
+    def invoked_action(self, document, line, word):
+        """Resolve the action of an `invoke Action [Target]` line of an open document"""
+        match = INVOKE_PATTERN.search(document.lines[line])
+        if not match or match.group(1) != word:
+            return None
+        target = match.group(2)
+        resolved_class = self.target_class(document, line, target) if target else document.class_name
+        if resolved_class is None:
+            return None
+        source, members, _ = self.class_scope(resolved_class)
+        if word in members:
+            return source, members[word]
+        state_action = next((member for member in members if member.endswith('.' + word)), None)
+        return (source, members[state_action]) if state_action else None
+
+    def target_class(self, document, line, path):
+        """Business class an instance path names on a document line, or None when it cannot be told
+
+        `each` is the instance of the innermost enclosing `for each`; the other
+        instance prefixes stand for an instance of the current class. Relations
+        and local fields typed by a business class (views) lead to that class.
+        """
+        parts = path.split('.')
+        current = document.class_name
+        if parts[0] == 'each':
+            current = self.for_each_class(document, line)
+        while parts and parts[0] in INSTANCE_PREFIXES:
+            parts = parts[1:]
+        for position, part in enumerate(parts):
+            if current is None:
+                return None
+            source, members, relations = self.class_scope(current)
+            if part in relations:
+                current = relations[part]
+            elif part in members:
+                current = self.member_class(source, members[part])
+            elif position == 0 and part in self.classes:
+                current = part
+            elif part != current:
+                # A view names its business class as a member of itself
+                return None
+        return current
+
+    def member_class(self, source, index):
+        """Business class a local field is declared as (`Name is a Class view`), or None"""
+        outline = source.outline if isinstance(source, OpenDocument) else self.outline(source)
+        match = DEFINITION_PATTERN.match(outline.text(index))
+        return match.group(2) if match and match.group(2) in self.classes else None
+
+    def for_each_class(self, document, line):
+        """Class iterated by the innermost `for each` around a document line, or None"""
+        outline = document.outline
+        chain = outline.containing(line, line + 1, len(document.lines))
+        for node in reversed(chain):
+            node_line = outline.line(node) - 1
+            match = FOR_EACH_PATTERN.match(outline.text(node)) if node_line != line else None
+            if match:
+                # The iterated path may itself start with an outer `each`
+                return self.target_class(document, node_line, match.group(1))
+        return None
+
+    def definition(self, uri, line, character):
+        document = self.documents.get(uri)
+        if document is None or line >= len(document.lines):
+            return None
+        text = document.lines[line]
+        word, path = word_at(text, character)
+        if not word:
+            return None
+        found = self.invoked_action(document, line, word) or self.resolve(document.class_name, path)
+        if found is None and word in self.definitions:
+            found = self.definitions[word][0]
+        return self.location(*found, name=word) if found else None
+
+    def references(self, uri, line, character, limit=MAX_REFERENCES):
+        """Every line in the open documents and the corpus mentioning the identifier under the cursor"""
+        document = self.documents.get(uri)
+        if document is None or line >= len(document.lines):
+            return []
+        word, _ = word_at(document.lines[line], character)
+        if not word:
+            return []
+        # A literal-first pattern lets re skip ahead with a fast substring search; the
+        # word start is checked in iter_matches instead of with a lookbehind
+        pattern = re.compile(rf'{re.escape(word)}\b')
+        results = []
+        for open_document in self.documents.values():
+            results.extend(lsp_location(open_document.uri, number, column, len(word))
+                           for number, column in islice(iter_matches(pattern, open_document.text), limit))
+        open_paths = {os.path.normcase(uri_to_path(other)) for other in self.documents}
+        symbol = self.snapshot.symbols.lookup(word)
+        for number in self.files_by_symbol.get(symbol, ()) if symbol is not None else ():
+            if len(results) >= limit:
+                break
+            uri_path = self.file_uri(number)
+            if os.path.normcase(uri_to_path(uri_path)) in open_paths:
+                continue
+            outline = self.outline(number)
+            # Snapshot texts are logical lines, so locations point at the start of each line
+            results.extend(lsp_location(uri_path, outline.line(node) - 1, 0, 0)
+                           for node, _ in iter_matches(pattern, self.outline_text(number), unique_lines=True))
+        return results[:limit]
+
+    def hover(self, uri, line, character):
+        location = self.definition(uri, line, character)
+        if location is None:
+            return None
+        document = self.documents[uri]
+        word, path = word_at(document.lines[line], character)
+        found = self.invoked_action(document, line, word) \
+            or self.resolve(document.class_name, path) or self.definitions[word][0]
+        source, index = found
+        outline = source.outline if isinstance(source, OpenDocument) else self.outline(source)
+        end = min(outline.end(index), index + HOVER_LINES)
+        body = '\n'.join(outline.text(child) for child in range(index, end))
+        where = source.uri if isinstance(source, OpenDocument) else self.snapshot.files[source]
+        return {'contents': {'kind': 'markdown',
+                             'value': f"```lpl\n{body}\n```\n{where}:{outline.line(index)}"}}
+
+    def workspace_symbols(self, query, limit=MAX_SYMBOLS):
+        """Prefix matches first (binary search over sorted names), then substring matches"""
+        key = query.casefold()
+        results, seen = [], set()
+        start = bisect_left(self.symbol_keys, key)
+        for position in range(start, len(self.symbols)):
+            if len(results) >= limit or not self.symbol_keys[position].startswith(key):
+                break
+            results.append(self.symbols[position])
+            seen.add(position)
+        found = self.symbol_text.find(key) if key and '\n' not in key else -1
+        while len(results) < limit and found != -1:
+            position = bisect_right(self.symbol_offsets, found) - 1
+            if position not in seen:
+                results.append(self.symbols[position])
+            # Resume after this key so each symbol is reported once
+            found = self.symbol_text.find(key, self.symbol_offsets[position] + len(self.symbol_keys[position]))
+        return [{'name': name, 'kind': SYMBOL_KINDS.get(kind, 13), 'location': self.location(number, index, name),
+                 'containerName': self.snapshot.files[number]} for _, name, kind, number, index in results]
+
+
+# LSP SymbolKind: Class 5, Field 8, Enum 10, Interface 11, Variable 13, Struct 23
+SYMBOL_KINDS = {'BusinessClass': 5, 'member': 8, 'KeyField': 10, 'SecurityClass': 11, 'Page': 23, 'Menu': 23}
+
+
+def word_at(text, character):
+    """Return (identifier under the cursor, dotted path up to and including it)"""
+    start = end = min(character, len(text))
+    while start > 0 and WORD_CHARACTERS.match(text[start - 1]):
+        start -= 1
+    while end < len(text) and WORD_CHARACTERS.match(text[end]):
+        end += 1
+    token = text[start:end].strip('.')
+    if not token:
+        return None, None
+    # Keep the dotted parts up to the one under the cursor
+    offset = character - start
+    parts, consumed = [], 0
+    for part in token.split('.'):
+        parts.append(part)
+        consumed += len(part) + 1
+        if consumed > offset:
+            break
+    return parts[-1], '.'.join(parts)
+
+
+def iter_matches(pattern, text, unique_lines=False):
+    """Yield (0-based line, column) of every match, counting newlines incrementally"""
+    line = position = line_start = 0
+    previous = None
+    for match in pattern.finditer(text):
+        if match.start() and (text[match.start() - 1].isalnum() or text[match.start() - 1] == '_'):
+            continue
+        line += text.count('\n', position, match.start())
+        if line != previous or not unique_lines:
+            if line != previous:
+                line_start = text.rfind('\n', 0, match.start()) + 1
+            yield line, match.start() - line_start
+        previous, position = line, match.start()
+
+
+def lsp_location(uri, line, character, length):
+    return {'uri': uri, 'range': {'start': {'line': line, 'character': character},
+                                  'end': {'line': line, 'character': character + length}}}
+
+
+def load_index(source=SNAPSHOT_FILE):
+    """Build the index from a snapshot, building the snapshot first from a References dir"""
+    if not source.endswith(SNAPSHOT_EXTENSION):
+        references_dir, source = source, output_file('references.lplsnap')
+        if not os.path.exists(source):
+            log(f"Building snapshot of {references_dir}...")
+            # stdout carries JSON-RPC, so progress goes to stderr
+            build_snapshot(references_dir, source, log=log)
+    return CorpusIndex(CorpusSnapshot(source))
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+class LanguageServer:
+    """JSON-RPC dispatch over stdio"""
+
+    def __init__(self, index, stdin=sys.stdin.buffer, stdout=sys.stdout.buffer):
+        from lpl_completion import CompletionEngine
+
+        self.index = index
+        self.completion = CompletionEngine(index)
+        self.stdin = stdin
+        self.stdout = stdout
+        self.timings = defaultdict(list)
+        self.running = True
+
+    def read_message(self):
+        length = None
+        while True:
+            header = self.stdin.readline()
+            if not header:
+                return None
+            header = header.decode('ascii').strip()
+            if not header:
+                break
+            name, _, value = header.partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        return json.loads(self.stdin.read(length)) if length else None
+
+    def send(self, message):
+        body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+        self.stdout.write(f"Content-Length: {len(body)}\r\n\r\n".encode('ascii') + body)
+        self.stdout.flush()
+
+    def handle(self, message):
+        """Dispatch one request or notification; returns the response or None"""
+        method, params = message.get('method'), message.get('params') or {}
+        start = time.perf_counter()
+        try:
+            result = self.dispatch(method, params)
+        except Exception as e:
+            log(f"Error processing {method}: {e}")
+            if 'id' in message:
+                return {'jsonrpc': '2.0', 'id': message['id'], 'error': {'code': -32603, 'message': str(e)}}
+            return None
+        self.timings[method].append(time.perf_counter() - start)
+        if 'id' in message:
+            return {'jsonrpc': '2.0', 'id': message['id'], 'result': result}
+        return None
+
+    def dispatch(self, method, params):
+        index = self.index
+        if method == 'initialize':
+            return {'capabilities': {'textDocumentSync': 1, 'definitionProvider': True, 'referencesProvider': True,
+                                     'hoverProvider': True, 'workspaceSymbolProvider': True,
+                                     'completionProvider': {'triggerCharacters': ['.', ' ']}},
+                    'serverInfo': {'name': 'lpl-language-server'}}
+        if method == 'shutdown':
+            self.report_timings()
+            return None
+        if method == 'exit':
+            self.running = False
+            return None
+        if method == 'textDocument/didOpen':
+            document = params['textDocument']
+            index.documents[document['uri']] = OpenDocument(document['uri'], document['text'])
+            self.completion.invalidate()
+            return None
+        if method == 'textDocument/didChange':
+            document = index.documents.get(params['textDocument']['uri'])
+            if document is not None and params['contentChanges']:
+                # Full sync: the last change carries the whole buffer
+                document.update(params['contentChanges'][-1]['text'])
+                self.completion.invalidate()
+            return None
+        if method == 'textDocument/didClose':
+            index.documents.pop(params['textDocument']['uri'], None)
+            self.completion.invalidate()
+            return None
+        if method == 'textDocument/completion':
+            return self.complete(params['textDocument']['uri'], params['position'])
+        if method in ('textDocument/definition', 'textDocument/references', 'textDocument/hover'):
+            uri, position = params['textDocument']['uri'], params['position']
+            handler = {'textDocument/definition': index.definition, 'textDocument/references': index.references,
+                       'textDocument/hover': index.hover}[method]
+            return handler(uri, position['line'], position['character'])
+        if method == 'workspace/symbol':
+            return index.workspace_symbols(params.get('query', ''))
+        return None
+
+    def complete(self, uri, position):
+        from lpl_completion import COMPLETION_KINDS
+
+        document = self.index.documents.get(uri)
+        if document is None or position['line'] >= len(document.lines):
+            return None
+        line = document.lines[position['line']][:position['character']]
+        each_class = self.index.for_each_class(document, position['line']) if 'each.' in line else None
+        results, incomplete = self.completion.complete(document.class_name, line, each_class=each_class)
+        # sortText keeps the engine's ranking instead of the client's alphabetical order
+        return {'isIncomplete': incomplete,
+                'items': [{'label': label, 'kind': COMPLETION_KINDS.get(kind, 5), 'detail': detail,
+                           'sortText': f"{rank:04d}"} for rank, (label, kind, detail) in enumerate(results)]}
+
+    def serve(self):
+        while self.running:
+            message = self.read_message()
+            if message is None:
+                break
+            response = self.handle(message)
+            if response is not None:
+                self.send(response)
+
+    def report_timings(self):
+        for method, timings in sorted(self.timings.items()):
+            log(f"{method}: {len(timings)} requests, {format_percentiles(timings)}")
+
+
+def format_percentiles(timings):
+    ordered = sorted(timings)
+    p50 = ordered[len(ordered) // 2] * 1000
+    p99 = ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)] * 1000
+    return f"p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {ordered[-1] * 1000:.2f} ms"
+
+
+def benchmark(index, class_name='PayablesInvoice', samples=300):
+    """Open one business class and time definition / hover / references / symbol requests across it"""
+    number = index.classes[class_name]
+    path = os.path.join(index.references_dir, index.snapshot.files[number])
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        content = f.read()
+    uri = Path(os.path.abspath(path)).as_uri()
+    server = LanguageServer(index)
+    server.handle({'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+                   'params': {'textDocument': {'uri': uri, 'text': content}}})
+    lines = content.split('\n')
+    positions = [(number, match.start()) for number, text in enumerate(lines)
+                 for match in re.finditer(r'[A-Za-z_][\w.]*', text)]
+    step = max(1, len(positions) // samples)
+    resolved = 0
+    for request_id, (line, character) in enumerate(positions[::step][:samples]):
+        for method in ('textDocument/definition', 'textDocument/hover', 'textDocument/references'):
+            response = server.handle({'jsonrpc': '2.0', 'id': request_id, 'method': method,
+                                      'params': {'textDocument': {'uri': uri},
+                                                 'position': {'line': line, 'character': character}}})
+            resolved += method == 'textDocument/definition' and response['result'] is not None
+    for request_id, (line, character) in enumerate(positions[::step][:samples]):
+        server.handle({'jsonrpc': '2.0', 'id': request_id, 'method': 'textDocument/completion',
+                       'params': {'textDocument': {'uri': uri}, 'position': {'line': line, 'character': character + 2}}})
+    for query in ('Vendor', 'PayablesInvoice.Rel', 'Release', 'cfg', 'Company'):
+        server.handle({'jsonrpc': '2.0', 'id': 0, 'method': 'workspace/symbol', 'params': {'query': query}})
+    # Type a line into a member body, edit it and delete it again, at spread-out members
+    document = index.documents[uri]
+    edited, mismatches = list(lines), 0
+    actions = [document.outline.line(member) for name, member in document.members.items()
+               if document.outline.end(member) > member + 1][::max(1, len(document.members) // 20)]
+    for line in actions[:20]:
+        indent = lines[line][:len(lines[line]) - len(lines[line].lstrip())] + '\t\t'
+        for text in (indent + 'LocalCount', indent + 'LocalCount += 1', None):
+            if text is None:
+                del edited[line]
+            elif edited[line].strip().startswith('LocalCount'):
+                edited[line] = text
+            else:
+                edited.insert(line, text)
+            server.handle({'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+                           'params': {'textDocument': {'uri': uri},
+                                      'contentChanges': [{'text': '\n'.join(edited)}]}})
+            server.handle({'jsonrpc': '2.0', 'id': 0, 'method': 'textDocument/completion',
+                           'params': {'textDocument': {'uri': uri},
+                                      'position': {'line': line, 'character': len(edited[line])}}})
+            full = OpenDocument(uri, '\n'.join(edited))
+            mismatches += (document.outline.texts, document.outline.lines, document.outline.ends,
+                           document.scope()) != (full.outline.texts, full.outline.lines, full.outline.ends,
+                                                 full.scope())
+    print(f"Benchmark on {class_name} ({len(lines):,} lines), {resolved} of "
+          f"{len(server.timings['textDocument/definition'])} definitions resolved, "
+          f"{mismatches} incremental updates differing from a full parse:")
+    for method, timings in sorted(server.timings.items()):
+        print(f"  {method}: {len(timings)} requests, {format_percentiles(timings)}")
+
+
+def main():
+    arguments = sys.argv[1:]
+    bench = bool(arguments) and arguments[0] == 'bench'
+    if bench:
+        arguments = arguments[1:]
+    source = arguments[0] if arguments else SNAPSHOT_FILE
+    start = time.perf_counter()
+    index = load_index(source)
+    log(f"Indexed {len(index.snapshot.files):,} files, {len(index.symbols):,} symbols in "
+        f"{time.perf_counter() - start:.1f}s")
+    if bench:
+        benchmark(index)
+        return
+    LanguageServer(index).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Rule-based linter for LPL business classes.
+
+Each rule is a function registered with @rule; it receives a LintContext
+holding the file's parsed outline and business class model (parsed once and
+shared by every rule) and yields (line, message) findings. Files are linted
+in parallel worker processes, and findings are cached per file by content
+hash, so re-linting the corpus after a change only re-parses the files that
+changed (unchanged size and mtime skip even the hashing).
+
+Constraint messages are checked against a message catalog, one message id
+per line, when Inputs/message_catalog.txt (or --messages) exists.
+
+Usage:
+    python lpl_lint.py [References dir or one file] [--messages catalog.txt] [--no-cache]
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from lpl_business_class import BUSINESS_CLASS_EXTENSIONS, build_business_class
+from lpl_config import INPUTS_DIR, REFERENCES_DIR, output_file
+from lpl_outline import definition_name, parse_outline
+from scan_metrics import ScanMetrics
+
+MESSAGE_CATALOG_FILE = os.path.join(INPUTS_DIR, 'message_catalog.txt')
+CACHE_FILE = output_file('lpl_lint_cache.json')
+OUTPUT_FILE = output_file('lpl_lint.txt')
+METRICS_FILE = output_file('lpl_lint_metrics.json')
+
+# Bump when a rule changes so cached findings are recomputed
+LINT_VERSION = 1
+# Below this many files to lint, worker start-up costs more than it saves
+PARALLEL_THRESHOLD = 32
+
+WORD_PATTERN = re.compile(r'[A-Za-z_]\w*')
+MESSAGE_PATTERN = re.compile(r'^"((?:[^"\\]|\\.)*)"')
+
+RULES = {}
+
+
+def rule(code, name):
+    """Register a lint rule: fn(context) yields (line, message)"""
+    def register(function):
+        RULES[code] = (name, function)
+        return function
+    return register
+
+
+class LintContext:
+    """One parsed file shared by every rule"""
+
+    def __init__(self, path, content, catalog):
+        self.path = path
+        self.content = content
+        self.catalog = catalog
+        self.roots = parse_outline(content)
+        self.model = build_business_class(os.path.splitext(os.path.basename(path))[0], self.roots)
+        self._words = None
+
+    @property
+    def words(self):
+        """Identifier counts over the whole file"""
+        if self._words is None:
+            self._words = word_counts(node for root in self.roots for node in root.walk())
+        return self._words
+
+
+def word_counts(nodes):
+    return Counter(word for node in nodes for word in WORD_PATTERN.findall(node.text))
+
+
+def declared_fields(node):
+    """(name, line) of every field declared directly under a Local Fields / Parameters node"""
+    return [(definition_name(child.text), child.line) for child in node.children]
+
+
+@rule('LPL001', 'unused-local-field')
+def unused_local_fields(context):
+    """Local fields (class or action) that are never referenced after their declaration"""
+    section = context.model['sections'].get('Local Fields')
+    for name, line in declared_fields(section) if section is not None else []:
+        if context.words[name] <= 1:
+            yield line, f"local field {name} is never used"
+    for action in context.model['actions'].values():
+        local = action['subsections'].get('Local Fields')
+        if local is None:
+            continue
+        words = word_counts(action['node'].walk())
+        for name, line in declared_fields(local):
+            if words[name] <= 1:
+                yield line, f"local field {name} of {action['name']} is never used"
+
+
+@rule('LPL002', 'unused-parameter')
+def unused_parameters(context):
+    """Action parameters never referenced in the action"""
+    for action in context.model['actions'].values():
+        parameters = action['subsections'].get('Parameters')
+        # Request action parameters are consumed by the request process, not by rules
+        if parameters is None or 'RequestAction' in (action['type'] or ''):
+            continue
+        words = word_counts(action['node'].walk())
+        for name, line in declared_fields(parameters):
+            if words[name] <= 1:
+                yield line, f"parameter {name} of {action['name']} is never referenced"
+
+
+@rule('LPL003', 'duplicate-field-rule')
+def duplicate_field_rules(context):
+    """A field with two rule blocks in the same Field Rules section"""
+    blocks = [node for text, node in context.model['sections'].items() if text.endswith('Field Rules')]
+    blocks += [action['subsections']['Field Rules'] for action in context.model['actions'].values()
+               if 'Field Rules' in action['subsections']]
+    for block in blocks:
+        seen = {}
+        for child in block.children:
+            name = definition_name(child.text)
+            if name in seen:
+                yield child.line, f"duplicate rules for {name} in {block.text} (first at line {seen[name]})"
+            else:
+                seen[name] = child.line
+
+
+@rule('LPL004', 'missing-cfg-prefix')
+def missing_cfg_prefix(context):
+    """Configuration console (.businessclass) classes must use the cfg prefix"""
+    if not context.path.endswith('.businessclass'):
+        return
+    prefix = next((text for text in context.model['sections'] if text.startswith('prefix is ')), None)
+    if prefix != 'prefix is cfg':
+        root = context.roots[0] if context.roots else None
+        yield (root.line if root else 1), \
+            f"custom class {context.model['name']} " + (f"has '{prefix}'" if prefix else "has no prefix") \
+            + ", expected 'prefix is cfg'"
+
+
+@rule('LPL005', 'unknown-constraint-message')
+def unknown_constraint_messages(context):
+    """Constraint messages that are not in the message catalog"""
+    if not context.catalog:
+        return
+    for root in context.roots:
+        for node in root.walk():
+            if not node.text.startswith('constraint'):
+                continue
+            message = next((MESSAGE_PATTERN.match(child.text) for child in node.children
+                            if child.text.startswith('"')), None)
+            if message is None:
+                continue
+            text = message.group(1)
+            # A message that is only a <field> substitution comes from the data
+            if re.fullmatch(r'<[^>]+>', text) or text in context.catalog:
+                continue
+            yield node.line, f"constraint message \"{text[:80]}\" is not in the message catalog"
+
+
+def lint_content(path, content, catalog=frozenset()):
+    """Run every rule over one file; returns findings sorted by line"""
+    context = LintContext(path, content, catalog)
+    findings = []
+    for code, (name, function) in sorted(RULES.items()):
+        findings.extend([line, code, message] for line, message in function(context))
+    return sorted(findings)
+
+
+_catalog = frozenset()
+
+
+def init_worker(catalog):
+    global _catalog
+    _catalog = catalog
+
+
+def lint_file(job):
+    """Lint one file (runs in a worker); returns (relative, path, size, seconds, findings, error)"""
+    relative, path, content = job
+    start = time.perf_counter()
+    try:
+        findings = lint_content(path, content, _catalog)
+    except Exception as e:
+        return relative, path, len(content), 0.0, [], str(e)
+    return relative, path, len(content), time.perf_counter() - start, findings, None
+
+
+def load_catalog(catalog_file=MESSAGE_CATALOG_FILE):
+    if not catalog_file or not os.path.exists(catalog_file):
+        return frozenset()
+    with open(catalog_file, 'r', encoding='utf-8', errors='ignore') as f:
+        return frozenset(line.strip().strip('"') for line in f if line.strip())
+
+
+def cache_key(catalog):
+    """Cached findings are valid only for the same rules and message catalog"""
+    catalog_digest = hashlib.blake2b('\n'.join(sorted(catalog)).encode('utf-8'), digest_size=8).hexdigest()
+    return f"{LINT_VERSION}:{','.join(sorted(RULES))}:{catalog_digest}"
+
+
+def load_cache(key, cache_file=CACHE_FILE):
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    with open(cache_file, 'r', encoding='utf-8') as f:
+        cache = json.load(f)
+    return cache['files'] if cache.get('key') == key else {}
+
+
+def save_cache(key, files, cache_file=CACHE_FILE):
+    """Write the cache atomically so an interrupted run keeps the previous one"""
+    temporary = cache_file + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump({'key': key, 'files': files}, f, separators=(',', ':'))
+    os.replace(temporary, cache_file)
+
+
+def iter_lint_targets(target):
+    """Yield (relative path, absolute path) of every business class under target (or target itself)"""
+    if os.path.isfile(target):
+        yield os.path.basename(target), target
+        return
+    for folder, _, filenames in os.walk(target):
+        prefix = os.path.relpath(folder, target).replace(os.sep, '/')
+        for filename in sorted(filenames):
+            if filename.endswith(BUSINESS_CLASS_EXTENSIONS):
+                yield filename if prefix == '.' else f"{prefix}/{filename}", os.path.join(folder, filename)
+
+
+def lint(target=REFERENCES_DIR, catalog_file=MESSAGE_CATALOG_FILE, cache_file=CACHE_FILE, workers=None,
+         metrics=None):
+    """Return ({relative path: findings}, statistics), reusing cached findings of unchanged files
+
+    The cache is keyed by absolute path, so linting one file keeps the
+    corpus entries; a directory run drops entries of files deleted under it.
+    """
+    catalog = load_catalog(catalog_file)
+    key = cache_key(catalog)
+    cache = load_cache(key, cache_file)
+    targets = list(iter_lint_targets(os.path.abspath(target)))
+    metrics = metrics or ScanMetrics('lint')
+    if metrics.total_files is None:
+        metrics.total_files = len(targets)
+    stats = {'files': len(targets), 'cached': 0, 'linted': 0, 'errors': 0, 'catalog': len(catalog)}
+
+    files, jobs, dirty = {}, [], False
+    with metrics.phase('read'):
+        for relative, path in targets:
+            status = os.stat(path)
+            entry = cache.get(path)
+            if entry and entry['size'] == status.st_size and entry['mtime'] == status.st_mtime_ns:
+                files[path] = entry
+                continue
+            dirty = True
+            with open(path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+            if entry and entry['hash'] == digest:
+                files[path] = dict(entry, size=status.st_size, mtime=status.st_mtime_ns)
+                continue
+            files[path] = {'hash': digest, 'size': status.st_size, 'mtime': status.st_mtime_ns, 'findings': []}
+            jobs.append((relative, path, data.decode('utf-8', 'ignore')))
+    stats['cached'] = len(targets) - len(jobs)
+
+    if len(jobs) >= PARALLEL_THRESHOLD:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(catalog,))
+        results = pool.map(lint_file, jobs, chunksize=16)
+    else:
+        pool = None
+        init_worker(catalog)
+        results = map(lint_file, jobs)
+    try:
+        for relative, path, size, seconds, findings, error in metrics.timed(results, 'analyze'):
+            if error is not None:
+                print(f"Error processing {os.path.basename(relative)}: {error}")
+                metrics.add_error()
+                stats['errors'] += 1
+                # Do not cache a failure: the next run retries the file
+                del files[path]
+                continue
+            metrics.add_file(relative, size, seconds)
+            files[path]['findings'] = findings
+            stats['linted'] += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if os.path.isdir(target):
+        root = os.path.join(os.path.abspath(target), '')
+        stale = [path for path in cache if path.startswith(root) and path not in files]
+        dirty = dirty or bool(stale)
+        for path in stale:
+            del cache[path]
+    if cache_file and dirty:
+        with metrics.phase('cache'):
+            cache.update(files)
+            save_cache(key, cache, cache_file)
+    return {relative: files[path]['findings'] for relative, path in targets if path in files}, stats
+
+
+def format_report(findings, stats):
+    """Render the findings as text"""
+    by_rule = Counter(code for entries in findings.values() for _, code, _ in entries)
+    lines = [f"=== LPL LINT ({stats['files']:,} files) ===", "", "Statistics:"]
+    lines.append(f"- Files linted: {stats['linted']:,}, from cache: {stats['cached']:,}, errors: {stats['errors']}")
+    lines.append(f"- Findings: {sum(by_rule.values()):,}")
+    for code, (name, _) in sorted(RULES.items()):
+        note = ' (no message catalog)' if code == 'LPL005' and not stats['catalog'] else ''
+        lines.append(f"    {code} {name}: {by_rule[code]:,}{note}")
+
+    lines.append("\n**Findings:**")
+    for relative in sorted(findings):
+        for line, code, message in findings[relative]:
+            lines.append(f"{relative}:{line}: {code} {message}")
+    return '\n'.join(lines)
+
+
+def main():
+    arguments = [arg for index, arg in enumerate(sys.argv[1:], 1)
+                 if not arg.startswith('--') and sys.argv[index - 1] != '--messages']
+    target = arguments[0] if arguments else REFERENCES_DIR
+    catalog_file = sys.argv[sys.argv.index('--messages') + 1] if '--messages' in sys.argv[:-1] \
+        else MESSAGE_CATALOG_FILE
+    cache_file = None if '--no-cache' in sys.argv else CACHE_FILE
+    metrics = ScanMetrics('lint')
+    start = time.perf_counter()
+    findings, stats = lint(target, catalog_file, cache_file, metrics=metrics)
+    elapsed = time.perf_counter() - start
+    with metrics.phase('report'):
+        report = format_report(findings, stats)
+        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+            f.write(report)
+    print(report[:report.index("\n**Findings:**")])
+    print(f"\nLinted in {elapsed:.2f}s; findings saved to: {OUTPUT_FILE}\n")
+    metrics.finish(METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
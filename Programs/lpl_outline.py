@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Indentation outline parser shared by the LPL analyzers.
+
+LPL artifacts (.busclass, .field, .list, .page, .menu, .form, ...) are
+indentation structured with a mix of tabs and spaces. parse_outline turns the
+text into a tree of Node objects, joining multi-line parenthesized
+expressions such as "when (A\n and B)" into a single node.
+"""
+
+import re
+
+TAB_SIZE = 4
+PREPROCESSOR_PATTERN = re.compile(r'#(?:ifdef|ifndef|if|else|elif|endif)\b')
+
+
+class Node:
+    """One logical line of an LPL artifact and the lines nested under it"""
+
+    __slots__ = ('text', 'indent', 'line', 'children', 'parent')
+
+    def __init__(self, text, indent, line, parent=None):
+        self.text = text
+        self.indent = indent
+        self.line = line
+        self.children = []
+        self.parent = parent
+
+    def __repr__(self):
+        return f"Node({self.text!r}, line={self.line}, children={len(self.children)})"
+
+    def child(self, text):
+        """Return the first child whose text equals text, or None"""
+        for child in self.children:
+            if child.text == text:
+                return child
+        return None
+
+    def child_starting(self, prefix):
+        """Return the first child whose text starts with prefix, or None"""
+        for child in self.children:
+            if child.text.startswith(prefix):
+                return child
+        return None
+
+    def walk(self):
+        """Yield this node and all descendants depth first"""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def body_text(self):
+        """Return the text of all descendants joined by newlines"""
+        return '\n'.join(node.text for node in self.walk() if node is not self)
+
+
+def strip_comment(line):
+    """Remove a trailing // comment that is not inside a string literal"""
+    if '//' not in line:
+        return line
+    in_string = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_string = not in_string
+        elif char == '/' and not in_string and line.startswith('//', index):
+            return line[:index]
+    return line
+
+
+def measure_indent(line):
+    """Return (column, stripped text) with tabs expanded to TAB_SIZE stops"""
+    column = 0
+    for char in line:
+        if char == ' ':
+            column += 1
+        elif char == '\t':
+            column += TAB_SIZE - column % TAB_SIZE
+        else:
+            break
+    return column, line.strip()
+
+
+def paren_balance(text):
+    """Count unclosed parentheses outside string literals"""
+    if '(' not in text and ')' not in text:
+        return 0
+    if '"' not in text:
+        return text.count('(') - text.count(')')
+    depth = 0
+    for part in re.sub(r'"(?:[^"\\]|\\.)*"', '""', text):
+        if part == '(':
+            depth += 1
+        elif part == ')':
+            depth -= 1
+    return depth
+
+
+def iter_logical_lines(lines):
+    """Yield (line number, indent, text) joining lines of unbalanced parentheses"""
+    pending = None
+    for number, raw in enumerate(lines, 1):
+        line = strip_comment(raw.rstrip('\r\n'))
+        if not line.strip():
+            continue
+        indent, text = measure_indent(line)
+        if PREPROCESSOR_PATTERN.match(text):
+            # "#ifdef module x" blocks sit at column 0 and would otherwise end every section
+            continue
+        if pending:
+            pending[2] = f"{pending[2]} {text}"
+            pending[3] += paren_balance(text)
+            if pending[3] <= 0:
+                yield pending[0], pending[1], pending[2]
+                pending = None
+            continue
+        depth = paren_balance(text)
+        if depth > 0:
+            pending = [number, indent, text, depth]
+            continue
+        yield number, indent, text
+    if pending:
+        yield pending[0], pending[1], pending[2]
+
+
+def parse_outline(content):
+    """Parse LPL text (str or iterable of lines) into a list of root Nodes"""
+    lines = content.splitlines() if isinstance(content, str) else content
+    roots = []
+    stack = []
+    for number, indent, text in iter_logical_lines(lines):
+        while stack and stack[-1].indent >= indent:
+            stack.pop()
+        parent = stack[-1] if stack else None
+        node = Node(text, indent, number, parent)
+        if parent:
+            parent.children.append(node)
+        else:
+            roots.append(node)
+        stack.append(node)
+    return roots
+
+
+def parse_outline_file(file_path):
+    """Read and parse an LPL artifact file"""
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+        return parse_outline(file.read())
+
+
+def sections(root):
+    """Map section header text (e.g. 'Relations', 'Derived Fields') to its node"""
+    result = {}
+    for child in root.children:
+        result.setdefault(child.text.strip(), child)
+    return result
+
+
+def definition_name(text):
+    """Return the leading identifier of a definition line ('X is a Y' -> 'X')"""
+    match = re.match(r'[A-Za-z_][\w.]*', text)
+    return match.group(0) if match else text.split()[0]
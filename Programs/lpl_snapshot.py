@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""
+Versioned binary snapshot of the parsed References corpus.
+
+build_snapshot parses every reference artifact once and stores the result in
+a flat, mmap-able layout: outline nodes in pre-order as columns (indent, line,
+parent, subtree end) plus each file's node texts, and the interned identifier
+IDs of every file. The columns are written as pickle protocol 5 out-of-band
+buffers, so loading a snapshot unpickles only the small metadata and maps the
+columns straight from the file without copying.
+
+Outlines, business class models and key field definitions are rebuilt from
+the columns on first access, which skips reading and tokenizing the source.
+Section offsets (node index, subtree end, source line) are available without
+building any Node objects at all.
+
+Usage:
+    python lpl_snapshot.py build [References dir or .lplpack] [snapshot file]
+    python lpl_snapshot.py info [snapshot file]
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+import time
+from array import array
+from collections.abc import Mapping
+
+from corpus_pack import file_status
+from lpl_business_class import build_business_class, definition_root
+from lpl_config import REFERENCES_DIR, output_file
+from lpl_outline import Node, definition_name, parse_outline
+from lpl_symbols import SymbolTable, file_symbols, iter_reference_files
+from prefetch_loader import prefetch
+
+SNAPSHOT_FILE = output_file('references.lplsnap')
+
+SNAPSHOT_EXTENSION = '.lplsnap'
+SNAPSHOT_VERSION = 1
+MAGIC = b'LPLSNAP1'
+HEADER = struct.Struct('<8sIIQQ')
+BUFFER_ENTRY = struct.Struct('<QQ')
+ALIGNMENT = 8
+
+# Column name -> array typecode; every column is one out-of-band buffer
+COLUMNS = {
+    'file_nodes': 'Q',     # first node index of each file (+ end sentinel)
+    'file_text': 'Q',      # byte offset of each file's node texts (+ end sentinel)
+    'file_symbols': 'Q',   # first symbol position of each file (+ end sentinel)
+    'file_size': 'Q',
+    'file_mtime': 'Q',
+    'indent': 'H',
+    'line': 'I',
+    'parent': 'i',         # global node index of the parent, -1 for roots
+    'end': 'I',            # global index one past the node's last descendant
+    'symbols': 'I',
+}
+
+
+def flatten_outline(roots, columns, base):
+    """Append an outline to the node columns in pre-order; return the node texts"""
+    texts = []
+    stack = [(root, -1) for root in reversed(roots)]
+    open_nodes = []
+    while stack:
+        node, parent = stack.pop()
+        index = base + len(texts)
+        # Close every open node that is not an ancestor of this one
+        while open_nodes and open_nodes[-1] != parent:
+            columns['end'][open_nodes.pop()] = index
+        texts.append(node.text)
+        columns['indent'].append(min(node.indent, 0xFFFF))
+        columns['line'].append(node.line)
+        columns['parent'].append(parent)
+        columns['end'].append(0)
+        open_nodes.append(index)
+        stack.extend((child, index) for child in reversed(node.children))
+    for index in open_nodes:
+        columns['end'][index] = base + len(texts)
+    return texts
+
+
+def build_snapshot(references_dir=REFERENCES_DIR, snapshot_file=SNAPSHOT_FILE, log=print):
+    """Parse the whole corpus and write a snapshot; returns statistics
+
+    Progress and errors go through log, so callers that own stdout (the
+    language server) can send them elsewhere.
+    """
+    columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+    table = SymbolTable()
+    files = []
+    text = bytearray()
+    relatives = {path: relative for relative, path in iter_reference_files(references_dir)}
+    for path, content, error in prefetch(relatives):
+        relative = relatives[path]
+        try:
+            if error is not None:
+                raise error
+            size, mtime = file_status(path)
+        except OSError as e:
+            log(f"Error processing {relative}: {e}")
+            continue
+        files.append(relative.replace(os.sep, '/'))
+        columns['file_nodes'].append(len(columns['line']))
+        columns['file_text'].append(len(text))
+        columns['file_symbols'].append(len(columns['symbols']))
+        columns['file_size'].append(size)
+        columns['file_mtime'].append(mtime)
+        texts = flatten_outline(parse_outline(content), columns, len(columns['line']))
+        # Logical lines never contain a newline, so one join/split round-trips them
+        text += '\n'.join(texts).encode('utf-8')
+        columns['symbols'].extend(file_symbols(table, content))
+        if len(files) % 10000 == 0:
+            log(f"Parsed {len(files):,} files...")
+    columns['file_nodes'].append(len(columns['line']))
+    columns['file_text'].append(len(text))
+    columns['file_symbols'].append(len(columns['symbols']))
+
+    metadata = {
+        'version': SNAPSHOT_VERSION,
+        'references_dir': references_dir,
+        'created': time.time(),
+        'files': files,
+        'symbols': table.to_list(),
+        'columns': {name: pickle.PickleBuffer(column) for name, column in columns.items()},
+        'text': pickle.PickleBuffer(text),
+    }
+    buffers = []
+    encoded = pickle.dumps(metadata, protocol=5, buffer_callback=buffers.append)
+
+    with open(snapshot_file, 'wb') as snapshot:
+        snapshot.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(buffers), 0, 0))
+        metadata_offset = snapshot.tell()
+        snapshot.write(encoded)
+        entries = []
+        for buffer in buffers:
+            snapshot.write(b'\0' * (-snapshot.tell() % ALIGNMENT))
+            raw = buffer.raw()
+            entries.append((snapshot.tell(), raw.nbytes))
+            snapshot.write(raw)
+        table_offset = snapshot.tell()
+        for entry in entries:
+            snapshot.write(BUFFER_ENTRY.pack(*entry))
+        size = snapshot.tell()
+        snapshot.seek(0)
+        snapshot.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(buffers), metadata_offset, table_offset))
+    return {'files': len(files), 'nodes': len(columns['line']), 'symbols': len(table),
+            'occurrences': len(columns['symbols']), 'bytes': size}
+
+
+class LazyModels(Mapping):
+    """Read-only {name: model} mapping that builds each model on first access"""
+
+    def __init__(self, paths, build):
+        self._paths = paths
+        self._build = build
+
+    def __getitem__(self, name):
+        return self._build(self._paths[name])
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self):
+        return len(self._paths)
+
+
+class CorpusSnapshot:
+    """Memory-mapped view of a snapshot with lazily rebuilt outlines and models"""
+
+    def __init__(self, snapshot_file=SNAPSHOT_FILE):
+        self.snapshot_file = snapshot_file
+        with open(snapshot_file, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, buffer_count, metadata_offset, table_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{snapshot_file} is not an LPL corpus snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"{snapshot_file} is snapshot version {version}, expected {SNAPSHOT_VERSION}; rebuild it")
+
+        view = memoryview(self._mmap)
+        buffers = []
+        for number in range(buffer_count):
+            offset, length = BUFFER_ENTRY.unpack_from(self._mmap, table_offset + number * BUFFER_ENTRY.size)
+            buffers.append(view[offset:offset + length])
+        # pickle stops at its STOP opcode, so the buffers that follow are not read here
+        metadata = pickle.loads(view[metadata_offset:], buffers=buffers)
+
+        self.references_dir = metadata['references_dir']
+        self.created = metadata['created']
+        self.files = metadata['files']
+        self.file_index = {relative: number for number, relative in enumerate(self.files)}
+        self.symbols = SymbolTable(metadata['symbols'])
+        self.columns = {name: memoryview(buffer).cast(COLUMNS[name])
+                        for name, buffer in metadata['columns'].items()}
+        self._text = memoryview(metadata['text'])
+        self._outlines = {}
+        self._business_classes = {}
+
+    def __len__(self):
+        return len(self.files)
+
+    def _file_number(self, relative):
+        return self.file_index[relative.replace(os.sep, '/')]
+
+    def node_range(self, relative):
+        """Return (first, end) global node indexes of a file"""
+        number = self._file_number(relative)
+        return self.columns['file_nodes'][number], self.columns['file_nodes'][number + 1]
+
+    def node_texts(self, relative):
+        """Decode the node texts of one file, in pre-order"""
+        number = self._file_number(relative)
+        start, end = self.columns['file_text'][number], self.columns['file_text'][number + 1]
+        if start == end:
+            return []
+        return str(self._text[start:end], 'utf-8').split('\n')
+
+    def file_symbols(self, relative):
+        """Return the identifier IDs of a file as a zero-copy memoryview"""
+        number = self._file_number(relative)
+        offsets = self.columns['file_symbols']
+        return self.columns['symbols'][offsets[number]:offsets[number + 1]]
+
+    def sections(self, relative):
+        """Map top-level section header -> (node index, subtree end, source line) without building Nodes"""
+        first, last = self.node_range(relative)
+        if first == last:
+            return {}
+        texts = self.node_texts(relative)
+        end, line = self.columns['end'], self.columns['line']
+        result = {}
+        # The first root is the artifact definition; its children are the sections
+        index = first + 1
+        while index < end[first]:
+            result.setdefault(texts[index - first], (index, end[index], line[index]))
+            index = end[index]
+        return result
+
+    def outline(self, relative):
+        """Rebuild the root Nodes of a file (cached)"""
+        relative = relative.replace(os.sep, '/')
+        if relative in self._outlines:
+            return self._outlines[relative]
+        first, last = self.node_range(relative)
+        texts = self.node_texts(relative)
+        indent, line, parent = self.columns['indent'], self.columns['line'], self.columns['parent']
+        nodes = []
+        roots = []
+        for index in range(first, last):
+            owner = parent[index]
+            node = Node(texts[index - first], indent[index], line[index], nodes[owner - first] if owner >= 0 else None)
+            if owner >= 0:
+                node.parent.children.append(node)
+            else:
+                roots.append(node)
+            nodes.append(node)
+        self._outlines[relative] = roots
+        return roots
+
+    def iter_files(self, folder=None, extension=None):
+        """Yield relative paths, optionally limited to one folder and/or extension"""
+        prefix = f"{folder}/" if folder else ''
+        for relative in self.files:
+            if relative.startswith(prefix) and (extension is None or relative.endswith(extension)):
+                yield relative
+
+    def business_class(self, relative):
+        """Build (and cache) the business class model of one file"""
+        if relative not in self._business_classes:
+            name = os.path.splitext(os.path.basename(relative))[0]
+            self._business_classes[relative] = build_business_class(name, self.outline(relative))
+        return self._business_classes[relative]
+
+    def root_texts(self, relative):
+        """Texts of a file's root nodes, without building Nodes"""
+        first, last = self.node_range(relative)
+        texts = self.node_texts(relative)
+        end = self.columns['end']
+        roots = []
+        index = first
+        while index < last:
+            roots.append(texts[index - first])
+            index = end[index]
+        return roots
+
+    def business_classes(self):
+        """Lazy {declared class name: model} over every business class in the snapshot
+
+        Keyed like load_business_classes: by the declared name, skipping empty
+        and comment-only placeholder files.
+        """
+        paths = {}
+        for relative in self.iter_files('business class'):
+            if relative.endswith(('.busclass', '.businessclass')):
+                texts = self.root_texts(relative)
+                index = definition_root(texts)
+                if index is not None:
+                    paths[definition_name(texts[index])] = relative
+        return LazyModels(paths, self.business_class)
+
+    def key_field_definitions(self):
+        """Return {name: unflattened definition} for every key field"""
+        from key_field_resolver import build_key_field
+        definitions = {}
+        for relative in self.iter_files('key field', '.field'):
+            name = os.path.splitext(os.path.basename(relative))[0]
+            definition = build_key_field(self.outline(relative), name)
+            definitions[definition['name'] or name] = definition
+        return definitions
+
+    def stale_files(self, references_dir=None):
+        """Return relative paths added, removed or modified since the snapshot was built"""
+        references_dir = references_dir or self.references_dir
+        sizes, mtimes = self.columns['file_size'], self.columns['file_mtime']
+        stale = []
+        current = set()
+        for relative, path in iter_reference_files(references_dir):
+            relative = relative.replace(os.sep, '/')
+            current.add(relative)
+            number = self.file_index.get(relative)
+            if number is None:
+                stale.append(relative)
+                continue
+            if file_status(path) != (sizes[number], mtimes[number]):
+                stale.append(relative)
+        stale.extend(relative for relative in self.files if relative not in current)
+        return stale
+
+
+_open_snapshots = {}
+
+
+def load_snapshot(snapshot_file=SNAPSHOT_FILE):
+    """Open a snapshot once per process"""
+    if snapshot_file not in _open_snapshots:
+        _open_snapshots[snapshot_file] = CorpusSnapshot(snapshot_file)
+    return _open_snapshots[snapshot_file]
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'info'):
+        print(__doc__)
+        return
+
+    if sys.argv[1] == 'build':
+        references_dir = sys.argv[2] if len(sys.argv) > 2 else REFERENCES_DIR
+        snapshot_file = sys.argv[3] if len(sys.argv) > 3 else SNAPSHOT_FILE
+        start = time.perf_counter()
+        stats = build_snapshot(references_dir, snapshot_file)
+        print(f"Snapshot of {stats['files']:,} files built in {time.perf_counter() - start:.1f}s")
+        print(f"- Outline nodes: {stats['nodes']:,}")
+        print(f"- Distinct identifiers: {stats['symbols']:,} ({stats['occurrences']:,} occurrences)")
+        print(f"- Size: {stats['bytes'] / 1048576:.1f} MB")
+        print(f"Saved to: {snapshot_file}")
+        return
+
+    snapshot_file = sys.argv[2] if len(sys.argv) > 2 else SNAPSHOT_FILE
+    start = time.perf_counter()
+    snapshot = load_snapshot(snapshot_file)
+    elapsed = time.perf_counter() - start
+    folders = {}
+    for relative in snapshot.files:
+        folder = relative.rpartition('/')[0] or '.'
+        folders[folder] = folders.get(folder, 0) + 1
+    print(f"Snapshot: {snapshot_file} (version {SNAPSHOT_VERSION}, loaded in {elapsed:.2f}s)")
+    print(f"- Built from: {snapshot.references_dir} at {time.ctime(snapshot.created)}")
+    print(f"- Files: {len(snapshot):,}, outline nodes: {len(snapshot.columns['line']):,}, "
+          f"identifiers: {len(snapshot.symbols):,}")
+    for folder, count in sorted(folders.items()):
+        print(f"  {folder}: {count:,}")
+
+
+if __name__ == "__main__":
+    main()
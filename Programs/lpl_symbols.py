@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Shared symbol table for identifiers across the References corpus.
+
+Names like Company, PurchaseOrder and FinanceEnterpriseGroup recur hundreds
+of thousands of times. SymbolTable interns each identifier once and hands
+out small integer IDs; per-file symbol lists are stored as array('I') so a
+whole-corpus scan keeps ints instead of fresh str objects and hot loops can
+compare and count by integer.
+"""
+
+import re
+import sys
+from array import array
+
+from corpus_pack import walk_files
+from lpl_config import REFERENCES_DIR, output_file
+from prefetch_loader import prefetch
+
+OUTPUT_FILE = output_file('symbol_table_analysis.txt')
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+STRING_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"')
+
+REFERENCE_EXTENSIONS = ('.busclass', '.businessclass', '.field', '.list', '.form', '.cardview',
+                        '.menu', '.page', '.securityclass', '.useraction')
+
+
+class SymbolTable:
+    """Bidirectional identifier <-> integer ID mapping"""
+
+    def __init__(self, names=()):
+        self._ids = {}
+        self._names = []
+        for name in names:
+            self.intern(name)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._ids
+
+    def intern(self, name):
+        """Return the ID for name, assigning the next ID on first sight"""
+        symbol = self._ids.get(name)
+        if symbol is None:
+            symbol = len(self._names)
+            name = sys.intern(name)
+            self._ids[name] = symbol
+            self._names.append(name)
+        return symbol
+
+    def intern_many(self, names):
+        """Intern an iterable of names into an array('I') of IDs"""
+        intern = self.intern
+        return array('I', [intern(name) for name in names])
+
+    def lookup(self, name):
+        """Return the ID for name, or None without interning"""
+        return self._ids.get(name)
+
+    def name(self, symbol):
+        """Return the identifier for an ID"""
+        return self._names[symbol]
+
+    def names(self, symbols):
+        """Decode a sequence of IDs back to identifiers"""
+        return [self._names[symbol] for symbol in symbols]
+
+    def to_list(self):
+        """Return the identifiers in ID order (for persisting the table)"""
+        return list(self._names)
+
+
+def file_symbols(table, content):
+    """Intern every identifier of an LPL source text (string literals skipped)"""
+    return table.intern_many(IDENTIFIER_PATTERN.findall(STRING_PATTERN.sub(' ', content)))
+
+
+def iter_reference_files(references_dir):
+    """Yield (relative path, path) for every reference artifact, on disk or inside a pack"""
+    for relative, path in walk_files(references_dir):
+        if relative.endswith(REFERENCE_EXTENSIONS):
+            yield relative, path
+
+
+def scan_corpus_symbols(references_dir=REFERENCES_DIR, table=None):
+    """Intern identifiers of every reference file; return (table, {relative path: array of IDs})"""
+    table = table if table is not None else SymbolTable()
+    relatives = {path: relative for relative, path in iter_reference_files(references_dir)}
+    per_file = {}
+    for path, content, error in prefetch(relatives):
+        if error is not None:
+            print(f"Error processing {relatives[path]}: {error}")
+            continue
+        per_file[relatives[path]] = file_symbols(table, content)
+    return table, per_file
+
+
+def symbol_counts(table, per_file):
+    """Count occurrences per symbol ID in an integer-indexed array"""
+    counts = array('Q', bytes(8 * len(table)))
+    for symbols in per_file.values():
+        for symbol in symbols:
+            counts[symbol] += 1
+    return counts
+
+
+def estimate_memory(table, per_file):
+    """Compare bytes used by ID arrays against equivalent per-occurrence str lists"""
+    array_bytes = sum(symbols.itemsize * len(symbols) + 64 for symbols in per_file.values())
+    table_bytes = sum(sys.getsizeof(name) for name in table.to_list()) + sys.getsizeof(table._ids) + sys.getsizeof(table._names)
+    str_bytes = 0
+    for symbols in per_file.values():
+        # A list of fresh strings costs a pointer plus a str object per occurrence
+        str_bytes += 56 + 8 * len(symbols) + sum(sys.getsizeof(table.name(symbol)) for symbol in symbols)
+    return array_bytes + table_bytes, str_bytes
+
+
+def main():
+    references_dir = sys.argv[1] if len(sys.argv) > 1 else REFERENCES_DIR
+    print("Interning identifiers across the References corpus...")
+    table, per_file = scan_corpus_symbols(references_dir)
+    counts = symbol_counts(table, per_file)
+    total = sum(counts)
+    interned_bytes, str_bytes = estimate_memory(table, per_file)
+
+    report = f"=== SYMBOL TABLE ANALYSIS ({len(per_file):,} files) ===\n\n"
+    report += "Statistics:\n"
+    report += f"- Identifier occurrences: {total:,}\n"
+    report += f"- Distinct identifiers: {len(table):,}\n"
+    report += f"- Interned storage: {interned_bytes / 1048576:.1f} MB\n"
+    report += f"- Equivalent str lists: {str_bytes / 1048576:.1f} MB\n"
+    report += f"- Savings: {(1 - interned_bytes / str_bytes) * 100 if str_bytes else 0:.1f}%\n\n"
+
+    report += "Top 30 Identifiers:\n"
+    top = sorted(range(len(counts)), key=counts.__getitem__, reverse=True)[:30]
+    for symbol in top:
+        report += f"  {table.name(symbol)}: {counts[symbol]:,}\n"
+
+    print(report)
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        f.write(report)
+    print(f"Detailed results saved to: {OUTPUT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Persistent menu navigation graph with precomputed reachability ("all pages
+reachable from APClerk", "which menus expose page X").
+
+Every Menu Item in References/menu links its menu to a page, menu, list,
+form, action or link; pages in References/page add their own page and menu
+links. Reachability is computed once over the strongly connected components
+of that graph (so menu cycles are safe) and kept as Python int bitsets in
+both directions.
+
+Usage:
+    python menu_reachability.py build [menu dir] [page dir]
+    python menu_reachability.py from APClerk [--kind Page]
+    python menu_reachability.py to APClerkInvoicesPage [--kind Menu]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+from corpus_pack import listdir
+from lpl_config import output_file, reference_dir
+from lpl_graph import strongly_connected_components
+from lpl_outline import definition_name, parse_outline
+from prefetch_loader import prefetch
+
+MENU_DIR = reference_dir('menu')
+PAGE_DIR = reference_dir('page')
+REACHABILITY_FILE = output_file('menu_reachability.json')
+
+MENU_LINK_PATTERN = re.compile(r'(page|menu|list|form|action|link)\s+is\s+(\S+)')
+PAGE_LINK_PATTERN = re.compile(r'(page|menu)\s+is\s+(\w+)\s*$')
+
+
+def node_name(kind, name):
+    """Graph node label, e.g. 'Menu APClerk' or 'List PayablesInvoice.primary'"""
+    return f"{kind.capitalize()} {name}"
+
+
+def build_navigation_graph(menu_dir=MENU_DIR, page_dir=PAGE_DIR):
+    """Collect {node: [linked nodes]} from every menu and page"""
+    edges = defaultdict(list)
+    sources = [(menu_dir, '.menu', 'Menu', MENU_LINK_PATTERN), (page_dir, '.page', 'Page', PAGE_LINK_PATTERN)]
+    for directory, extension, kind, pattern in sources:
+        paths = sorted(os.path.join(directory, name) for name in listdir(directory) if name.endswith(extension))
+        for path, content, error in prefetch(paths):
+            try:
+                if error is not None:
+                    raise error
+                for root in parse_outline(content):
+                    if not root.text.endswith(f"is a {kind}"):
+                        continue
+                    source = node_name(kind, definition_name(root.text))
+                    links = edges[source]
+                    for node in root.walk():
+                        match = pattern.match(node.text)
+                        if match:
+                            target = node_name(*match.groups())
+                            if target != source and target not in links:
+                                links.append(target)
+            except Exception as e:
+                print(f"Error processing {os.path.basename(path)}: {e}")
+    return dict(edges)
+
+
+def compute_reachability(edges):
+    """Return (nodes, forward bitsets, reverse bitsets) with nodes that link first"""
+    nodes = sorted(edges) + sorted({target for links in edges.values() for target in links} - set(edges))
+    index = {node: position for position, node in enumerate(nodes)}
+    forward = [0] * len(nodes)
+    # Components arrive sinks first, so every successor's reach is final before it is needed
+    for component in strongly_connected_components(edges, trivial=True):
+        members = {index[node] for node in component}
+        reach = 0
+        for node in component:
+            for target in edges.get(node, ()):
+                position = index[target]
+                reach |= (1 << position) | (0 if position in members else forward[position])
+        for position in members:
+            forward[position] = reach
+    reverse = [0] * len(nodes)
+    for source, bits in enumerate(forward):
+        bit = 1 << source
+        for target in iter_bits(bits):
+            reverse[target] |= bit
+    return nodes, forward, reverse
+
+
+def iter_bits(bits):
+    """Yield the index of every set bit, lowest first"""
+    text = format(bits, 'b')[::-1]
+    index = text.find('1')
+    while index != -1:
+        yield index
+        index = text.find('1', index + 1)
+
+
+def save_reachability(edges, reachability_file=REACHABILITY_FILE):
+    """Persist the graph and its reachability bitsets as JSON"""
+    nodes, forward, reverse = compute_reachability(edges)
+    with open(reachability_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'nodes': nodes, 'edges': edges,
+                   'forward': [format(bits, 'x') for bits in forward],
+                   'reverse': [format(bits, 'x') for bits in reverse]}, f, separators=(',', ':'))
+    return NavigationReachability(nodes, edges, forward, reverse)
+
+
+def load_reachability(reachability_file=REACHABILITY_FILE):
+    """Load persisted reachability"""
+    with open(reachability_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return NavigationReachability(data['nodes'], data['edges'], [int(bits, 16) for bits in data['forward']],
+                                  [int(bits, 16) for bits in data['reverse']])
+
+
+class NavigationReachability:
+    """Forward and reverse reachability over the menu navigation graph"""
+
+    def __init__(self, nodes, edges, forward, reverse):
+        self.nodes = nodes
+        self.edges = edges
+        self.forward = forward
+        self.reverse = reverse
+        self.index = {node: position for position, node in enumerate(nodes)}
+
+    def resolve(self, name):
+        """Node for a label or a bare menu / page name"""
+        if name in self.index:
+            return name
+        return next((node_name(kind, name) for kind in ('Menu', 'Page', 'List', 'Form', 'Action', 'Link')
+                     if node_name(kind, name) in self.index), None)
+
+    def _select(self, bitsets, name, kind):
+        node = self.resolve(name)
+        if node is None:
+            return None, []
+        found = [self.nodes[position] for position in iter_bits(bitsets[self.index[node]])]
+        if kind:
+            found = [item for item in found if item.startswith(node_name(kind, ''))]
+        return node, found
+
+    def reachable_from(self, name, kind=None):
+        """(node, everything reachable from it), optionally only one kind"""
+        return self._select(self.forward, name, kind)
+
+    def reaching(self, name, kind=None):
+        """(node, every menu or page it is reachable from), optionally only one kind"""
+        return self._select(self.reverse, name, kind)
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'from', 'to'):
+        print(__doc__)
+        return
+
+    if sys.argv[1] == 'build':
+        menu_dir = sys.argv[2] if len(sys.argv) > 2 else MENU_DIR
+        page_dir = sys.argv[3] if len(sys.argv) > 3 else PAGE_DIR
+        start = time.perf_counter()
+        edges = build_navigation_graph(menu_dir, page_dir)
+        reachability = save_reachability(edges)
+        print(f"Navigation graph: {len(reachability.nodes):,} nodes, "
+              f"{sum(len(links) for links in edges.values()):,} links "
+              f"({time.perf_counter() - start:.1f}s)")
+        print(f"Saved to: {REACHABILITY_FILE}")
+        return
+
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return
+    kind = sys.argv[sys.argv.index('--kind') + 1] if '--kind' in sys.argv[:-1] else None
+    reachability = load_reachability()
+    start = time.perf_counter()
+    if sys.argv[1] == 'from':
+        node, found = reachability.reachable_from(sys.argv[2], kind)
+    else:
+        node, found = reachability.reaching(sys.argv[2], kind)
+    elapsed = (time.perf_counter() - start) * 1000
+    if node is None:
+        print(f"{sys.argv[2]} is not in the navigation graph")
+        return
+    direction = 'reachable from' if sys.argv[1] == 'from' else 'reaching'
+    print(f"{len(found):,} {kind or 'node'}s {direction} {node}:")
+    for item in found:
+        print(f"  {item}")
+    print(f"Query time: {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
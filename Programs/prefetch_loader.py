@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Prefetching file loader that overlaps reference file I/O with parsing.
+
+prefetch() keeps up to `depth` reads in flight on a small thread pool while
+the caller parses the file it was just handed. Results come back in input
+order and a new read is only submitted when the caller takes a result, so a
+slow parser never lets more than `depth` files pile up in memory
+(back-pressure). depth=0 reads inline, one file at a time, like the original
+analyzers.
+
+Usage:
+    python prefetch_loader.py [business class dir] [--depth N] [--workers N] [--latency MS]
+    python prefetch_loader.py --check <packed business class dir> [business class dir]
+
+--latency adds an artificial delay to every read to mimic the network-mounted
+checkout and compares sequential loading against prefetching. --check loads
+a folder inside a .lplpack through the threaded prefetch and reports every
+business class that differs from loading the same folder on disk.
+"""
+
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from corpus_pack import read_text
+from lpl_config import reference_dir
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+
+DEFAULT_DEPTH = 32
+DEFAULT_WORKERS = 8
+
+_END = object()
+
+
+def prefetch(paths, read=read_text, depth=DEFAULT_DEPTH, workers=DEFAULT_WORKERS):
+    """Yield (path, content, error) in input order with up to depth reads running ahead.
+
+    error is the exception raised by read (content is then None); callers
+    report it and continue, as the analyzers do with failed opens.
+    """
+    paths = iter(paths)
+    if depth <= 0:
+        for path in paths:
+            try:
+                yield path, read(path), None
+            except Exception as e:
+                yield path, None, e
+        return
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, depth)), thread_name_prefix='prefetch')
+    pending = deque()
+    try:
+        for path in paths:
+            pending.append((path, pool.submit(read, path)))
+            if len(pending) >= depth:
+                break
+        while pending:
+            path, future = pending.popleft()
+            try:
+                content, error = future.result(), None
+            except Exception as e:
+                content, error = None, e
+            # Top the window back up before handing over, so I/O continues during parsing
+            next_path = next(paths, _END)
+            if next_path is not _END:
+                pending.append((next_path, pool.submit(read, next_path)))
+            yield path, content, error
+    finally:
+        # The caller may stop early; drop reads that have not started yet
+        for _, future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def delayed_reader(latency, read=read_text):
+    """Wrap read with a fixed per-file delay (simulated network latency)"""
+    def read_with_latency(path):
+        time.sleep(latency)
+        return read(path)
+    return read_with_latency
+
+
+def time_load(paths, read, depth, workers, parse):
+    """Parse every file through prefetch(); return (seconds, files parsed)"""
+    start = time.perf_counter()
+    parsed = 0
+    for path, content, error in prefetch(paths, read, depth, workers):
+        if error is not None:
+            print(f"Error processing {os.path.basename(path)}: {error}")
+            continue
+        parse(content, os.path.splitext(os.path.basename(path))[0])
+        parsed += 1
+    return time.perf_counter() - start, parsed
+
+
+def check_pack(pack_dir, disk_dir=BUSINESS_CLASS_DIR):
+    """Return business class names whose threaded pack load differs from the disk load"""
+    from lpl_business_class import load_business_classes
+
+    packed = load_business_classes(pack_dir)
+    on_disk = load_business_classes(disk_dir)
+    return sorted(name for name in packed.keys() | on_disk.keys()
+                  if comparable(packed.get(name)) != comparable(on_disk.get(name)))
+
+
+def comparable(value):
+    """Model value with outline nodes (compared by identity) turned into nested tuples"""
+    from lpl_outline import Node
+
+    if isinstance(value, Node):
+        return value.text, value.line, tuple(comparable(child) for child in value.children)
+    if isinstance(value, dict):
+        return {key: comparable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [comparable(item) for item in value]
+    return value
+
+
+def main():
+    from lpl_business_class import iter_business_class_files, parse_business_class
+
+    arguments = sys.argv[1:]
+    if arguments and arguments[0] == '--check':
+        if len(arguments) < 2:
+            print(__doc__)
+            return
+        differing = check_pack(*arguments[1:3])
+        for name in differing[:20]:
+            print(f"- {name}")
+        print(f"{len(differing):,} business classes differ between the pack and disk loads")
+        return
+    options = {'--depth': DEFAULT_DEPTH, '--workers': DEFAULT_WORKERS, '--latency': 0}
+    positional = []
+    while arguments:
+        argument = arguments.pop(0)
+        if argument in options and arguments:
+            options[argument] = float(arguments.pop(0)) if argument == '--latency' else int(arguments.pop(0))
+        else:
+            positional.append(argument)
+    directory = positional[0] if positional else BUSINESS_CLASS_DIR
+    paths = [path for _, path in iter_business_class_files(directory)]
+    read = delayed_reader(options['--latency'] / 1000) if options['--latency'] else read_text
+
+    print(f"Loading {len(paths):,} business classes "
+          f"(simulated latency {options['--latency']:g} ms per file)...")
+    sequential, parsed = time_load(paths, read, 0, 1, parse_business_class)
+    print(f"- Sequential: {sequential:.1f}s ({parsed / sequential if sequential else 0:,.0f} files/s)")
+    prefetched, parsed = time_load(paths, read, options['--depth'], options['--workers'], parse_business_class)
+    print(f"- Prefetch depth {options['--depth']}, {options['--workers']} workers: {prefetched:.1f}s "
+          f"({parsed / prefetched if prefetched else 0:,.0f} files/s)")
+    if prefetched:
+        print(f"Speedup: {sequential / prefetched:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
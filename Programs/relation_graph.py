@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Persistent relation graph over all business classes with cached
+shortest-path queries ("how do I get from PayablesInvoice to Vendor").
+
+Usage:
+    python relation_graph.py build [business class dir]
+    python relation_graph.py path PayablesInvoice Vendor [--cheapest]
+"""
+
+import heapq
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from functools import lru_cache
+
+from lpl_business_class import iter_business_class_files, parse_business_class
+from lpl_config import output_file, reference_dir
+from prefetch_loader import prefetch
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+GRAPH_FILE = output_file('relation_graph.json')
+
+PATH_CACHE_SIZE = 4096
+
+# Dijkstra weights: walking a one-to-many relation fans out, so prefer one-to-one hops
+RELATION_WEIGHTS = {'one-to-one': 1, 'many-to-one': 1, 'one-to-many': 3}
+
+
+def build_relation_graph(directory=BUSINESS_CLASS_DIR):
+    """Collect {class: [[relation, target, type], ...]} from every business class"""
+    edges = {}
+    paths = (path for _, path in iter_business_class_files(directory))
+    for path, content, error in prefetch(paths):
+        try:
+            if error is not None:
+                raise error
+            model = parse_business_class(content, os.path.splitext(os.path.basename(path))[0])
+        except Exception as e:
+            print(f"Error processing {os.path.basename(path)}: {e}")
+            continue
+        edges[model['name']] = [
+            [relation['name'], relation['target'], relation['type'] or 'set/unknown']
+            for relation in model['relations'].values() if relation['target']
+        ]
+    return edges
+
+
+def save_relation_graph(edges, graph_file=GRAPH_FILE):
+    """Persist the relation edges as JSON"""
+    with open(graph_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'edges': edges}, f, separators=(',', ':'))
+
+
+def load_relation_graph(graph_file=GRAPH_FILE):
+    """Load a persisted relation graph"""
+    with open(graph_file, 'r', encoding='utf-8') as f:
+        return RelationGraph(json.load(f)['edges'])
+
+
+class RelationGraph:
+    """Adjacency lists over business classes with LRU-cached path queries"""
+
+    def __init__(self, edges):
+        self.forward = defaultdict(list)
+        self.reverse = defaultdict(list)
+        for source, relations in edges.items():
+            for relation, target, relation_type in relations:
+                weight = RELATION_WEIGHTS.get(relation_type, 1)
+                self.forward[source].append((target, relation, weight))
+                self.reverse[target].append((source, relation, weight))
+        self.classes = set(edges) | set(self.reverse)
+        # Per-instance caches so rebuilding the graph never serves stale paths
+        self.shortest_path = lru_cache(maxsize=PATH_CACHE_SIZE)(self._shortest_path)
+        self.cheapest_path = lru_cache(maxsize=PATH_CACHE_SIZE)(self._cheapest_path)
+
+    def relation_count(self):
+        return sum(len(relations) for relations in self.forward.values())
+
+    def _shortest_path(self, source, target):
+        """Fewest-hop relation chain via bidirectional BFS; returns a tuple of hops or None"""
+        if source not in self.classes or target not in self.classes:
+            return None
+        if source == target:
+            return ()
+        # parents map a class to (previous class, relation) on its side of the search
+        forward_parents = {source: None}
+        reverse_parents = {target: None}
+        forward_frontier = [source]
+        reverse_frontier = [target]
+        while forward_frontier and reverse_frontier:
+            if len(forward_frontier) <= len(reverse_frontier):
+                forward_frontier, meeting = self._expand(forward_frontier, self.forward, forward_parents, reverse_parents)
+            else:
+                reverse_frontier, meeting = self._expand(reverse_frontier, self.reverse, reverse_parents, forward_parents)
+            if meeting is not None:
+                return self._join(meeting, forward_parents, reverse_parents)
+        return None
+
+    @staticmethod
+    def _expand(frontier, adjacency, parents, other_parents):
+        """Advance one BFS level; return (next frontier, meeting class or None)"""
+        next_frontier = []
+        for node in frontier:
+            for neighbor, relation, weight in adjacency.get(node, ()):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (node, relation)
+                if neighbor in other_parents:
+                    return next_frontier, neighbor
+                next_frontier.append(neighbor)
+        return next_frontier, None
+
+    @staticmethod
+    def _join(meeting, forward_parents, reverse_parents):
+        """Stitch the two half paths into (source class, relation, target class) hops"""
+        hops = []
+        node = meeting
+        while forward_parents[node] is not None:
+            previous, relation = forward_parents[node]
+            hops.append((previous, relation, node))
+            node = previous
+        hops.reverse()
+        node = meeting
+        while reverse_parents[node] is not None:
+            following, relation = reverse_parents[node]
+            hops.append((node, relation, following))
+            node = following
+        return tuple(hops)
+
+    def _cheapest_path(self, source, target):
+        """Lowest-weight relation chain via Dijkstra (one-to-many hops cost more)"""
+        if source not in self.classes or target not in self.classes:
+            return None
+        best = {source: 0}
+        parents = {source: None}
+        queue = [(0, source)]
+        while queue:
+            cost, node = heapq.heappop(queue)
+            if node == target:
+                hops = []
+                while parents[node] is not None:
+                    previous, relation = parents[node]
+                    hops.append((previous, relation, node))
+                    node = previous
+                return tuple(reversed(hops))
+            if cost > best[node]:
+                continue
+            for neighbor, relation, weight in self.forward.get(node, ()):
+                new_cost = cost + weight
+                if new_cost < best.get(neighbor, float('inf')):
+                    best[neighbor] = new_cost
+                    parents[neighbor] = (node, relation)
+                    heapq.heappush(queue, (new_cost, neighbor))
+        return None
+
+
+def format_path(hops):
+    """Render hops as an LPL relation chain, e.g. PayablesInvoice.VendorRel -> Vendor"""
+    if hops is None:
+        return "No relation path found"
+    if not hops:
+        return "Same class"
+    chain = hops[0][0] + '.' + '.'.join(relation for _, relation, _ in hops)
+    steps = ' -> '.join(f"{source}.{relation} -> {target}" for source, relation, target in hops)
+    return f"{chain}\n  ({len(hops)} hops: {steps})"
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'path'):
+        print(__doc__)
+        return
+
+    if sys.argv[1] == 'build':
+        directory = sys.argv[2] if len(sys.argv) > 2 else BUSINESS_CLASS_DIR
+        start = time.perf_counter()
+        edges = build_relation_graph(directory)
+        save_relation_graph(edges)
+        graph = RelationGraph(edges)
+        print(f"Relation graph: {len(graph.classes):,} classes, {graph.relation_count():,} relations "
+              f"({time.perf_counter() - start:.1f}s)")
+        print(f"Saved to: {GRAPH_FILE}")
+        return
+
+    if len(sys.argv) < 4:
+        print(__doc__)
+        return
+    source, target = sys.argv[2], sys.argv[3]
+    graph = load_relation_graph()
+    start = time.perf_counter()
+    if '--cheapest' in sys.argv:
+        hops = graph.cheapest_path(source, target)
+    else:
+        hops = graph.shortest_path(source, target)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{source} -> {target}: {format_path(hops)}")
+    print(f"Query time: {elapsed:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
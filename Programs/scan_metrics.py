@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Throughput and progress instrumentation shared by the corpus scanners.
+
+ScanMetrics times named phases (read, tokenize, analyze, report), counts
+files and bytes, prints a progress line with files/s, MB/s and ETA at most
+every few seconds, and keeps the N slowest files with their per-phase
+breakdown so pathological reference files stand out. finish() prints a
+summary and writes the same numbers to a JSON metrics file.
+
+Garbage collector pauses land on whichever file happens to allocate when a
+collection triggers, so they are measured through gc.callbacks, taken out
+of every phase and file time, and reported as their own 'gc' phase.
+
+    metrics = ScanMetrics('derived field dependencies', total_files=len(paths))
+    for path, content, error in metrics.timed(prefetch(paths), 'read'):
+        with metrics.file(path, len(content)):
+            with metrics.phase('tokenize'):
+                roots = parse_outline(content)
+            with metrics.phase('analyze'):
+                ...
+    metrics.finish(output_file('derived_field_dependencies_metrics.json'))
+"""
+
+import gc
+import heapq
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+PROGRESS_INTERVAL = 2.0
+SLOWEST_FILES = 10
+
+_gc_total = 0.0
+_gc_started = None
+
+
+def _on_gc(event, info):
+    global _gc_total, _gc_started
+    if event == 'start':
+        _gc_started = time.perf_counter()
+    elif _gc_started is not None:
+        _gc_total += time.perf_counter() - _gc_started
+        _gc_started = None
+
+
+gc.callbacks.append(_on_gc)
+
+
+def gc_seconds():
+    """Seconds spent in garbage collection since this module was imported"""
+    return _gc_total
+
+
+def format_duration(seconds):
+    """0:07 / 1:02:03 style duration"""
+    seconds = int(max(0, seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+class ScanMetrics:
+    """Per-phase timers, throughput counters, ETA and slowest-file tracking for one scan"""
+
+    def __init__(self, name, total_files=None, total_bytes=None, slowest=SLOWEST_FILES,
+                 interval=PROGRESS_INTERVAL, stream=None):
+        self.name = name
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.slowest = slowest
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.files = 0
+        self.bytes = 0
+        self.errors = 0
+        self.phases = {}
+        self._slowest = []
+        self._current = None
+        self._counter = 0
+        self.start = time.perf_counter()
+        self._last_progress = self.start
+        # Rates and ETA count from the first file, not from setup work before the scan
+        self._rate_start = None
+        self.end = None
+        self._gc_mark = gc_seconds()
+
+    def _add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        if self._current is not None:
+            self._current[name] = self._current.get(name, 0.0) + seconds
+
+    def _gc_pause(self, gc_started):
+        """Collector seconds since gc_started; any not yet charged go to the gc phase
+
+        Nested blocks end innermost first, so each pause is charged once.
+        """
+        now = gc_seconds()
+        uncharged = now - max(self._gc_mark, gc_started)
+        if uncharged > 0:
+            self._add_phase('gc', uncharged)
+        self._gc_mark = now
+        return now - gc_started
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block into a named phase (and into the current file's breakdown)"""
+        started, gc_started = time.perf_counter(), gc_seconds()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._add_phase(name, elapsed - self._gc_pause(gc_started))
+
+    def timed(self, iterable, name):
+        """Yield from iterable, charging the time spent waiting for each item to phase name"""
+        iterator = iter(iterable)
+        while True:
+            started, gc_started = time.perf_counter(), gc_seconds()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                elapsed = time.perf_counter() - started
+                self._add_phase(name, elapsed - self._gc_pause(gc_started))
+                return
+            elapsed = time.perf_counter() - started
+            self._add_phase(name, elapsed - self._gc_pause(gc_started))
+            yield item
+
+    @contextmanager
+    def file(self, name, size=0):
+        """Time the processing of one file; counts it and updates progress on exit"""
+        outer = self._current
+        self._current = {}
+        started, gc_started = time.perf_counter(), gc_seconds()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            elapsed -= self._gc_pause(gc_started)
+            phases, self._current = self._current, outer
+            self.add_file(name, size, elapsed, phases)
+
+    def add_file(self, name, size=0, seconds=0.0, phases=None):
+        """Record a processed file (for callers that time files themselves)"""
+        if self._rate_start is None:
+            self._rate_start = time.perf_counter() - seconds
+        self.files += 1
+        self.bytes += size
+        self._counter += 1
+        entry = (seconds, self._counter, os.fspath(name), size, phases or {})
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, entry)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+        self.progress()
+
+    def add_error(self):
+        self.errors += 1
+
+    def elapsed(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def scan_elapsed(self):
+        """Seconds since the first file started"""
+        return (self.end or time.perf_counter()) - (self._rate_start or self.start)
+
+    def eta(self):
+        """Seconds remaining, estimated from bytes when the total size is known, else from files"""
+        elapsed = self.scan_elapsed()
+        if self.total_bytes and self.bytes:
+            return elapsed * (self.total_bytes - self.bytes) / self.bytes
+        if self.total_files and self.files:
+            return elapsed * (self.total_files - self.files) / self.files
+        return None
+
+    def progress(self, force=False):
+        """Print one progress line if the interval has passed"""
+        now = time.perf_counter()
+        if not force and now - self._last_progress < self.interval:
+            return
+        self._last_progress = now
+        elapsed = max(self.scan_elapsed(), 1e-9)
+        done = f"{self.files:,}/{self.total_files:,} ({self.files / self.total_files * 100:.0f}%)" \
+            if self.total_files else f"{self.files:,}"
+        eta = self.eta()
+        print(f"[{self.name}] {done} files, {self.files / elapsed:,.0f} files/s, "
+              f"{self.bytes / 1048576 / elapsed:.1f} MB/s"
+              + (f", ETA {format_duration(eta)}" if eta is not None else ''), file=self.stream, flush=True)
+
+    def slowest_files(self):
+        """Slowest files, slowest first"""
+        return [{'file': name, 'seconds': round(seconds, 6), 'bytes': size,
+                 'phases': {phase: round(value, 6) for phase, value in phases.items()}}
+                for seconds, _, name, size, phases in sorted(self._slowest, reverse=True)]
+
+    def summary(self):
+        """All metrics as a JSON-serializable dict"""
+        elapsed = max(self.elapsed(), 1e-9)
+        return {
+            'scan': self.name,
+            'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time() - self.elapsed())),
+            'elapsed_seconds': round(elapsed, 3),
+            'files': self.files,
+            'errors': self.errors,
+            'bytes': self.bytes,
+            'files_per_second': round(self.files / elapsed, 1),
+            'mb_per_second': round(self.bytes / 1048576 / elapsed, 2),
+            'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            'slowest_files': self.slowest_files(),
+        }
+
+    def format_summary(self):
+        summary = self.summary()
+        lines = [f"=== SCAN METRICS: {self.name} ===",
+                 f"- Files: {summary['files']:,} ({summary['errors']} errors), "
+                 f"{summary['bytes'] / 1048576:.1f} MB in {format_duration(summary['elapsed_seconds'])}",
+                 f"- Throughput: {summary['files_per_second']:,} files/s, {summary['mb_per_second']} MB/s"]
+        if summary['phases']:
+            lines.append("- Phases:")
+            for name, seconds in sorted(summary['phases'].items(), key=lambda x: x[1], reverse=True):
+                lines.append(f"    {name}: {seconds:.2f}s ({seconds / summary['elapsed_seconds'] * 100:.0f}%)")
+        if summary['slowest_files']:
+            lines.append(f"- Slowest {len(summary['slowest_files'])} files:")
+            for entry in summary['slowest_files']:
+                breakdown = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in entry['phases'].items())
+                lines.append(f"    {os.path.basename(entry['file'])}: {entry['seconds'] * 1000:.0f}ms, "
+                             f"{entry['bytes'] / 1024:.0f} KB" + (f" ({breakdown})" if breakdown else ''))
+        return '\n'.join(lines)
+
+    def finish(self, metrics_file=None):
+        """Stop the clock, print the summary and optionally write the JSON metrics file"""
+        self.end = time.perf_counter()
+        print(self.format_summary(), file=self.stream)
+        if metrics_file:
+            with open(metrics_file, 'w', encoding='utf-8') as f:
+                json.dump(self.summary(), f, indent=2)
+            print(f"Metrics saved to: {metrics_file}", file=self.stream)
+        return self.summary()
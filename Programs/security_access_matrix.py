@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Compile the Access Rights of every .securityclass into a (security class x
+resource) bitset matrix with conditional-grant flags.
+
+A resource is a business class action (PayablesInvoice.Release, state actions
+as Unreleased.Release), a class's inquiries or audit views, or any other
+secured object (Menu, WebApp, BusinessTask, Field, KeyField...). Module
+grants expand to every class owned by the module, "all creates/updates/
+deletes" to the actions of that type, and "is not accessible" rules are
+applied after all grants of the same security class.
+
+The matrix is kept twice as Python int bitsets: per security class over the
+resources and per resource over the security classes, so "who can run X",
+"what can S run" and intersections of either are single bit operations.
+
+Usage:
+    python security_access_matrix.py build [business class dir or .lplsnap] [security class dir]
+    python security_access_matrix.py who PayablesInvoice.Release [more resources...]
+    python security_access_matrix.py what AP_PayablesInvoiceProcessing_ST [PayablesInvoice]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+from corpus_pack import listdir
+from lpl_business_class import load_business_classes
+from lpl_config import output_file, reference_dir
+from lpl_outline import definition_name, parse_outline
+from prefetch_loader import prefetch
+from scan_metrics import ScanMetrics
+
+BUSINESS_CLASS_DIR = reference_dir('business class')
+SECURITY_CLASS_DIR = reference_dir('security class')
+MATRIX_FILE = output_file('security_access_matrix.json')
+METRICS_FILE = output_file('security_access_matrix_metrics.json')
+
+INQUIRIES = '(inquiries)'
+AUDIT_VIEWS = '(audit views)'
+# "all actions" covers the defined actions and the standard inquiries, not audit views
+ALL_ACTIONS = 'all actions'
+ACTION_GROUPS = {'all creates': 'create', 'all updates': 'update', 'all deletes': 'delete'}
+
+RULE_PATTERN = re.compile(r'(?:is|are)\s+(not\s+)?accessible\b|grants\s+access\b')
+ALL_FIELDS_PATTERN = re.compile(r'All Fields for (\w+)$')
+
+
+def action_catalog(models):
+    """Return ({class: owning module}, {class: {action: create/update/delete/other}})
+
+    State actions are named State.Action, the way security classes exclude them.
+    """
+    owners, actions = {}, {}
+    for class_name, model in models.items():
+        owner = next((text[len('owned by '):].strip() for text in model['sections'] if text.startswith('owned by ')),
+                     None)
+        owners[class_name] = owner
+        actions[class_name] = {name: action_kind(action['type']) for name, action in model['actions'].items()}
+    return owners, actions
+
+
+def action_kind(action_type):
+    word = (action_type or '').split(' ', 1)[0].lower()
+    return word if word in ('create', 'update', 'delete') else 'other'
+
+
+def split_items(text):
+    return [item.strip() for item in text.split(',') if item.strip()]
+
+
+def parse_rule(node):
+    """Describe one 'is accessible' / 'is not accessible' / 'grants access' block"""
+    rule = {'deny': bool(RULE_PATTERN.match(node.text).group(1)), 'actions': [], 'excluding': [],
+            'condition': None, 'line': node.line}
+    for child in node.walk():
+        text = child.text
+        if text.startswith('for '):
+            rule['actions'].extend(split_items(text[4:]))
+        elif text.startswith('excluding'):
+            rule['excluding'].extend(split_items(text[len('excluding'):]))
+            rule['excluding'].extend(item for grandchild in child.children for item in split_items(grandchild.text))
+        elif text.startswith('when'):
+            rule['condition'] = text[4:].strip()
+    return rule
+
+
+def parse_security_class(content):
+    """Return (security class name, [(target kind, target name, rule)...]) for one .securityclass"""
+    roots = parse_outline(content)
+    root = next((node for node in roots if node.text.endswith('is a SecurityClass')), None)
+    if root is None:
+        return None, []
+    grants = []
+    rights = root.child('Access Rights')
+    for target in rights.children if rights is not None else []:
+        parts = target.text.rsplit(None, 1)
+        if len(parts) != 2:
+            continue
+        name, kind = parts
+        match = ALL_FIELDS_PATTERN.match(name)
+        if match:
+            # Field-level rules ("All Fields for Actor BusinessClass") secure fields, not actions
+            kind, name = 'Field', f"{match.group(1)}.*"
+        for child in target.children:
+            if RULE_PATTERN.match(child.text):
+                grants.append((kind, name, parse_rule(child)))
+    return definition_name(root.text), grants
+
+
+def class_columns(class_name, actions, selected, excluding):
+    """Resources of one business class selected by a rule's for / excluding lists"""
+    catalog = actions.get(class_name, {})
+
+    def expand(items):
+        columns = set()
+        for item in items:
+            if item == ALL_ACTIONS:
+                columns.update(catalog)
+                columns.add(INQUIRIES)
+            elif item == 'all inquiries':
+                columns.add(INQUIRIES)
+            elif item == 'all audit views':
+                columns.add(AUDIT_VIEWS)
+            elif item in ACTION_GROUPS:
+                columns.update(name for name, kind in catalog.items() if kind == ACTION_GROUPS[item])
+            elif item in catalog:
+                columns.add(item)
+            else:
+                # A bare action name also names the state actions it is defined as
+                columns.update(name for name in catalog if name.endswith('.' + item))
+        return columns
+
+    return {f"{class_name}.{column}" for column in expand(selected) - expand(excluding)}
+
+
+class AccessMatrix:
+    """Security class x resource bitsets with conditional-grant flags"""
+
+    def __init__(self, security_classes, resources, granted, conditional, conditions, owners):
+        self.security_classes = security_classes
+        self.resources = resources
+        self.granted = granted
+        self.conditional = conditional
+        self.conditions = conditions
+        self.owners = owners
+        self.class_index = {name: index for index, name in enumerate(security_classes)}
+        self.resource_index = {name: index for index, name in enumerate(resources)}
+        self.resource_granted = [0] * len(resources)
+        self.resource_conditional = [0] * len(resources)
+        for row, (grant_bits, conditional_bits) in enumerate(zip(granted, conditional)):
+            bit = 1 << row
+            for column in iter_bits(grant_bits):
+                self.resource_granted[column] |= bit
+            for column in iter_bits(conditional_bits):
+                self.resource_conditional[column] |= bit
+
+    def business_class_mask(self, class_name):
+        """Bitset over every resource of a business class (resources are sorted, so it is one range)"""
+        start = bisect_left(self.resources, class_name + '.')
+        end = bisect_right(self.resources, class_name + '.\uffff')
+        return ((1 << (end - start)) - 1) << start
+
+    def who(self, *resources):
+        """(unconditional, conditional) bitsets of the security classes granting every resource"""
+        granted, conditional = -1, 0
+        for resource in resources:
+            indexes = self.matching(resource)
+            if not indexes:
+                return 0, 0
+            # PayablesInvoice.Release names every state's Release action: any of them will do
+            resource_granted = resource_conditional = 0
+            for index in indexes:
+                resource_granted |= self.resource_granted[index]
+                resource_conditional |= self.resource_conditional[index]
+            granted &= resource_granted
+            conditional |= resource_conditional
+        return granted & ~conditional, granted & conditional
+
+    def matching(self, resource):
+        """Indexes of a resource, or of the state actions a Class.Action name stands for"""
+        if resource in self.resource_index:
+            return [self.resource_index[resource]]
+        class_name, _, action = resource.partition('.')
+        start = bisect_left(self.resources, class_name + '.')
+        end = bisect_right(self.resources, class_name + '.\uffff')
+        return [index for index in range(start, end) if self.resources[index].endswith('.' + action)] if action else []
+
+    def what(self, security_class, business_class=None):
+        """(unconditional, conditional) bitsets of the resources a security class grants"""
+        row = self.class_index.get(security_class)
+        if row is None:
+            return 0, 0
+        mask = self.business_class_mask(business_class) if business_class else -1
+        granted, conditional = self.granted[row] & mask, self.conditional[row] & mask
+        return granted & ~conditional, granted & conditional
+
+    def names(self, bits, names):
+        return [names[index] for index in iter_bits(bits)]
+
+    def grant_conditions(self, security_class, resource):
+        """Conditions a security class attaches to its grants on a resource's class (or module)"""
+        conditions = self.conditions.get(security_class, {})
+        class_name = resource.split('.')[0]
+        target = f"BusinessClass {class_name}"
+        if target in conditions:
+            return conditions[target]
+        module = f"Module {self.owners.get(class_name)}"
+        if module in conditions:
+            return conditions[module]
+        return conditions.get(resource, [])
+
+
+def iter_bits(bits):
+    """Yield the index of every set bit, lowest first"""
+    text = format(bits, 'b')[::-1]
+    index = text.find('1')
+    while index != -1:
+        yield index
+        index = text.find('1', index + 1)
+
+
+def compile_access_matrix(business_class_dir=BUSINESS_CLASS_DIR, security_class_dir=SECURITY_CLASS_DIR,
+                          metrics=None):
+    """Parse every security class and compile the access matrix"""
+    metrics = metrics or ScanMetrics('security access matrix')
+    print("Loading business classes...")
+    owners, actions = action_catalog(load_business_classes(business_class_dir, metrics))
+    by_module = defaultdict(list)
+    for class_name, owner in owners.items():
+        by_module[owner].append(class_name)
+
+    print("Compiling security classes...")
+    paths = sorted(os.path.join(security_class_dir, name) for name in listdir(security_class_dir)
+                   if name.endswith('.securityclass'))
+    metrics.total_files = (metrics.total_files or 0) + len(paths)
+    parsed = []
+    for path, content, error in metrics.timed(prefetch(paths), 'read'):
+        with metrics.file(path, len(content) if content else 0):
+            try:
+                if error is not None:
+                    raise error
+                with metrics.phase('tokenize'):
+                    name, grants = parse_security_class(content)
+                if name is not None:
+                    parsed.append((name, grants))
+            except Exception as e:
+                print(f"Error processing {os.path.basename(path)}: {e}")
+                metrics.add_error()
+
+    with metrics.phase('analyze'):
+        cells, conditions = [], {}
+        for name, grants in parsed:
+            granted, conditional, denied, conditional_denied = set(), set(), set(), set()
+            for kind, target, rule in grants:
+                if kind == 'BusinessClass':
+                    columns = class_columns(target, actions, rule['actions'], rule['excluding'])
+                elif kind == 'Module':
+                    columns = set().union(*(class_columns(class_name, actions, rule['actions'], rule['excluding'])
+                                            for class_name in by_module.get(target, ())))
+                else:
+                    columns = {f"{kind} {target}"}
+                if rule['deny']:
+                    (conditional_denied if rule['condition'] else denied).update(columns)
+                elif rule['condition']:
+                    conditional.update(columns)
+                    conditions.setdefault(name, {}).setdefault(f"{kind} {target}", []).append(rule['condition'])
+                else:
+                    granted.update(columns)
+            # Unconditional grants win over conditional ones; denials win over both
+            allowed = (granted | conditional) - denied
+            cells.append((name, allowed, ((conditional - granted) | conditional_denied) & allowed))
+
+        resources = sorted({column for _, granted, _ in cells for column in granted})
+        index = {resource: position for position, resource in enumerate(resources)}
+        security_classes = [name for name, _, _ in cells]
+        granted = [bitset(index[column] for column in columns) for _, columns, _ in cells]
+        conditional = [bitset(index[column] for column in columns) for _, _, columns in cells]
+    return AccessMatrix(security_classes, resources, granted, conditional, conditions,
+                        {class_name: owner for class_name, owner in owners.items() if owner})
+
+
+def bitset(positions):
+    """Build an int with the given bits set"""
+    positions = list(positions)
+    if not positions:
+        return 0
+    bits = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def save_access_matrix(matrix, matrix_file=MATRIX_FILE):
+    """Persist the matrix rows as hex bitsets"""
+    with open(matrix_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': 2, 'security_classes': matrix.security_classes, 'resources': matrix.resources,
+                   'granted': [format(bits, 'x') for bits in matrix.granted],
+                   'conditional': [format(bits, 'x') for bits in matrix.conditional],
+                   'conditions': matrix.conditions, 'owners': matrix.owners}, f, separators=(',', ':'))
+
+
+def load_access_matrix(matrix_file=MATRIX_FILE):
+    """Load a persisted matrix"""
+    with open(matrix_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return AccessMatrix(data['security_classes'], data['resources'], [int(bits, 16) for bits in data['granted']],
+                        [int(bits, 16) for bits in data['conditional']], data['conditions'], data.get('owners', {}))
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'who', 'what'):
+        print(__doc__)
+        return
+
+    if sys.argv[1] == 'build':
+        business_class_dir = sys.argv[2] if len(sys.argv) > 2 else BUSINESS_CLASS_DIR
+        security_class_dir = sys.argv[3] if len(sys.argv) > 3 else SECURITY_CLASS_DIR
+        metrics = ScanMetrics('security access matrix')
+        matrix = compile_access_matrix(business_class_dir, security_class_dir, metrics)
+        with metrics.phase('report'):
+            save_access_matrix(matrix)
+        cells = sum(bits.bit_count() for bits in matrix.granted)
+        conditional = sum(bits.bit_count() for bits in matrix.conditional)
+        print(f"Access matrix: {len(matrix.security_classes):,} security classes x {len(matrix.resources):,} "
+              f"resources, {cells:,} grants ({conditional:,} conditional)")
+        print(f"Saved to: {MATRIX_FILE}")
+        metrics.finish(METRICS_FILE)
+        return
+
+    if len(sys.argv) < 3:
+        print(__doc__)
+        return
+    matrix = load_access_matrix()
+    start = time.perf_counter()
+    if sys.argv[1] == 'who':
+        unconditional, conditional = matrix.who(*sys.argv[2:])
+        names = matrix.security_classes
+    else:
+        unconditional, conditional = matrix.what(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        names = matrix.resources
+    elapsed = (time.perf_counter() - start) * 1e6
+    print(f"Unconditional ({unconditional.bit_count():,}):")
+    for name in matrix.names(unconditional, names):
+        print(f"  {name}")
+    print(f"Conditional ({conditional.bit_count():,}):")
+    for name in matrix.names(conditional, names):
+        if sys.argv[1] == 'who':
+            conditions = matrix.grant_conditions(name, sys.argv[2])
+        else:
+            conditions = matrix.grant_conditions(sys.argv[2], name)
+        print(f"  {name}  when {'; '.join(dict.fromkeys(conditions))}")
+    print(f"Query time: {elapsed:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
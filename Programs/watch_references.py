@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Watch References/ and keep corpus aggregates current as files change.
+
+After one full scan, every business class and user action file contributes
+its own counts (set names, action types, relation targets). When files are
+dropped in, edited or deleted, only those files are re-parsed: the old
+contribution is subtracted from the totals and the new one added, and the
+report is rewritten. Change bursts (a copy of many files, an editor's
+save-rename dance) are debounced into one update, but never held longer
+than MAX_DELAY so reports stay current within about a second.
+
+Changes are picked up with inotify on Linux; elsewhere (or if inotify is not
+available) the watched folders are polled. The watcher is opened before the
+initial scan so edits made during it are not lost, and if the inotify queue
+overflows (events were dropped) every watched file is rescanned.
+
+Usage:
+    python watch_references.py [References dir] [--poll]
+"""
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import sys
+import time
+from collections import Counter
+
+from lpl_business_class import parse_business_class
+from lpl_config import REFERENCES_DIR, output_file
+from lpl_outline import parse_outline
+from prefetch_loader import prefetch
+
+OUTPUT_FILE = output_file('watch_aggregates.txt')
+
+WATCH_FOLDERS = ('', 'business class')
+WATCH_EXTENSIONS = ('.busclass', '.businessclass', '.useraction')
+CATEGORIES = ('set names', 'action types', 'relation targets')
+
+DEBOUNCE_SECONDS = 0.25
+MAX_DELAY = 0.75
+POLL_INTERVAL = 0.25
+
+DEFINITION_PATTERN = re.compile(r'([\w.]+)\s+is\s+an?\s+(.+)')
+
+
+def file_contribution(path, content):
+    """Return {category: Counter} for one reference file"""
+    contribution = {category: Counter() for category in CATEGORIES}
+    name = os.path.splitext(os.path.basename(path))[0]
+    if path.endswith('.useraction'):
+        # A user action file is a single action definition
+        roots = parse_outline(content)
+        match = DEFINITION_PATTERN.match(roots[0].text) if roots else None
+        if match:
+            contribution['action types'][match.group(2).strip()] += 1
+        return contribution
+    model = parse_business_class(content, name)
+    contribution['set names'].update(model['sets'].keys())
+    contribution['action types'].update(action['type'] for action in model['actions'].values() if action['type'])
+    contribution['relation targets'].update(relation['target'] for relation in model['relations'].values()
+                                            if relation['target'])
+    return contribution
+
+
+class IncrementalAggregates:
+    """Corpus totals kept as the sum of per-file contributions"""
+
+    def __init__(self):
+        self.contributions = {}
+        self.totals = {category: Counter() for category in CATEGORIES}
+
+    def __len__(self):
+        return len(self.contributions)
+
+    def remove(self, path):
+        """Subtract a file's previous contribution, if any"""
+        old = self.contributions.pop(path, None)
+        if old is None:
+            return
+        for category, counts in old.items():
+            total = self.totals[category]
+            total.subtract(counts)
+            for key in counts:
+                if total[key] <= 0:
+                    del total[key]
+
+    def update(self, path, contribution):
+        """Replace a file's contribution with a new one"""
+        self.remove(path)
+        self.contributions[path] = contribution
+        for category, counts in contribution.items():
+            self.totals[category].update(counts)
+
+
+def iter_watched_files(references_dir):
+    """Yield the path of every watched file currently on disk"""
+    for folder in WATCH_FOLDERS:
+        directory = os.path.join(references_dir, folder) if folder else references_dir
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(WATCH_EXTENSIONS) and entry.is_file():
+                    yield entry.path
+
+
+def apply_changes(aggregates, paths):
+    """Re-parse changed paths (removing deleted ones); returns the number of files re-parsed"""
+    existing = [path for path in paths if os.path.isfile(path)]
+    for path in set(paths).difference(existing):
+        aggregates.remove(path)
+    parsed = 0
+    for path, content, error in prefetch(existing):
+        if error is not None:
+            print(f"Error processing {os.path.basename(path)}: {error}")
+            aggregates.remove(path)
+            continue
+        try:
+            aggregates.update(path, file_contribution(path, content))
+        except Exception as e:
+            print(f"Error processing {os.path.basename(path)}: {e}")
+            aggregates.remove(path)
+            continue
+        parsed += 1
+    return parsed
+
+
+class PollingWatcher:
+    """Detects changes by comparing (mtime, size) snapshots of the watched folders"""
+
+    def __init__(self, references_dir, interval=POLL_INTERVAL):
+        self.references_dir = references_dir
+        self.interval = interval
+        self.overflowed = False
+        self._state = self._scan()
+
+    def _scan(self):
+        state = {}
+        for path in iter_watched_files(self.references_dir):
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (status.st_mtime_ns, status.st_size)
+        return state
+
+    def wait(self, timeout=None):
+        """Return the set of paths changed since the last call, waiting up to timeout seconds"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {path for path in current.keys() | self._state.keys()
+                       if current.get(path) != self._state.get(path)}
+            self._state = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval if deadline is None else max(0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher over the watched folders (via libc, no extra packages)"""
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct('iIII')
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, references_dir):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.references_dir = references_dir
+        self.overflowed = False
+        self._folders = {}
+        for folder in WATCH_FOLDERS:
+            directory = os.path.join(references_dir, folder) if folder else references_dir
+            if not os.path.isdir(directory):
+                continue
+            descriptor = libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+            if descriptor < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self._folders[descriptor] = directory
+
+    def wait(self, timeout=None):
+        """Return the set of watched paths with events, waiting up to timeout seconds
+
+        After a queue overflow the events are incomplete, so every watched file
+        on disk is returned and overflowed is set until the caller clears it.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                descriptor, mask, _, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'ignore')
+                offset += length
+                if mask & self.IN_Q_OVERFLOW:
+                    self.overflowed = True
+                elif name.endswith(WATCH_EXTENSIONS) and descriptor in self._folders:
+                    changed.add(os.path.join(self._folders[descriptor], name))
+        if self.overflowed:
+            changed.update(iter_watched_files(self.references_dir))
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def open_watcher(references_dir, force_polling=False):
+    """Prefer inotify; fall back to polling where it is unavailable"""
+    if not force_polling:
+        try:
+            return InotifyWatcher(references_dir)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(references_dir)
+
+
+def next_batch(watcher, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DELAY):
+    """Block for the first change, then gather the burst until it goes quiet or max_delay passes"""
+    changed = set()
+    while not changed:
+        changed = watcher.wait(None)
+    deadline = time.monotonic() + max_delay
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        more = watcher.wait(min(debounce, remaining))
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def format_report(aggregates, references_dir):
+    """Render the current totals"""
+    report = f"=== LIVE REFERENCE AGGREGATES ({len(aggregates):,} files) ===\n"
+    report += f"Source: {references_dir}\n"
+    report += f"Updated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    for category in CATEGORIES:
+        counts = aggregates.totals[category]
+        report += f"\nTop 20 {category.title()} ({len(counts):,} distinct, {sum(counts.values()):,} total):\n"
+        for key, count in counts.most_common(20):
+            report += f"  {key}: {count:,}\n"
+    return report
+
+
+def write_report(aggregates, references_dir, output_file=OUTPUT_FILE):
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(format_report(aggregates, references_dir))
+
+
+def main():
+    arguments = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    references_dir = arguments[0] if arguments else REFERENCES_DIR
+
+    # Watch first: a file changed during the initial scan is then re-parsed in the first batch
+    watcher = open_watcher(references_dir, force_polling='--poll' in sys.argv)
+    aggregates = IncrementalAggregates()
+    start = time.perf_counter()
+    parsed = apply_changes(aggregates, list(iter_watched_files(references_dir)))
+    write_report(aggregates, references_dir)
+    print(f"Initial scan: {parsed:,} files in {time.perf_counter() - start:.1f}s")
+
+    print(f"Watching {references_dir} ({type(watcher).__name__}); report: {OUTPUT_FILE}")
+    try:
+        while True:
+            changed = next_batch(watcher)
+            if watcher.overflowed:
+                # Dropped events may include deletions, so recheck every tracked file too
+                watcher.overflowed = False
+                changed |= set(aggregates.contributions)
+                print(f"[{time.strftime('%H:%M:%S')}] Event queue overflowed; rescanning all files")
+            start = time.perf_counter()
+            parsed = apply_changes(aggregates, sorted(changed))
+            write_report(aggregates, references_dir)
+            print(f"[{time.strftime('%H:%M:%S')}] {len(changed)} changed, {parsed} re-parsed, "
+                  f"{len(aggregates):,} files tracked ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()